@@ -9,32 +9,25 @@ def __():
     import marimo as mo
     from src.marimo_notebook.modules import llm_module
     import json
-    return json, llm_module, mo
+    import time
+    return json, llm_module, mo, time
 
 
 @app.cell
 def __(llm_module):
-    llm_o1_mini, llm_o1_preview = llm_module.build_o1_series()
-    llm_gpt_4o_latest, llm_gpt_4o_mini = llm_module.build_openai_latest_and_fastest()
-    # llm_sonnet = llm_module.build_sonnet_3_5()
-    # gemini_1_5_pro, gemini_1_5_flash = llm_module.build_gemini_duo()
-
-    models = {
-        "o1-mini": llm_o1_mini,
-        "o1-preview": llm_o1_preview,
-        "gpt-4o-latest": llm_gpt_4o_latest,
-        "gpt-4o-mini": llm_gpt_4o_mini,
-        # "sonnet-3.5": llm_sonnet,
-        # "gemini-1-5-pro": gemini_1_5_pro,
-        # "gemini-1-5-flash": gemini_1_5_flash,
-    }
-    return (
-        llm_gpt_4o_latest,
-        llm_gpt_4o_mini,
-        llm_o1_mini,
-        llm_o1_preview,
-        models,
+    # Models are only built when a cell first uses them (see model_registry)
+    models = llm_module.lazy_models(
+        [
+            "o1-mini",
+            "o1-preview",
+            "gpt-4o-latest",
+            "gpt-4o-mini",
+            # "sonnet-3.5",
+            # "gemini-1-5-pro",
+            # "gemini-1-5-flash",
+        ]
     )
+    return (models,)
 
 
 @app.cell
@@ -104,20 +97,46 @@ def __(form, mo):
 
 
 @app.cell
-def __(form, llm_module, mo):
+def __(form, llm_module, mo, time):
     mo.stop(not form.value or form.value["multi_model"], "")
 
-    prompt_response = None
+    prompt_response = ""
+    prompt_output_style = {
+        "background": "#eee",
+        "padding": "10px",
+        "border-radius": "10px",
+    }
 
-    with mo.status.spinner(title="Loading..."):
-        prompt_response = llm_module.prompt_with_temp(
-            form.value["model"], form.value["prompt"], form.value["temp"]
-        )
+    # Render the response while it streams in, at most every 100ms
+    prompt_stream = llm_module.stream_prompt(
+        form.value["model"], form.value["prompt"], form.value["temp"]
+    )
+    _last_render = 0.0
+    for _chunk in prompt_stream:
+        prompt_response += _chunk
+        if time.monotonic() - _last_render > 0.1:
+            mo.output.replace(
+                mo.md(f"# Prompt Output\n\n{prompt_response}").style(
+                    prompt_output_style
+                )
+            )
+            _last_render = time.monotonic()
 
-    mo.md(f"# Prompt Output\n\n{prompt_response}").style(
-        {"background": "#eee", "padding": "10px", "border-radius": "10px"}
+    stream_metrics = prompt_stream.metrics
+    mo.output.replace(
+        mo.md(
+            f"# Prompt Output\n\n{prompt_response}\n\n"
+            f"*First token {stream_metrics.time_to_first_token or 0:.2f}s, "
+            f"total {stream_metrics.total_seconds:.2f}s, "
+            f"~{stream_metrics.tokens_per_second or 0:.0f} tokens/sec*"
+        ).style(prompt_output_style)
+    )
+    return (
+        prompt_output_style,
+        prompt_response,
+        prompt_stream,
+        stream_metrics,
     )
-    return (prompt_response,)
 
 
 @app.cell
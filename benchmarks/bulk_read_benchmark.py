@@ -0,0 +1,76 @@
+"""
+Benchmark: pull_in_dir_recursively vs pull_in_dir_parallel on a large prompt corpus.
+
+Generates a corpus of small prompt files (100 directories, --files in total)
+in a temporary directory, or reads an existing one given with --dir, e.g. on a
+network mount, where the per-file latency the parallel reader overlaps is highest.
+
+Run from the repository root:
+    uv run python benchmarks/bulk_read_benchmark.py --files 100000
+    uv run python benchmarks/bulk_read_benchmark.py --dir /mnt/share/prompts
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.marimo_notebook.modules.prompt_library_module import (
+    pull_in_dir_parallel,
+    pull_in_dir_recursively,
+)
+
+DIRECTORIES = 100
+
+
+def generate_corpus(root: str, files: int):
+    per_directory = max(1, files // DIRECTORIES)
+    for directory in range(DIRECTORIES):
+        path = os.path.join(root, f"topic_{directory:03d}")
+        os.makedirs(path)
+        for index in range(per_directory):
+            # Every 10th prompt with Windows line endings, read as "\n" by both readers
+            newline = "\r\n" if index % 10 == 0 else "\n"
+            with open(
+                os.path.join(path, f"prompt_{index:05d}.xml"), "w", newline=newline
+            ) as f:
+                f.write(f"<purpose>Prompt {directory}/{index}</purpose>\n" * 20)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<36}{(time.perf_counter() - start) * 1000:10.1f} ms")
+    return result
+
+
+def run(root: str):
+    recursive = timed("pull_in_dir_recursively", lambda: pull_in_dir_recursively(root))
+    for num_workers in [4, 16, 64]:
+        parallel = timed(
+            f"pull_in_dir_parallel ({num_workers} workers)",
+            lambda: pull_in_dir_parallel(root, num_workers=num_workers),
+        )
+    assert parallel == recursive
+    print(f"{len(parallel)} files")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--dir", help="Existing corpus to read instead")
+    args = parser.parse_args()
+
+    if args.dir:
+        run(args.dir)
+        return
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, args.files)
+        run(root)
+
+
+if __name__ == "__main__":
+    main()
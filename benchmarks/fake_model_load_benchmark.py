@@ -0,0 +1,68 @@
+"""
+Benchmark: FusionChain execution strategies and the response cache on the fake models.
+
+Runs a 3 step prompt chain over several fake models (seeded lognormal latency,
+no network) with FusionChain.run, run_parallel and run_scheduled, then repeats
+the sequential run with a warm ResponseCache.
+
+Run from the repository root:
+    uv run python benchmarks/fake_model_load_benchmark.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.marimo_notebook.modules import llm_module
+from src.marimo_notebook.modules.chain import FusionChain
+from src.marimo_notebook.modules.response_cache import ResponseCache
+
+MODEL_NAMES = ["fake", "fake-slow-tail", "fake-json", "fake-instant"]
+PROMPTS = [
+    "Summarize the topic {{topic}} in one paragraph.",
+    "List three risks of this summary: {{output[-1]}}",
+    "Pick the biggest risk from: {{output[-1]}}",
+]
+CONTEXT = {"topic": "on-device language models"}
+
+
+def evaluator(outputs):
+    return outputs[0], [1.0 / (index + 1) for index in range(len(outputs))]
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    print(f"{label:<34}{(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+def main():
+    models = [llm_module.get_model(name) for name in MODEL_NAMES]
+
+    def call(model, prompt):
+        return llm_module.prompt(model, prompt)
+
+    args = (CONTEXT, models, call, PROMPTS, evaluator, llm_module.get_model_name)
+    timed("FusionChain.run", lambda: FusionChain.run(*args))
+    timed("FusionChain.run_parallel", lambda: FusionChain.run_parallel(*args))
+    timed("FusionChain.run_scheduled", lambda: FusionChain.run_scheduled(*args))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(path=os.path.join(cache_dir, "responses.sqlite"))
+
+        def cached_call(model, prompt):
+            return llm_module.prompt(model, prompt, cache=cache)
+
+        cached_args = (CONTEXT, models, cached_call) + args[3:]
+        timed("FusionChain.run, cold cache", lambda: FusionChain.run(*cached_args))
+        timed("FusionChain.run, warm cache", lambda: FusionChain.run(*cached_args))
+        print(cache.stats())
+
+    print(llm_module.call_metrics_summary())
+
+
+if __name__ == "__main__":
+    main()
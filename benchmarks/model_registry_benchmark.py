@@ -0,0 +1,59 @@
+"""
+Benchmark: notebook model setup with eager llm.get_model calls vs the lazy model registry.
+
+The eager path is what build_o1_series() + build_openai_latest_and_fastest()
+used to do at notebook start: one llm.get_model call per model, each of which
+runs every installed plugin's register_models hook.
+
+Run from the repository root:
+    uv run python benchmarks/model_registry_benchmark.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm
+from src.marimo_notebook.modules import model_registry
+
+NOTEBOOK_MODELS = ["o1-mini", "o1-preview", "gpt-4o-latest", "gpt-4o-mini"]
+
+
+def eager_setup():
+    models = {}
+    for name in NOTEBOOK_MODELS:
+        spec = model_registry.MODEL_REGISTRY[name]
+        model = llm.get_model(spec.llm_model_id)
+        model.key = os.getenv(spec.key_env) if spec.key_env else None
+        models[name] = model
+    return models
+
+
+def main():
+    start = time.perf_counter()
+    eager_setup()
+    eager = time.perf_counter() - start
+
+    start = time.perf_counter()
+    models = model_registry.lazy_models(NOTEBOOK_MODELS)
+    lazy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    models["gpt-4o-mini"].model_id
+    first_use = time.perf_counter() - start
+
+    start = time.perf_counter()
+    models["o1-mini"].model_id
+    second_use = time.perf_counter() - start
+
+    print(f"eager setup of {len(NOTEBOOK_MODELS)} models   {eager * 1000:9.3f} ms")
+    print(f"lazy setup of {len(NOTEBOOK_MODELS)} models    {lazy * 1000:9.3f} ms")
+    print(f"first model used             {first_use * 1000:9.3f} ms")
+    print(f"second model used            {second_use * 1000:9.3f} ms")
+    print(model_registry.registry_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: regex + json.loads vs output_parser.parse_output on ~100KB responses.
+
+Run from the repository root:
+    uv run python benchmarks/output_parse_benchmark.py
+"""
+
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.marimo_notebook.modules.output_parser import parse_output
+
+RESPONSE_SIZE = 100 * 1024
+ITERATIONS = 5
+
+
+def legacy_parse(result):
+    """The regex based parse previously used by MinimalChainable.run."""
+    try:
+        json_match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", result)
+        if json_match:
+            result = json.loads(json_match.group(1))
+        else:
+            result = json.loads(result)
+    except json.JSONDecodeError:
+        pass
+    return result
+
+
+def build_responses():
+    sentence = "The model explains its reasoning in plain prose here. "
+    prose = (sentence * (RESPONSE_SIZE // len(sentence) + 1))[:RESPONSE_SIZE]
+
+    item = {"id": 0, "title": "chapter", "tags": ["a", "b"]}
+    count = RESPONSE_SIZE // len(json.dumps(item, indent=2))
+    payload = json.dumps({"items": [dict(item, id=i) for i in range(count)]}, indent=2)
+
+    return {
+        "fenced json": f"Here is the result:\n```json\n{payload}\n```\nDone.",
+        "bare json": payload,
+        "prose, no json": prose,
+        # An unclosed fence followed by a whitespace run makes the regex backtrack
+        "unclosed fence": "```json\n" + " " * 400 + prose,
+    }
+
+
+def main():
+    responses = build_responses()
+    for label, response in responses.items():
+        assert legacy_parse(response) == parse_output(response).value, label
+
+        legacy = timeit.timeit(lambda: legacy_parse(response), number=ITERATIONS)
+        linear = timeit.timeit(lambda: parse_output(response), number=ITERATIONS)
+        print(
+            f"{label:24s} {len(response) / 1024:6.0f}KB "
+            f"regex {legacy / ITERATIONS * 1000:9.3f} ms  "
+            f"parse_output {linear / ITERATIONS * 1000:9.3f} ms  "
+            f"{legacy / linear:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: filling prompt chains with str.replace loops vs compiled templates.
+
+Builds a chain out of the ~22KB testable_prompts/context_window prompts, each
+with context keys and back-references to earlier outputs, then times how long
+it takes to fill every prompt of the chain with both approaches.
+
+Run from the repository root:
+    uv run python benchmarks/template_fill_benchmark.py
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.marimo_notebook.modules.chain import CompiledPrompt, compile_prompt
+
+CONTEXT_WINDOW_DIR = "testable_prompts/context_window"
+CHAIN_DEPTH = 8
+CONTEXT_SIZE = 50
+ITERATIONS = 50
+
+
+def legacy_fill(context, prompts, outputs):
+    """The str.replace based fill previously used by MinimalChainable.run."""
+    filled = []
+    for i, prompt in enumerate(prompts):
+        for key, value in context.items():
+            if "{{" + key + "}}" in prompt:
+                prompt = prompt.replace("{{" + key + "}}", str(value))
+        for j in range(i, 0, -1):
+            previous_output = outputs[i - j]
+            if isinstance(previous_output, dict):
+                if f"{{{{output[-{j}]}}}}" in prompt:
+                    prompt = prompt.replace(
+                        f"{{{{output[-{j}]}}}}", json.dumps(previous_output)
+                    )
+                for key, value in previous_output.items():
+                    if f"{{{{output[-{j}].{key}}}}}" in prompt:
+                        prompt = prompt.replace(
+                            f"{{{{output[-{j}].{key}}}}}", str(value)
+                        )
+            else:
+                if f"{{{{output[-{j}]}}}}" in prompt:
+                    prompt = prompt.replace(
+                        f"{{{{output[-{j}]}}}}", str(previous_output)
+                    )
+        filled.append(prompt)
+    return filled
+
+
+def compiled_fill(context, prompts, outputs):
+    return [
+        compile_prompt(prompt).render(context, outputs, i)
+        for i, prompt in enumerate(prompts)
+    ]
+
+
+def uncached_compiled_fill(context, prompts, outputs):
+    return [
+        CompiledPrompt(prompt).render(context, outputs, i)
+        for i, prompt in enumerate(prompts)
+    ]
+
+
+def build_chain():
+    bodies = []
+    for name in sorted(os.listdir(CONTEXT_WINDOW_DIR)):
+        with open(os.path.join(CONTEXT_WINDOW_DIR, name), "r") as f:
+            bodies.append(f.read())
+
+    context = {f"key_{k}": f"value number {k}" for k in range(CONTEXT_SIZE)}
+    prompts = []
+    for i in range(CHAIN_DEPTH):
+        body = bodies[i % len(bodies)]
+        header = " ".join("{{key_%d}}" % k for k in range(0, CONTEXT_SIZE, 7))
+        refs = ""
+        if i > 0:
+            refs = (
+                "\n\nPrevious answer: {{output[-1]}}\nSummary: {{output[-1].summary}}"
+            )
+        prompts.append(f"{header}\n\n{body}{refs}")
+
+    outputs = [
+        {"summary": f"summary of step {i}", "answer": "x" * 200}
+        for i in range(CHAIN_DEPTH)
+    ]
+    return context, prompts, outputs
+
+
+def main():
+    context, prompts, outputs = build_chain()
+
+    assert legacy_fill(context, prompts, outputs) == compiled_fill(
+        context, prompts, outputs
+    )
+
+    prompt_bytes = sum(len(prompt) for prompt in prompts)
+    print(
+        f"Chain: {CHAIN_DEPTH} prompts, {prompt_bytes / 1024:.0f}KB of prompt text, "
+        f"{CONTEXT_SIZE} context keys"
+    )
+
+    results = {}
+    for label, fn in [
+        ("str.replace loop", legacy_fill),
+        ("compiled (parse every call)", uncached_compiled_fill),
+        ("compiled (cached parse)", compiled_fill),
+    ]:
+        seconds = timeit.timeit(
+            lambda: fn(context, prompts, outputs), number=ITERATIONS
+        )
+        results[label] = seconds / ITERATIONS
+        print(f"{label:30s} {results[label] * 1000:8.3f} ms per chain")
+
+    baseline = results["str.replace loop"]
+    for label, seconds in results.items():
+        print(f"{label:30s} {baseline / seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
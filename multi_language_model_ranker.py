@@ -15,49 +15,105 @@ def __():
 
 
 @app.cell
-def __(prompt_library_module):
-    map_testable_prompts: dict = prompt_library_module.pull_in_testable_prompts()
-    return (map_testable_prompts,)
+def __(mo, prompt_library_module):
+    map_testable_prompts = prompt_library_module.pull_in_testable_prompts()
+    prompt_search_index = prompt_library_module.build_search_index(
+        map_testable_prompts, trigrams=True
+    )
+    # Edits under testable_prompts/ are applied to map_testable_prompts (and the
+    # search index) in the background; the cells below pick up just the changes.
+    # Re-running this cell stops the previous watcher before starting a new one.
+    prompt_watcher = prompt_library_module.watch_prompts(
+        map_testable_prompts, search_index=prompt_search_index
+    )
+    get_prompt_changes, set_prompt_changes = mo.state({})
+    prompt_refresh = mo.ui.refresh(default_interval="2s", label="Watch prompts")
+    return (
+        get_prompt_changes,
+        map_testable_prompts,
+        prompt_refresh,
+        prompt_search_index,
+        prompt_watcher,
+        set_prompt_changes,
+    )
+
+
+@app.cell
+def __(prompt_refresh, prompt_watcher, set_prompt_changes):
+    prompt_refresh.value
+    _changes = prompt_watcher.drain()
+    if any(_changes.values()):
+        set_prompt_changes(_changes)
+    prompt_refresh
+    return
 
 
 @app.cell
 def __(llm_module):
-    llm_o1_mini, llm_o1_preview = llm_module.build_o1_series()
-    llm_gpt_4o_latest, llm_gpt_4o_mini = llm_module.build_openai_latest_and_fastest()
-    # llm_sonnet = llm_module.build_sonnet_3_5()
-    # gemini_1_5_pro, gemini_1_5_flash = llm_module.build_gemini_duo()
-    # gemini_1_5_pro_2, gemini_1_5_flash_2 = llm_module.build_gemini_1_2_002()
-    # llama3_2_model, llama3_2_1b_model = llm_module.build_ollama_models()
-    # _, phi3_5_model, qwen2_5_model = llm_module.build_ollama_slm_models()
-
-    models = {
-        "o1-mini": llm_o1_mini,
-        "o1-preview": llm_o1_preview,
-        "gpt-4o-latest": llm_gpt_4o_latest,
-        "gpt-4o-mini": llm_gpt_4o_mini,
-        # "sonnet-3.5": llm_sonnet,
-        # "gemini-1-5-pro": gemini_1_5_pro,
-        # "gemini-1-5-flash": gemini_1_5_flash,
-        # "gemini-1-5-pro-002": gemini_1_5_pro_2,
-        # "gemini-1-5-flash-002": gemini_1_5_flash_2,
-        # "llama3-2": llama3_2_model,
-        # "llama3-2-1b": llama3_2_1b_model,
-        # "phi3-5": phi3_5_model,
-        # "qwen2-5": qwen2_5_model,
-    }
-    return (
-        llm_gpt_4o_latest,
-        llm_gpt_4o_mini,
-        llm_o1_mini,
-        llm_o1_preview,
-        models,
+    # Models are only built when a cell first uses them (see model_registry)
+    models = llm_module.lazy_models(
+        [
+            "o1-mini",
+            "o1-preview",
+            "gpt-4o-latest",
+            "gpt-4o-mini",
+            # "sonnet-3.5",
+            # "gemini-1-5-pro",
+            # "gemini-1-5-flash",
+            # "gemini-1-5-pro-002",
+            # "gemini-1-5-flash-002",
+            # "llama3-2",
+            # "llama3-2-1b",
+            # "phi3-5",
+            # "qwen2-5",
+        ]
+    )
+    return (models,)
+
+
+@app.cell
+def __(mo):
+    prompt_search = mo.ui.text(
+        placeholder="Search prompt names and bodies",
+        debounce=150,
+        label="Search Prompts",
+        full_width=True,
     )
+    prompt_search
+    return (prompt_search,)
+
+
+@app.cell
+def __():
+    # The last submitted prompt selection, updated by the form's on_change so it
+    # survives rebuilding prompt_multiselect. A plain list rather than mo.state,
+    # since setting state would rebuild the form and clear its submitted value.
+    submitted_prompts = []
+    return (submitted_prompts,)
 
 
 @app.cell
-def __(map_testable_prompts, mo, models):
+def __(
+    get_prompt_changes,
+    map_testable_prompts,
+    mo,
+    models,
+    prompt_search,
+    prompt_search_index,
+    submitted_prompts,
+):
+    # Rebuilt only when the search changes or the watcher reported added,
+    # modified or removed prompts; selected prompts stay selected (and listed)
+    get_prompt_changes()
+    _selected = [p for p in submitted_prompts if p in map_testable_prompts]
+    _matches = (
+        prompt_search_index.search(prompt_search.value)
+        if prompt_search.value.strip()
+        else list(map_testable_prompts.keys())
+    )
     prompt_multiselect = mo.ui.multiselect(
-        options=list(map_testable_prompts.keys()),
+        options=_matches + [p for p in _selected if p not in set(_matches)],
+        value=_selected,
         label="Select Prompts",
     )
     prompt_temp_slider = mo.ui.slider(
@@ -83,7 +139,17 @@ def __():
 
 
 @app.cell
-def __(mo, model_multiselect, prompt_multiselect, prompt_temp_slider):
+def __(
+    mo,
+    model_multiselect,
+    prompt_multiselect,
+    prompt_temp_slider,
+    submitted_prompts,
+):
+    def _remember_prompts(value):
+        if value is not None:
+            submitted_prompts[:] = value["prompts"]
+
     form = (
         mo.md(
             r"""
@@ -98,7 +164,7 @@ def __(mo, model_multiselect, prompt_multiselect, prompt_temp_slider):
             temp=prompt_temp_slider,
             models=model_multiselect,
         )
-        .form()
+        .form(on_change=_remember_prompts)
     )
     form
     return (form,)
@@ -153,14 +219,25 @@ def __(form, llm_module, map_testable_prompts, mo, prompt_library_module):
                     title=f"Prompting '{model_name}' with '{selected_prompt_name}'",
                     increment=1,
                 )
-                raw_prompt_response = llm_module.prompt_with_temp(
-                    model, selected_prompt, form.value["temp"]
-                )
+                # Skip calls that would overflow the model's context window
+                budget = llm_module.check_budget(model, selected_prompt)
+                if budget.fits:
+                    raw_prompt_response = llm_module.prompt_with_temp(
+                        model, selected_prompt, form.value["temp"]
+                    )
+                    latency_seconds = llm_module.METRICS.last_record().wall_seconds
+                else:
+                    latency_seconds = None
+                    raw_prompt_response = (
+                        f"Skipped: prompt of ~{budget.prompt_tokens} tokens exceeds "
+                        f"the {budget.max_prompt_tokens} token prompt budget"
+                    )
                 prompt_responses.append(
                     {
                         "model_id": model_name,
                         "model": model,
                         "output": raw_prompt_response,
+                        "latency_seconds": latency_seconds,
                     }
                 )
 
@@ -171,24 +248,26 @@ def __(form, llm_module, map_testable_prompts, mo, prompt_library_module):
             ]
 
             # Record the execution
-            execution_filepath = prompt_library_module.record_llm_execution(
+            execution_id = prompt_library_module.record_llm_execution(
                 prompt=selected_prompt,
                 list_model_execution_dict=list_model_execution_dict,
                 prompt_template=selected_prompt_name,
             )
-            print(f"Execution record saved to: {execution_filepath}")
+            print(f"Execution recorded as {execution_id}")
 
             all_prompt_responses.append(
                 {
                     "prompt_name": selected_prompt_name,
                     "prompt": selected_prompt,
                     "responses": prompt_responses,
-                    "execution_filepath": execution_filepath,
+                    "execution_id": execution_id,
                 }
             )
     return (
         all_prompt_responses,
-        execution_filepath,
+        budget,
+        execution_id,
+        latency_seconds,
         list_model_execution_dict,
         model,
         model_name,
@@ -274,6 +353,7 @@ def __(all_prompt_responses, copy_to_clipboard, form, mo):
                     "Prompt": prompt_data["prompt_name"],
                     "Model": response["model_id"],
                     "Output": response["output"],
+                    "Latency (s)": response["latency_seconds"],
                 }
             )
 
@@ -286,6 +366,7 @@ def __(all_prompt_responses, copy_to_clipboard, form, mo):
         label="Model Responses",
         format_mapping={
             "Output": lambda val: "(trimmed) " + val[:15],
+            "Latency (s)": lambda val: "-" if val is None else f"{val:.2f}",
             # "Output": lambda val: val,
         },
     )
@@ -437,9 +518,10 @@ def __(form, load_ranking_button, mo, prompt_library_module, set_rankings):
 
 
 @app.cell
-def __(get_rankings, mo):
+def __(get_rankings, llm_module, mo):
     # Create UI elements for each model
     model_elements = []
+    call_metrics = llm_module.call_metrics_summary()
 
     model_score_style = {
         "background": "#eeF",
@@ -453,11 +535,18 @@ def __(get_rankings, mo):
     for model_ranking in get_rankings():
         llm_model_id = model_ranking.llm_model_id
         score = model_ranking.score
+        model_call_metrics = call_metrics.get(llm_model_id)
+        latency_text = (
+            f"p50 {model_call_metrics['latency_p50']:.2f}s · "
+            f"${model_call_metrics['cost_usd']:.4f}"
+            if model_call_metrics
+            else ""
+        )
         model_elements.append(
             mo.vstack(
                 [
                     mo.md(f"**{llm_model_id}**  "),
-                    mo.hstack([mo.md(f""), mo.md(f"# {score}")]),
+                    mo.hstack([mo.md(latency_text), mo.md(f"# {score}")]),
                 ],
                 justify="space-between",
                 gap="2",
@@ -466,7 +555,10 @@ def __(get_rankings, mo):
 
     mo.hstack(model_elements, justify="start", wrap=True)
     return (
+        call_metrics,
+        latency_text,
         llm_model_id,
+        model_call_metrics,
         model_elements,
         model_ranking,
         model_score_style,
@@ -16,33 +16,23 @@ def __():
 
 @app.cell
 def __(llm_module):
-    llm_o1_mini, llm_o1_preview = llm_module.build_o1_series()
-    llm_gpt_4o_latest, llm_gpt_4o_mini = llm_module.build_openai_latest_and_fastest()
-    # llm_sonnet = llm_module.build_sonnet_3_5()
-    # gemini_1_5_pro, gemini_1_5_flash = llm_module.build_gemini_duo()
-    # gemini_1_5_pro_2, gemini_1_5_flash_2 = llm_module.build_gemini_1_2_002()
-    # llama3_2_model, llama3_2_1b_model = llm_module.build_ollama_models()
-
-    models = {
-        "o1-mini": llm_o1_mini,
-        "o1-preview": llm_o1_preview,
-        "gpt-4o-latest": llm_gpt_4o_latest,
-        "gpt-4o-mini": llm_gpt_4o_mini,
-        # "sonnet-3.5": llm_sonnet,
-        # "gemini-1-5-pro": gemini_1_5_pro,
-        # "gemini-1-5-flash": gemini_1_5_flash,
-        # "gemini-1-5-pro-002": gemini_1_5_pro_2,
-        # "gemini-1-5-flash-002": gemini_1_5_flash_2,
-        # "llama3-2": llama3_2_model,
-        # "llama3-2-1b": llama3_2_1b_model,
-    }
-    return (
-        llm_gpt_4o_latest,
-        llm_gpt_4o_mini,
-        llm_o1_mini,
-        llm_o1_preview,
-        models,
+    # Models are only built when a cell first uses them (see model_registry)
+    models = llm_module.lazy_models(
+        [
+            "o1-mini",
+            "o1-preview",
+            "gpt-4o-latest",
+            "gpt-4o-mini",
+            # "sonnet-3.5",
+            # "gemini-1-5-pro",
+            # "gemini-1-5-flash",
+            # "gemini-1-5-pro-002",
+            # "gemini-1-5-flash-002",
+            # "llama3-2",
+            # "llama3-2-1b",
+        ]
     )
+    return (models,)
 
 
 @app.cell
@@ -110,14 +100,14 @@ def __(form, llm_module, mo, prompt_library_module):
     ]
 
     # Record the execution
-    execution_filepath = prompt_library_module.record_llm_execution(
+    execution_id = prompt_library_module.record_llm_execution(
         prompt=form.value["prompt"],
         list_model_execution_dict=list_model_execution_dict,
         prompt_template=None,  # You can add a prompt template if you have one
     )
-    print(f"Execution record saved to: {execution_filepath}")
+    print(f"Execution recorded as {execution_id}")
     return (
-        execution_filepath,
+        execution_id,
         list_model_execution_dict,
         model,
         model_name,
@@ -14,33 +14,25 @@ def __():
 
 @app.cell
 def __(prompt_library_module):
-    map_prompt_library: dict = prompt_library_module.pull_in_prompt_library()
+    map_prompt_library = prompt_library_module.pull_in_prompt_library()
     return (map_prompt_library,)
 
 
 @app.cell
 def __(llm_module):
-    llm_o1_mini, llm_o1_preview = llm_module.build_o1_series()
-    llm_gpt_4o_latest, llm_gpt_4o_mini = llm_module.build_openai_latest_and_fastest()
-    # llm_sonnet = llm_module.build_sonnet_3_5()
-    # gemini_1_5_pro, gemini_1_5_flash = llm_module.build_gemini_duo()
-
-    models = {
-        "o1-mini": llm_o1_mini,
-        "o1-preview": llm_o1_preview,
-        "gpt-4o-latest": llm_gpt_4o_latest,
-        "gpt-4o-mini": llm_gpt_4o_mini,
-        # "sonnet-3.5": llm_sonnet,
-        # "gemini-1-5-pro": gemini_1_5_pro,
-        # "gemini-1-5-flash": gemini_1_5_flash,
-    }
-    return (
-        llm_gpt_4o_latest,
-        llm_gpt_4o_mini,
-        llm_o1_mini,
-        llm_o1_preview,
-        models,
+    # Models are only built when a cell first uses them (see model_registry)
+    models = llm_module.lazy_models(
+        [
+            "o1-mini",
+            "o1-preview",
+            "gpt-4o-latest",
+            "gpt-4o-mini",
+            # "sonnet-3.5",
+            # "gemini-1-5-pro",
+            # "gemini-1-5-flash",
+        ]
     )
+    return (models,)
 
 
 @app.cell
@@ -0,0 +1,356 @@
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .typings import BatchRequest
+
+# Batch statuses after which a batch no longer changes (OpenAI's names)
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# How long BatchRunner waits by default: the 24h completion window plus slack
+DEFAULT_BATCH_TIMEOUT = 25 * 60 * 60.0
+
+
+def _request_line(request: BatchRequest) -> Dict[str, Any]:
+    # One line of an OpenAI batch input file
+    return {
+        "custom_id": request.custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": request.llm_model_id,
+            "messages": [{"role": "user", "content": request.prompt}],
+            **request.params,
+        },
+    }
+
+
+def _output_line(custom_id: str, text: Optional[str], error: Optional[str]):
+    # One line of an OpenAI batch output (or error) file
+    if error is not None:
+        return {
+            "id": f"batch_req_{uuid.uuid4().hex}",
+            "custom_id": custom_id,
+            "response": None,
+            "error": {"code": "request_failed", "message": error},
+        }
+    return {
+        "id": f"batch_req_{uuid.uuid4().hex}",
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "body": {
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }
+                ],
+            },
+        },
+        "error": None,
+    }
+
+
+def parse_output_lines(lines: List[str]) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Parse batch output/error file lines into {custom_id: {"output": ..., "error": ...}}.
+    """
+    results = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        error = item.get("error")
+        if error:
+            results[item["custom_id"]] = {
+                "output": None,
+                "error": error.get("message") or str(error),
+            }
+        elif response.get("status_code") != 200:
+            results[item["custom_id"]] = {
+                "output": None,
+                "error": f"status {response.get('status_code')}: {response.get('body')}",
+            }
+        else:
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[item["custom_id"]] = {"output": content, "error": None}
+    return results
+
+
+def write_batch_file(path: str, requests: List[BatchRequest]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        for request in requests:
+            f.write(json.dumps(_request_line(request)) + "\n")
+
+
+class OpenAIBatchBackend:
+    """
+    Submits batch files to the OpenAI Batch API (half the price of interactive
+    calls, results within completion_window). Only OpenAI models can be batched.
+    """
+
+    providers = {"openai"}
+
+    def __init__(
+        self,
+        client: Any = None,
+        batch_dir: str = "./llm_batches",
+        completion_window: str = "24h",
+    ):
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = client
+        self.batch_dir = batch_dir
+        self.completion_window = completion_window
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        path = os.path.join(self.batch_dir, f"input_{uuid.uuid4().hex}.jsonl")
+        write_batch_file(path, requests)
+        with open(path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Optional[str]]]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in [batch.output_file_id, batch.error_file_id]:
+            if file_id:
+                lines.extend(self.client.files.content(file_id).text.splitlines())
+        return parse_output_lines(lines)
+
+
+class LocalBatchServer:
+    """
+    Offline stand-in for a batch API, speaking the OpenAI batch file formats.
+
+    Submitted batch files are written to batch_dir and worked off by a background
+    thread that answers every request with respond(request), so a whole batch run
+    (files, polling, mapping results back) can be exercised without a network.
+    A batch that cannot be processed ends "failed", with the reason in errors.
+    providers restricts the models it accepts, e.g. {"openai"} to stand in for
+    OpenAIBatchBackend; None accepts every model.
+    """
+
+    def __init__(
+        self,
+        respond: Optional[Callable[[BatchRequest], str]] = None,
+        batch_dir: str = "./llm_batches",
+        processing_delay: float = 0.0,
+        providers: Optional[Set[str]] = None,
+    ):
+        self.respond = respond or (
+            lambda request: f"[{request.llm_model_id}] {request.prompt}"
+        )
+        self.batch_dir = batch_dir
+        self.processing_delay = processing_delay
+        self.providers = providers
+        self.errors: Dict[str, str] = {}
+        self._statuses: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, batch_id: str, kind: str) -> str:
+        return os.path.join(self.batch_dir, f"{kind}_{batch_id}.jsonl")
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        write_batch_file(self._path(batch_id, "input"), requests)
+        with self._lock:
+            self._statuses[batch_id] = "validating"
+        threading.Thread(target=self._process, args=(batch_id,), daemon=True).start()
+        return batch_id
+
+    def _process(self, batch_id: str):
+        with self._lock:
+            self._statuses[batch_id] = "in_progress"
+        try:
+            self._process_batch(batch_id)
+            status = "completed"
+        except Exception as e:
+            # e.g. an unreadable input file; without this the batch never ends
+            self.errors[batch_id] = f"{type(e).__name__}: {e}"
+            status = "failed"
+        with self._lock:
+            self._statuses[batch_id] = status
+
+    def _process_batch(self, batch_id: str):
+        time.sleep(self.processing_delay)
+        with open(self._path(batch_id, "input")) as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+
+        output_lines = []
+        for line in lines:
+            body = dict(line["body"])
+            messages = body.pop("messages")
+            request = BatchRequest(
+                custom_id=line["custom_id"],
+                llm_model_id=body.pop("model"),
+                prompt=messages[-1]["content"],
+                params=body,
+            )
+            try:
+                output_lines.append(
+                    _output_line(request.custom_id, self.respond(request), None)
+                )
+            except Exception as e:
+                output_lines.append(_output_line(request.custom_id, None, str(e)))
+
+        tmp_path = self._path(batch_id, "output") + ".tmp"
+        with open(tmp_path, "w") as f:
+            for line in output_lines:
+                f.write(json.dumps(line) + "\n")
+        os.replace(tmp_path, self._path(batch_id, "output"))
+
+    def status(self, batch_id: str) -> str:
+        with self._lock:
+            return self._statuses[batch_id]
+
+    def results(self, batch_id: str) -> Dict[str, Dict[str, Optional[str]]]:
+        if not os.path.exists(self._path(batch_id, "output")):
+            return {}
+        with open(self._path(batch_id, "output")) as f:
+            return parse_output_lines(f.read().splitlines())
+
+
+class BatchRunner:
+    """
+    Collects (model, prompt, params) requests and runs them as batch jobs.
+
+    add() returns a Future per request. run() writes the pending requests into
+    one batch file per model (batch APIs take a single model per file, of at most
+    max_batch_size requests), submits them, polls until every batch has ended (or
+    timeout seconds passed) and resolves each Future with its response text, or
+    a RuntimeError carrying the request's error.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        max_batch_size: int = 50_000,
+        poll_interval: float = 30.0,
+        timeout: Optional[float] = DEFAULT_BATCH_TIMEOUT,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.sleep = sleep
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def accepts(self, provider: str) -> bool:
+        """
+        Whether the backend can batch models of provider.
+        """
+        providers = getattr(self.backend, "providers", None)
+        return providers is None or provider in providers
+
+    def add(
+        self,
+        llm_model_id: str,
+        prompt: str,
+        params: Optional[Dict[str, Any]] = None,
+        provider: Optional[str] = None,
+    ) -> concurrent.futures.Future:
+        if provider is not None and not self.accepts(provider):
+            raise ValueError(
+                f"{type(self.backend).__name__} cannot batch {provider} model '{llm_model_id}'"
+            )
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        request = BatchRequest(
+            custom_id=f"request-{uuid.uuid4().hex}",
+            llm_model_id=llm_model_id,
+            prompt=prompt,
+            params=params or {},
+        )
+        with self._lock:
+            self._pending.append((request, future))
+        return future
+
+    def run(self) -> List[str]:
+        """
+        Submit every pending request, wait for the batches and resolve their Futures.
+
+        Returns:
+            List[str]: The ids of the submitted batches.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        by_model: Dict[str, List[tuple]] = {}
+        for request, future in pending:
+            by_model.setdefault(request.llm_model_id, []).append((request, future))
+
+        batches: Dict[str, Dict[str, concurrent.futures.Future]] = {}
+        for items in by_model.values():
+            for start in range(0, len(items), self.max_batch_size):
+                chunk = items[start : start + self.max_batch_size]
+                try:
+                    batch_id = self.backend.submit([request for request, _ in chunk])
+                except Exception as e:
+                    for _, future in chunk:
+                        future.set_exception(e)
+                    continue
+                batches[batch_id] = {
+                    request.custom_id: future for request, future in chunk
+                }
+
+        self._wait(batches)
+        return list(batches)
+
+    def _wait(self, batches: Dict[str, Dict[str, concurrent.futures.Future]]):
+        started = time.monotonic()
+        waiting = dict(batches)
+        while waiting:
+            for batch_id in list(waiting):
+                status = self.backend.status(batch_id)
+                if status not in TERMINAL_STATUSES:
+                    continue
+                futures = waiting.pop(batch_id)
+                try:
+                    results = self.backend.results(batch_id)
+                except Exception as e:
+                    for future in futures.values():
+                        future.set_exception(e)
+                    continue
+                for custom_id, future in futures.items():
+                    result = results.get(custom_id)
+                    if result is None:
+                        future.set_exception(
+                            RuntimeError(
+                                f"Batch {batch_id} ended '{status}' without a result"
+                            )
+                        )
+                    elif result["error"] is not None:
+                        future.set_exception(RuntimeError(result["error"]))
+                    else:
+                        future.set_result(result["output"])
+            if not waiting:
+                return
+            if self.timeout is not None and time.monotonic() - started > self.timeout:
+                for futures in waiting.values():
+                    for future in futures.values():
+                        future.set_exception(
+                            TimeoutError("Batch did not finish in time")
+                        )
+                return
+            self.sleep(self.poll_interval)
@@ -1,9 +1,176 @@
+import asyncio
+import contextlib
+import inspect
 import json
+import os
 import re
-from typing import List, Dict, Callable, Any, Tuple, Union
-from .typings import FusionChainResult
+import functools
+import hashlib
+import threading
+import warnings
+from typing import (
+    List,
+    Dict,
+    Callable,
+    Any,
+    Tuple,
+    Union,
+    Optional,
+    Iterable,
+    Iterator,
+    AsyncIterator,
+)
+from .typings import FusionChainResult, FusionChainModelResult
+from .output_parser import parse_output
+from .response_cache import ResponseCache
+from .checkpoint import ChainCheckpoint
+from .utils import safe_dir_name
+from .scheduler import TaskScheduler
 import concurrent.futures
 
+# Matches {{key}}, {{output[-j]}} and {{output[-j].field}} placeholders
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([^{}]+?)\}\}")
+OUTPUT_REF_PATTERN = re.compile(r"output\[-(\d+)\](?:\.(.+))?")
+
+# Segment kinds of a compiled prompt
+LITERAL_SEGMENT = 0
+CONTEXT_SEGMENT = 1
+OUTPUT_SEGMENT = 2
+
+
+class ChainStopped(Exception):
+    """
+    Raised by MinimalChainable.run when its stop event is set before a step.
+    """
+
+
+class CompiledPrompt:
+    """
+    A prompt parsed once into literal and placeholder segments.
+
+    Rendering walks the segments a single time and joins the pieces, instead of
+    running one str.replace (and one full copy of the prompt) per context key
+    and per previous output.
+
+    Placeholders that cannot be resolved (unknown context keys, references past
+    the start of the chain, missing dict fields) are left in the prompt as-is.
+    """
+
+    __slots__ = ("source", "segments", "output_refs")
+
+    def __init__(self, source: str):
+        self.source = source
+        # Each segment is (kind, value, field, raw placeholder text)
+        self.segments: List[Tuple[int, Any, Optional[str], str]] = []
+        # The set of j values referenced through {{output[-j]...}}
+        self.output_refs = set()
+
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > position:
+                self.segments.append(
+                    (LITERAL_SEGMENT, source[position : match.start()], None, "")
+                )
+            raw = match.group(0)
+            name = match.group(1)
+            output_match = OUTPUT_REF_PATTERN.fullmatch(name)
+            if output_match:
+                j = int(output_match.group(1))
+                self.segments.append((OUTPUT_SEGMENT, j, output_match.group(2), raw))
+                self.output_refs.add(j)
+            else:
+                self.segments.append((CONTEXT_SEGMENT, name, None, raw))
+            position = match.end()
+
+        if position < len(source):
+            self.segments.append((LITERAL_SEGMENT, source[position:], None, ""))
+
+    def render(self, context: Dict[str, Any], outputs: List[Any], index: int) -> str:
+        """
+        Fill the prompt at position `index` of a chain.
+
+        Args:
+            context (Dict[str, Any]): Values for {{key}} placeholders.
+            outputs (List[Any]): Outputs of the previous prompts in the chain.
+            index (int): Position of this prompt in the chain.
+
+        Returns:
+            str: The context filled prompt.
+        """
+        parts = []
+        for kind, value, field, raw in self.segments:
+            if kind == LITERAL_SEGMENT:
+                parts.append(value)
+            elif kind == CONTEXT_SEGMENT:
+                parts.append(str(context[value]) if value in context else raw)
+            elif value < 1 or value > index:
+                parts.append(raw)
+            else:
+                previous_output = outputs[index - value]
+                if field is None:
+                    if isinstance(previous_output, dict):
+                        parts.append(json.dumps(previous_output))
+                    else:
+                        parts.append(str(previous_output))
+                elif isinstance(previous_output, dict) and field in previous_output:
+                    parts.append(str(previous_output[field]))
+                else:
+                    parts.append(raw)
+        return "".join(parts)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_prompt(prompt: str) -> CompiledPrompt:
+    """
+    Parse a prompt into a CompiledPrompt, reusing earlier parses of the same text.
+    """
+    return CompiledPrompt(prompt)
+
+
+def callable_cache_key(callable: Callable) -> Optional[str]:
+    """
+    Identify a chain callable for the response cache, or None if it can't be.
+
+    An explicit callable.cache_key attribute always wins. Otherwise plain
+    module level functions are keyed by module, qualified name and a hash of
+    their code, constants and defaults (so an edited function misses).
+    Lambdas, closures, bound methods and partials are not cacheable: two of
+    them with the same name can return different results (e.g. lambdas closing
+    over different options).
+    """
+    cache_key = getattr(callable, "cache_key", None)
+    if cache_key is not None:
+        return str(cache_key)
+    qualname = getattr(callable, "__qualname__", None)
+    code = getattr(callable, "__code__", None)
+    if (
+        qualname is None
+        or code is None
+        or "<lambda>" in qualname
+        or "<locals>" in qualname
+        or getattr(callable, "__self__", None) is not None
+    ):
+        return None
+    digest = hashlib.sha256()
+    _hash_code(digest, code)
+    digest.update(repr(getattr(callable, "__defaults__", None)).encode("utf-8"))
+    digest.update(repr(getattr(callable, "__kwdefaults__", None)).encode("utf-8"))
+    return f"{callable.__module__}.{qualname}:{digest.hexdigest()[:16]}"
+
+
+def _hash_code(digest, code):
+    """
+    Fold a code object's bytecode, names and constants (recursing into nested
+    functions, comprehensions and classes) into digest.
+    """
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            _hash_code(digest, const)
+        else:
+            digest.update(repr(const).encode("utf-8"))
+
 
 class FusionChain:
 
@@ -69,6 +236,7 @@ class FusionChain:
         evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
         get_model_name: Callable[[Any], str],
         num_workers: int = 4,
+        run_dir: Optional[str] = None,
     ) -> FusionChainResult:
         """
         Run a competition between models on a list of prompts in parallel.
@@ -84,28 +252,639 @@ class FusionChain:
             evaluator (Callable[[List[str]], Tuple[Any, List[float]]]): Function to evaluate model outputs, returning the top response and the scores.
             num_workers (int): Number of parallel workers to use. Defaults to 4.
             get_model_name (Callable[[Any], str]): Function to get the name of a model. Defaults to str(model).
+            run_dir (Optional[str]): Directory to checkpoint every model's chain in (see resume). Defaults to no checkpoints.
 
         Returns:
             FusionChainResult: A FusionChainResult object containing the top response, all outputs, all context-filled prompts, performance scores, and model names.
         """
 
-        def process_model(model):
-            outputs, context_filled_prompts = MinimalChainable.run(
-                context, model, callable, prompts
-            )
-            return outputs, context_filled_prompts
+        model_results = FusionChain.iter_parallel(
+            context, models, callable, prompts, get_model_name, num_workers, run_dir
+        )
+        return FusionChain.assemble(list(model_results), evaluator)
 
-        all_outputs = []
-        all_context_filled_prompts = []
+    @staticmethod
+    def iter_parallel(
+        context: Dict[str, Any],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        get_model_name: Callable[[Any], str],
+        num_workers: int = 4,
+        run_dir: Optional[str] = None,
+    ) -> Iterator[FusionChainModelResult]:
+        """
+        Run every model's chain in parallel and yield each one as soon as it finishes.
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
-            future_to_model = {
-                executor.submit(process_model, model): model for model in models
+        Results come out in completion order and are tagged with the model's index
+        in `models` and its name, so a notebook cell can render them incrementally
+        (e.g. with mo.output.append) and pass them to assemble once all are in.
+
+        Args:
+            context (Dict[str, Any]): The context for the prompts.
+            models (List[Any]): List of models to compete.
+            callable (Callable): The function to call for each prompt.
+            prompts (List[str]): List of prompts to process.
+            get_model_name (Callable[[Any], str]): Function to get the name of a model.
+            num_workers (int): Number of parallel workers to use. Defaults to 4.
+            run_dir (Optional[str]): Directory to checkpoint every model's chain in. Defaults to no checkpoints.
+
+        Yields:
+            FusionChainModelResult: The finished chain of one model.
+        """
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=num_workers)
+        stop = threading.Event()
+        try:
+            future_to_index = {
+                executor.submit(
+                    MinimalChainable.run,
+                    context,
+                    model,
+                    callable,
+                    prompts,
+                    None,
+                    FusionChain._model_checkpoint(
+                        run_dir, index, get_model_name(model)
+                    ),
+                    stop,
+                ): index
+                for index, model in enumerate(models)
             }
-            for future in concurrent.futures.as_completed(future_to_model):
+            for future in concurrent.futures.as_completed(future_to_index):
+                index = future_to_index[future]
                 outputs, context_filled_prompts = future.result()
-                all_outputs.append(outputs)
-                all_context_filled_prompts.append(context_filled_prompts)
+                yield FusionChainModelResult(
+                    index=index,
+                    llm_model_name=get_model_name(models[index]),
+                    prompt_responses=outputs,
+                    context_filled_prompts=context_filled_prompts,
+                )
+        finally:
+            # If the caller stops iterating early, drop the chains that have not
+            # started and stop the running ones before their next step instead
+            # of waiting for them. A call already in flight cannot be interrupted.
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    async def iter_async(
+        context: Dict[str, Any],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        get_model_name: Callable[[Any], str],
+        get_provider: Optional[Callable[[Any], str]] = None,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 16,
+    ) -> AsyncIterator[FusionChainModelResult]:
+        """
+        Asyncio version of iter_parallel, with the concurrency limits of run_async.
+
+        In a marimo cell: `async for model_result in FusionChain.iter_async(...)`.
+
+        Yields:
+            FusionChainModelResult: The finished chain of one model.
+        """
+        semaphore_for = FusionChain._provider_semaphores(
+            get_provider, provider_limits, default_limit
+        )
+
+        async def process_model(index, model):
+            outputs, context_filled_prompts = await MinimalChainable.run_async(
+                context, model, callable, prompts, semaphore_for(model)
+            )
+            return FusionChainModelResult(
+                index=index,
+                llm_model_name=get_model_name(model),
+                prompt_responses=outputs,
+                context_filled_prompts=context_filled_prompts,
+            )
+
+        tasks = [
+            asyncio.ensure_future(process_model(index, model))
+            for index, model in enumerate(models)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def assemble(
+        model_results: List[FusionChainModelResult],
+        evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
+    ) -> FusionChainResult:
+        """
+        Build a FusionChainResult from per-model results, in the order the models were given.
+
+        Results are sorted by their model index first, so outputs, scores and model
+        names always line up no matter in which order the chains finished.
+
+        Args:
+            model_results (List[FusionChainModelResult]): One result per model, in any order.
+            evaluator (Callable[[List[str]], Tuple[Any, List[float]]]): Function to evaluate model outputs, returning the top response and the scores.
+
+        Returns:
+            FusionChainResult: A FusionChainResult object containing the top response, all outputs, all context-filled prompts, performance scores, and model names.
+        """
+        ordered = sorted(model_results, key=lambda model_result: model_result.index)
+
+        all_outputs = [model_result.prompt_responses for model_result in ordered]
+
+        # Evaluate the last output of each model
+        last_outputs = [outputs[-1] for outputs in all_outputs]
+        top_response, performance_scores = evaluator(last_outputs)
+
+        return FusionChainResult(
+            top_response=top_response,
+            all_prompt_responses=all_outputs,
+            all_context_filled_prompts=[
+                model_result.context_filled_prompts for model_result in ordered
+            ],
+            performance_scores=performance_scores,
+            llm_model_names=[model_result.llm_model_name for model_result in ordered],
+        )
+
+    @staticmethod
+    def run_scheduled(
+        context: Dict[str, Any],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
+        get_model_name: Callable[[Any], str],
+        num_workers: int = 8,
+        model_limits: Optional[Dict[str, int]] = None,
+        default_model_limit: Optional[int] = None,
+    ) -> FusionChainResult:
+        """
+        Run a competition between models, scheduling every (model, step) as its own task.
+
+        Unlike run_parallel, which ties up one worker per model for its whole chain,
+        all models share one pool of workers that pull ready steps across models
+        round-robin. A slow model only holds a worker while one of its steps is in
+        flight, and num_workers no longer caps how many models can make progress.
+        Within a chain, steps run as soon as the outputs they reference are ready
+        (see MinimalChainable.dependency_graph).
+
+        Args:
+            context (Dict[str, Any]): The context for the prompts.
+            models (List[Any]): List of models to compete.
+            callable (Callable): The function to call for each prompt.
+            prompts (List[str]): List of prompts to process.
+            evaluator (Callable[[List[str]], Tuple[Any, List[float]]]): Function to evaluate model outputs, returning the top response and the scores.
+            get_model_name (Callable[[Any], str]): Function to get the name of a model.
+            num_workers (int): Number of workers shared by all models. Defaults to 8.
+            model_limits (Optional[Dict[str, int]]): Maximum concurrent steps per model name.
+            default_model_limit (Optional[int]): Maximum concurrent steps for models missing from model_limits. Defaults to no limit.
+
+        Returns:
+            FusionChainResult: A FusionChainResult object containing the top response, all outputs, all context-filled prompts, performance scores, and model names.
+        """
+        model_results = FusionChain.iter_scheduled(
+            context,
+            models,
+            callable,
+            prompts,
+            get_model_name,
+            num_workers,
+            model_limits,
+            default_model_limit,
+        )
+        return FusionChain.assemble(list(model_results), evaluator)
+
+    @staticmethod
+    def iter_scheduled(
+        context: Dict[str, Any],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        get_model_name: Callable[[Any], str],
+        num_workers: int = 8,
+        model_limits: Optional[Dict[str, int]] = None,
+        default_model_limit: Optional[int] = None,
+    ) -> Iterator[FusionChainModelResult]:
+        """
+        Streaming version of run_scheduled: yields each model's chain as soon as its last step finishes.
+
+        Yields:
+            FusionChainModelResult: The finished chain of one model.
+        """
+        model_limits = model_limits or {}
+        model_names = [get_model_name(model) for model in models]
+        graph = MinimalChainable.dependency_graph(prompts)
+
+        all_outputs = [[None] * len(prompts) for _ in models]
+        all_context_filled_prompts = [[""] * len(prompts) for _ in models]
+
+        def execute(index, step):
+            prompt = compile_prompt(prompts[step]).render(
+                context, all_outputs[index], step
+            )
+            all_context_filled_prompts[index][step] = prompt
+            result = MinimalChainable._call_step(models[index], callable, prompt)
+            all_outputs[index][step] = result
+            return result
+
+        scheduler = TaskScheduler(
+            num_workers,
+            group_limits={
+                index: model_limits[name]
+                for index, name in enumerate(model_names)
+                if name in model_limits
+            },
+            default_group_limit=default_model_limit,
+        )
+        for index, outputs in scheduler.iter_groups(
+            {index: graph for index in range(len(models))}, execute
+        ):
+            yield FusionChainModelResult(
+                index=index,
+                llm_model_name=model_names[index],
+                prompt_responses=outputs,
+                context_filled_prompts=all_context_filled_prompts[index],
+            )
+
+    @staticmethod
+    def run_many(
+        contexts: Iterable[Dict[str, Any]],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
+        get_model_name: Callable[[Any], str],
+        sink_path: str,
+        max_in_flight: int = 4,
+        num_workers: int = 4,
+    ) -> int:
+        """
+        Run the same competition over many contexts, streaming results to a JSONL file.
+
+        Contexts are pulled lazily from the iterable (a generator works), with at
+        most max_in_flight contexts running at once, each through run_parallel.
+        Every finished context is appended to sink_path as one line,
+        {"index": i, "result": {...FusionChainResult...}}, in completion order, so
+        memory stays flat no matter how many contexts there are.
+
+        A context that raises is recorded as {"index": i, "error": "..."} and the
+        sweep carries on. Re-running with the same sink_path resumes: context
+        indices that already have a result line are skipped, and a line torn by
+        a killed run is cut off first (that context is run again).
+
+        Args:
+            contexts (Iterable[Dict[str, Any]]): The contexts to run, one competition each.
+            models (List[Any]): List of models to compete.
+            callable (Callable): The function to call for each prompt.
+            prompts (List[str]): List of prompts to process.
+            evaluator (Callable[[List[str]], Tuple[Any, List[float]]]): Function to evaluate model outputs, returning the top response and the scores.
+            get_model_name (Callable[[Any], str]): Function to get the name of a model.
+            sink_path (str): JSONL file to append results to.
+            max_in_flight (int): Maximum number of contexts running at once. Defaults to 4.
+            num_workers (int): Number of parallel workers per context. Defaults to 4.
+
+        Returns:
+            int: The number of contexts that finished successfully in this call.
+        """
+        done_indices = {index for index, _ in FusionChain.read_many(sink_path)}
+        sink_dir = os.path.dirname(sink_path)
+        if sink_dir:
+            os.makedirs(sink_dir, exist_ok=True)
+        FusionChain._truncate_torn_line(sink_path)
+
+        pending = (
+            (index, context)
+            for index, context in enumerate(contexts)
+            if index not in done_indices
+        )
+        written = 0
+
+        with (
+            open(sink_path, "a") as sink,
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_in_flight
+            ) as executor,
+        ):
+            future_to_index = {}
+            while True:
+                # Top the window up from the (possibly lazy) iterable of contexts
+                for index, context in pending:
+                    future = executor.submit(
+                        FusionChain.run_parallel,
+                        context,
+                        models,
+                        callable,
+                        prompts,
+                        evaluator,
+                        get_model_name,
+                        num_workers,
+                    )
+                    future_to_index[future] = index
+                    if len(future_to_index) >= max_in_flight:
+                        break
+
+                if not future_to_index:
+                    break
+
+                done, _ = concurrent.futures.wait(
+                    future_to_index, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    index = future_to_index.pop(future)
+                    try:
+                        record = {
+                            "index": index,
+                            "result": future.result().model_dump(),
+                        }
+                        written += 1
+                    except Exception as e:
+                        record = {"index": index, "error": repr(e)}
+                    sink.write(json.dumps(record, default=str) + "\n")
+                    sink.flush()
+
+        return written
+
+    @staticmethod
+    def _truncate_torn_line(sink_path: str):
+        """
+        Cut a last line left without its newline by a killed run, so the next
+        record is not appended onto it.
+        """
+        if not os.path.exists(sink_path):
+            return
+        with open(sink_path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                start = max(0, end - 64 * 1024)
+                f.seek(start)
+                chunk = f.read(end - start)
+                if end == size and chunk.endswith(b"\n"):
+                    return
+                newline = chunk.rfind(b"\n")
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+            f.truncate(end)
+
+    @staticmethod
+    def read_many(sink_path: str) -> Iterator[Tuple[int, FusionChainResult]]:
+        """
+        Read the successful (index, FusionChainResult) pairs back from a run_many sink, in file order.
+        """
+        if not os.path.exists(sink_path):
+            return
+        with open(sink_path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash; that context will be re-run
+                    continue
+                if "result" in record:
+                    yield record["index"], FusionChainResult(**record["result"])
+
+    @staticmethod
+    def resume(
+        run_dir: str,
+        context: Dict[str, Any],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
+        get_model_name: Callable[[Any], str],
+        num_workers: int = 4,
+    ) -> FusionChainResult:
+        """
+        Run (or resume) run_parallel with per-model checkpoints in run_dir.
+
+        Models whose chains already finished are loaded from run_dir without any
+        calls; the others continue after their last completed step.
+
+        Returns:
+            FusionChainResult: A FusionChainResult object containing the top response, all outputs, all context-filled prompts, performance scores, and model names.
+        """
+        return FusionChain.run_parallel(
+            context,
+            models,
+            callable,
+            prompts,
+            evaluator,
+            get_model_name,
+            num_workers,
+            run_dir,
+        )
+
+    @staticmethod
+    def _model_checkpoint(
+        run_dir: Optional[str], index: int, model_name: str
+    ) -> Optional[ChainCheckpoint]:
+        if run_dir is None:
+            return None
+        return ChainCheckpoint(
+            os.path.join(run_dir, f"{index:02d}_{safe_dir_name(model_name)}")
+        )
+
+    @staticmethod
+    def run_race(
+        context: Dict[str, Any],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        accept: Callable[[Any], bool],
+        evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
+        get_model_name: Callable[[Any], str],
+        num_workers: int = 4,
+    ) -> FusionChainResult:
+        """
+        Race the models and stop at the first final output that is good enough.
+
+        Each model's last output is passed to `accept` as soon as its chain finishes.
+        The first accepted output becomes the top response; chains that have not
+        started are cancelled and running ones make no further calls. The llm
+        library's calls block and cannot be interrupted, so a call a losing chain
+        already has in flight still finishes (and is paid for) in the background;
+        its result is ignored and the chain stops before its next step.
+
+        If no output is accepted, every model finishes and the result is the same as run_parallel.
+
+        Args:
+            context (Dict[str, Any]): The context for the prompts.
+            models (List[Any]): List of models to compete.
+            callable (Callable): The function to call for each prompt.
+            prompts (List[str]): List of prompts to process.
+            accept (Callable[[Any], bool]): Acceptance predicate for a model's last output.
+            evaluator (Callable[[List[str]], Tuple[Any, List[float]]]): Function to evaluate the finished models' outputs, returning the top response and the scores.
+            get_model_name (Callable[[Any], str]): Function to get the name of a model.
+            num_workers (int): Number of parallel workers to use. Defaults to 4.
+
+        Returns:
+            FusionChainResult: A FusionChainResult where models that did not finish have empty outputs, a score of 0 and are listed in unfinished_llm_model_names.
+        """
+        model_results = []
+        for model_result in FusionChain.iter_parallel(
+            context, models, callable, prompts, get_model_name, num_workers
+        ):
+            model_results.append(model_result)
+            if accept(model_result.prompt_responses[-1]):
+                return FusionChain._assemble_partial(
+                    model_results, models, evaluator, get_model_name, model_result
+                )
+        return FusionChain.assemble(model_results, evaluator)
+
+    @staticmethod
+    async def run_race_async(
+        context: Dict[str, Any],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        accept: Callable[[Any], bool],
+        evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
+        get_model_name: Callable[[Any], str],
+        get_provider: Optional[Callable[[Any], str]] = None,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 16,
+    ) -> FusionChainResult:
+        """
+        Asyncio version of run_race. Chains still running when an output is accepted are cancelled.
+
+        Returns:
+            FusionChainResult: A FusionChainResult where models that did not finish have empty outputs, a score of 0 and are listed in unfinished_llm_model_names.
+        """
+        model_results = []
+        async with contextlib.aclosing(
+            FusionChain.iter_async(
+                context,
+                models,
+                callable,
+                prompts,
+                get_model_name,
+                get_provider,
+                provider_limits,
+                default_limit,
+            )
+        ) as stream:
+            async for model_result in stream:
+                model_results.append(model_result)
+                if accept(model_result.prompt_responses[-1]):
+                    return FusionChain._assemble_partial(
+                        model_results, models, evaluator, get_model_name, model_result
+                    )
+        return FusionChain.assemble(model_results, evaluator)
+
+    @staticmethod
+    def _assemble_partial(
+        model_results: List[FusionChainModelResult],
+        models: List[Any],
+        evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
+        get_model_name: Callable[[Any], str],
+        accepted: FusionChainModelResult,
+    ) -> FusionChainResult:
+        finished = {model_result.index: model_result for model_result in model_results}
+        finished_indices = sorted(finished)
+
+        # Only the finished models are scored, the others get 0
+        _, finished_scores = evaluator(
+            [finished[index].prompt_responses[-1] for index in finished_indices]
+        )
+        performance_scores = [0.0] * len(models)
+        for index, score in zip(finished_indices, finished_scores):
+            performance_scores[index] = score
+
+        return FusionChainResult(
+            top_response=accepted.prompt_responses[-1],
+            all_prompt_responses=[
+                finished[index].prompt_responses if index in finished else []
+                for index in range(len(models))
+            ],
+            all_context_filled_prompts=[
+                finished[index].context_filled_prompts if index in finished else []
+                for index in range(len(models))
+            ],
+            performance_scores=performance_scores,
+            llm_model_names=[get_model_name(model) for model in models],
+            unfinished_llm_model_names=[
+                get_model_name(model)
+                for index, model in enumerate(models)
+                if index not in finished
+            ],
+        )
+
+    @staticmethod
+    def _provider_semaphores(
+        get_provider: Optional[Callable[[Any], str]],
+        provider_limits: Optional[Dict[str, int]],
+        default_limit: int,
+    ) -> Callable[[Any], asyncio.Semaphore]:
+        # Semaphores are created lazily so they bind to the running event loop
+        provider_limits = provider_limits or {}
+        semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        def semaphore_for(model) -> asyncio.Semaphore:
+            provider = get_provider(model) if get_provider else "default"
+            if provider not in semaphores:
+                semaphores[provider] = asyncio.Semaphore(
+                    provider_limits.get(provider, default_limit)
+                )
+            return semaphores[provider]
+
+        return semaphore_for
+
+    @staticmethod
+    async def run_async(
+        context: Dict[str, Any],
+        models: List[Any],
+        callable: Callable,
+        prompts: List[str],
+        evaluator: Callable[[List[Any]], Tuple[Any, List[float]]],
+        get_model_name: Callable[[Any], str],
+        get_provider: Optional[Callable[[Any], str]] = None,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 16,
+    ) -> FusionChainResult:
+        """
+        Run a competition between models on a list of prompts with asyncio.
+
+        Every model's chain runs as a task on the current event loop, so hundreds
+        of calls can be in flight without a thread per call when the callable is a
+        coroutine function (see llm_module.prompt_with_temp_async). Calls are
+        limited per provider with one semaphore each.
+
+        In a marimo cell, use top-level await: `result = await FusionChain.run_async(...)`.
+
+        Args:
+            context (Dict[str, Any]): The context for the prompts.
+            models (List[Any]): List of models to compete.
+            callable (Callable): The function (or coroutine function) to call for each prompt.
+            prompts (List[str]): List of prompts to process.
+            evaluator (Callable[[List[str]], Tuple[Any, List[float]]]): Function to evaluate model outputs, returning the top response and the scores.
+            get_model_name (Callable[[Any], str]): Function to get the name of a model.
+            get_provider (Optional[Callable[[Any], str]]): Function to get the provider of a model (e.g. llm_module.get_model_provider). Defaults to one shared limit for all models.
+            provider_limits (Optional[Dict[str, int]]): Maximum concurrent calls per provider (e.g. llm_module.DEFAULT_PROVIDER_LIMITS).
+            default_limit (int): Maximum concurrent calls for providers missing from provider_limits. Defaults to 16.
+
+        Returns:
+            FusionChainResult: A FusionChainResult object containing the top response, all outputs, all context-filled prompts, performance scores, and model names.
+        """
+        semaphore_for = FusionChain._provider_semaphores(
+            get_provider, provider_limits, default_limit
+        )
+
+        results = await asyncio.gather(
+            *[
+                MinimalChainable.run_async(
+                    context, model, callable, prompts, semaphore_for(model)
+                )
+                for model in models
+            ]
+        )
+
+        all_outputs = [outputs for outputs, _ in results]
+        all_context_filled_prompts = [filled for _, filled in results]
 
         # Evaluate the last output of each model
         last_outputs = [outputs[-1] for outputs in all_outputs]
@@ -129,85 +908,261 @@ class MinimalChainable:
 
     @staticmethod
     def run(
-        context: Dict[str, Any], model: Any, callable: Callable, prompts: List[str]
+        context: Dict[str, Any],
+        model: Any,
+        callable: Callable,
+        prompts: List[str],
+        cache: Optional[ResponseCache] = None,
+        checkpoint: Optional[ChainCheckpoint] = None,
+        stop: Optional[threading.Event] = None,
     ) -> Tuple[List[Any], List[str]]:
         # Initialize an empty list to store the outputs
         output = []
         context_filled_prompts = []
 
+        # Pick up the steps a previous run already completed
+        if checkpoint is not None:
+            checkpoint.start(context, prompts)
+            output, context_filled_prompts = checkpoint.load_steps()
+
         # Iterate over each prompt with its index
         for i, prompt in enumerate(prompts):
-            # Iterate over each key-value pair in the context
-            for key, value in context.items():
-                # Check if the key is in the prompt
-                if "{{" + key + "}}" in prompt:
-                    # Replace the key with its value
-                    prompt = prompt.replace("{{" + key + "}}", str(value))
-
-            # Replace references to previous outputs
-            # Iterate from the current index down to 1
-            for j in range(i, 0, -1):
-                # Get the previous output
-                previous_output = output[i - j]
-
-                # Handle JSON (dict) output references
-                # Check if the previous output is a dictionary
-                if isinstance(previous_output, dict):
-                    # Check if the reference is in the prompt
-                    if f"{{{{output[-{j}]}}}}" in prompt:
-                        # Replace the reference with the JSON string
-                        prompt = prompt.replace(
-                            f"{{{{output[-{j}]}}}}", json.dumps(previous_output)
-                        )
-                    # Iterate over each key-value pair in the previous output
-                    for key, value in previous_output.items():
-                        # Check if the key reference is in the prompt
-                        if f"{{{{output[-{j}].{key}}}}}" in prompt:
-                            # Replace the key reference with its value
-                            prompt = prompt.replace(
-                                f"{{{{output[-{j}].{key}}}}}", str(value)
-                            )
-                # If not a dict, use the original string
-                else:
-                    # Check if the reference is in the prompt
-                    if f"{{{{output[-{j}]}}}}" in prompt:
-                        # Replace the reference with the previous output
-                        prompt = prompt.replace(
-                            f"{{{{output[-{j}]}}}}", str(previous_output)
-                        )
+            if i < len(output):
+                continue
+
+            # Another chain already won a race (see FusionChain.run_race)
+            if stop is not None and stop.is_set():
+                raise ChainStopped(f"Chain stopped before prompt {i}")
+
+            # Fill context keys and references to previous outputs in one pass
+            prompt = compile_prompt(prompt).render(context, output, i)
 
             # Append the context filled prompt to the list
             context_filled_prompts.append(prompt)
 
-            # Call the provided callable with the processed prompt
-            # Get the result by calling the callable with the model and prompt
-            result = callable(model, prompt)
-
-            print("result", result)
-
-            # Try to parse the result as JSON, handling markdown-wrapped JSON
-            try:
-                # First, attempt to extract JSON from markdown code blocks
-                # Search for JSON in markdown code blocks
-                json_match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", result)
-                # If a match is found
-                if json_match:
-                    # Parse the JSON from the match
-                    result = json.loads(json_match.group(1))
-                else:
-                    # If no markdown block found, try parsing the entire result
-                    # Parse the entire result as JSON
-                    result = json.loads(result)
-            except json.JSONDecodeError:
-                # Not JSON, keep as is
-                pass
+            # Call the provided callable and parse JSON out of the result
+            result = MinimalChainable._call_step(model, callable, prompt, cache)
 
             # Append the result to the output list
             output.append(result)
 
+            if checkpoint is not None:
+                checkpoint.save_step(i, prompt, result)
+
         # Return the list of outputs
         return output, context_filled_prompts
 
+    @staticmethod
+    def resume(
+        run_dir: str,
+        context: Dict[str, Any],
+        model: Any,
+        callable: Callable,
+        prompts: List[str],
+        cache: Optional[ResponseCache] = None,
+    ) -> Tuple[List[Any], List[str]]:
+        """
+        Run a chain with step-level checkpoints in run_dir, continuing after the last completed step.
+
+        The first call starts the chain from scratch; if it fails part way (timeout,
+        429, crash), calling resume again with the same arguments reuses every step
+        already saved in run_dir and only pays for the remaining ones.
+
+        Args:
+            run_dir (str): Directory holding the chain's checkpoint.
+            context (Dict[str, Any]): The context for the prompts.
+            model (Any): The model passed to the callable.
+            callable (Callable): The function to call for each prompt.
+            prompts (List[str]): List of prompts to process.
+            cache (Optional[ResponseCache]): Optional response cache, as in run.
+
+        Returns:
+            Tuple[List[Any], List[str]]: The outputs and the context filled prompts.
+        """
+        return MinimalChainable.run(
+            context, model, callable, prompts, cache, ChainCheckpoint(run_dir)
+        )
+
+    @staticmethod
+    def _call_step(
+        model: Any,
+        callable: Callable,
+        prompt: str,
+        cache: Optional[ResponseCache] = None,
+    ) -> Any:
+        # Get the result by calling the callable with the model and prompt
+        cache_key = callable_cache_key(callable) if cache is not None else None
+        if cache is not None and cache_key is None:
+            warnings.warn(
+                f"Not caching {callable!r}: lambdas, closures and methods need a "
+                "cache_key attribute to be cached"
+            )
+        if cache_key is not None:
+            # Raw results are cached per model, callable and filled prompt
+            result = cache.get_or_call(
+                getattr(model, "model_id", str(model)),
+                prompt,
+                {"callable": cache_key},
+                lambda: callable(model, prompt),
+            )
+        else:
+            result = callable(model, prompt)
+
+        print("result", result)
+
+        return MinimalChainable._parse_result(result)
+
+    @staticmethod
+    async def _call_step_async(
+        model: Any,
+        callable: Callable,
+        prompt: str,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> Any:
+        async with semaphore or contextlib.nullcontext():
+            if inspect.iscoroutinefunction(callable):
+                result = await callable(model, prompt)
+            else:
+                # Blocking callables run in the default executor
+                result = await asyncio.to_thread(callable, model, prompt)
+
+        print("result", result)
+
+        return MinimalChainable._parse_result(result)
+
+    @staticmethod
+    def _parse_result(result: Any) -> Any:
+        # Parse JSON from markdown code blocks or the whole result, otherwise keep the text
+        return parse_output(result).value
+
+    @staticmethod
+    async def run_async(
+        context: Dict[str, Any],
+        model: Any,
+        callable: Callable,
+        prompts: List[str],
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> Tuple[List[Any], List[str]]:
+        """
+        Asyncio version of run.
+
+        Coroutine callables (e.g. llm_module.prompt_with_temp_async) are awaited
+        directly; plain callables are run with asyncio.to_thread. In a marimo
+        cell, use top-level await: `outputs, prompts = await MinimalChainable.run_async(...)`.
+
+        Args:
+            context (Dict[str, Any]): The context for the prompts.
+            model (Any): The model passed to the callable.
+            callable (Callable): The function (or coroutine function) to call for each prompt.
+            prompts (List[str]): List of prompts to process.
+            semaphore (Optional[asyncio.Semaphore]): Held around every call to the callable, to cap concurrency across chains.
+
+        Returns:
+            Tuple[List[Any], List[str]]: The outputs and the context filled prompts.
+        """
+        output = []
+        context_filled_prompts = []
+
+        for i, prompt in enumerate(prompts):
+            prompt = compile_prompt(prompt).render(context, output, i)
+            context_filled_prompts.append(prompt)
+            result = await MinimalChainable._call_step_async(
+                model, callable, prompt, semaphore
+            )
+            output.append(result)
+
+        return output, context_filled_prompts
+
+    @staticmethod
+    def dependency_graph(prompts: List[str]) -> List[List[int]]:
+        """
+        Build the dependency graph of a chain from its output back-references.
+
+        Prompt i depends on prompt i - j for every {{output[-j]}} (or
+        {{output[-j].field}}) it references. Prompts without back-references
+        depend on nothing and can run immediately.
+
+        Args:
+            prompts (List[str]): List of prompts in the chain.
+
+        Returns:
+            List[List[int]]: For each prompt, the sorted indices of the prompts it depends on.
+        """
+        return [
+            sorted(i - j for j in compile_prompt(prompt).output_refs if 1 <= j <= i)
+            for i, prompt in enumerate(prompts)
+        ]
+
+    @staticmethod
+    def run_dag(
+        context: Dict[str, Any],
+        model: Any,
+        callable: Callable,
+        prompts: List[str],
+        num_workers: int = 4,
+    ) -> Tuple[List[Any], List[str]]:
+        """
+        Run a prompt chain, executing prompts that do not depend on each other concurrently.
+
+        The dependency graph comes from each prompt's {{output[-j]}} back-references
+        (see dependency_graph). A prompt is submitted as soon as every prompt it
+        references has finished, so the wall-clock time tends to the length of
+        the chain's critical path instead of the sum of every step.
+
+        Args:
+            context (Dict[str, Any]): The context for the prompts.
+            model (Any): The model passed to the callable.
+            callable (Callable): The function to call for each prompt.
+            prompts (List[str]): List of prompts to process.
+            num_workers (int): Number of parallel workers to use. Defaults to 4.
+
+        Returns:
+            Tuple[List[Any], List[str]]: The outputs and the context filled prompts, in prompt order, as returned by run.
+        """
+        dependencies = MinimalChainable.dependency_graph(prompts)
+        remaining = [set(deps) for deps in dependencies]
+        dependents = [[] for _ in prompts]
+        for i, deps in enumerate(dependencies):
+            for dep in deps:
+                dependents[dep].append(i)
+
+        output: List[Any] = [None] * len(prompts)
+        context_filled_prompts: List[str] = [""] * len(prompts)
+
+        def process_step(i):
+            # Every referenced output is already in place, so render as usual
+            prompt = compile_prompt(prompts[i]).render(context, output, i)
+            context_filled_prompts[i] = prompt
+            return MinimalChainable._call_step(model, callable, prompt)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+            future_to_index = {
+                executor.submit(process_step, i): i
+                for i, deps in enumerate(remaining)
+                if not deps
+            }
+            while future_to_index:
+                done, _ = concurrent.futures.wait(
+                    future_to_index, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    i = future_to_index.pop(future)
+                    try:
+                        output[i] = future.result()
+                    except Exception:
+                        for pending in future_to_index:
+                            pending.cancel()
+                        raise
+                    # Submit every prompt that was only waiting on this one
+                    for dependent in dependents[i]:
+                        remaining[dependent].discard(i)
+                        if not remaining[dependent]:
+                            future_to_index[
+                                executor.submit(process_step, dependent)
+                            ] = dependent
+
+        return output, context_filled_prompts
+
     @staticmethod
     def to_delim_text_file(name: str, content: List[Union[str, dict, list]]) -> str:
         result_string = ""
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+from .utils import atomic_write_json
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _fingerprint(context: Dict[str, Any], prompts: List[str]) -> str:
+    payload = json.dumps([context, prompts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChainCheckpoint:
+    """
+    Step-level checkpoint of one prompt chain in a run directory.
+
+    Layout:
+        <run_dir>/manifest.json     fingerprint of the context and prompts
+        <run_dir>/step_000.json     context filled prompt and parsed output of step 0
+        <run_dir>/step_001.json     ...
+
+    Every step file is written atomically once its call has returned, so a crash
+    or a failing call loses at most the step that was in flight.
+    """
+
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+
+    def _step_path(self, index: int) -> str:
+        return os.path.join(self.run_dir, f"step_{index:03d}.json")
+
+    def start(self, context: Dict[str, Any], prompts: List[str]):
+        """
+        Create the run directory, or check that an existing one belongs to the same chain.
+        """
+        os.makedirs(self.run_dir, exist_ok=True)
+        manifest_path = os.path.join(self.run_dir, MANIFEST_FILE)
+        fingerprint = _fingerprint(context, prompts)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+            if manifest["fingerprint"] != fingerprint:
+                raise ValueError(
+                    f"Checkpoint in {self.run_dir} was written for a different context or prompts"
+                )
+            return
+        atomic_write_json(
+            manifest_path, {"fingerprint": fingerprint, "num_steps": len(prompts)}
+        )
+
+    def load_steps(self) -> Tuple[List[Any], List[str]]:
+        """
+        Load the outputs and context filled prompts of the completed steps, in order.
+        """
+        outputs = []
+        context_filled_prompts = []
+        index = 0
+        while os.path.exists(self._step_path(index)):
+            with open(self._step_path(index), "r") as f:
+                step = json.load(f)
+            outputs.append(step["output"])
+            context_filled_prompts.append(step["context_filled_prompt"])
+            index += 1
+        return outputs, context_filled_prompts
+
+    def save_step(self, index: int, context_filled_prompt: str, output: Any):
+        atomic_write_json(
+            self._step_path(index),
+            {
+                "index": index,
+                "context_filled_prompt": context_filled_prompt,
+                "output": output,
+            },
+        )
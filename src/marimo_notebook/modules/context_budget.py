@@ -0,0 +1,167 @@
+import math
+import warnings
+from typing import List, Optional
+
+from .model_registry import find_spec
+from .typings import ContextBudget
+
+# Average characters per token of each provider's tokenizer on English prose
+# and code. Good to about 10%, which SAFETY_MARGIN covers, without needing a
+# tokenizer (or a network call) per model family.
+CHARS_PER_TOKEN = {
+    "openai": 4.0,
+    "anthropic": 3.5,
+    "gemini": 4.0,
+    "ollama": 3.5,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.5
+SAFETY_MARGIN = 1.1
+
+# Room left for the response when the model does not publish its output limit
+DEFAULT_OUTPUT_RESERVE = 512
+
+TRUNCATION_MARKER = (
+    "\n\n[... {count} tokens truncated to fit the context window ...]\n\n"
+)
+
+OVERFLOW_MODES = ("warn", "truncate", "chunk", "error")
+
+
+def estimate_tokens(text: str, provider: Optional[str] = None) -> int:
+    """
+    Estimate the number of tokens text takes for a provider's models, offline.
+    """
+    chars_per_token = CHARS_PER_TOKEN.get(provider, DEFAULT_CHARS_PER_TOKEN)
+    return math.ceil(len(text) / chars_per_token * SAFETY_MARGIN)
+
+
+def check_budget(
+    model, prompt: str, reserve_output_tokens: Optional[int] = None
+) -> ContextBudget:
+    """
+    Check whether prompt fits in the model's context window.
+
+    Args:
+        model: A LazyModel, an llm.Model or a registered model name.
+        prompt (str): The context filled prompt.
+        reserve_output_tokens (Optional[int]): Tokens to keep free for the response.
+            Default is the model's max output tokens, or DEFAULT_OUTPUT_RESERVE.
+
+    Returns:
+        ContextBudget: The estimated prompt tokens and the prompt budget, where
+            max_prompt_tokens is None if the model's context window is unknown.
+    """
+    spec = find_spec(model)
+    provider = spec.provider if spec else None
+    prompt_tokens = estimate_tokens(prompt, provider)
+    model_id = spec.llm_model_id if spec else str(getattr(model, "model_id", model))
+
+    if spec is None or spec.context_window is None:
+        return ContextBudget(
+            llm_model_id=model_id,
+            prompt_tokens=prompt_tokens,
+            max_prompt_tokens=None,
+            fits=True,
+        )
+
+    if reserve_output_tokens is None:
+        reserve_output_tokens = spec.max_output_tokens or DEFAULT_OUTPUT_RESERVE
+    max_prompt_tokens = max(0, spec.context_window - reserve_output_tokens)
+    return ContextBudget(
+        llm_model_id=model_id,
+        prompt_tokens=prompt_tokens,
+        max_prompt_tokens=max_prompt_tokens,
+        fits=prompt_tokens <= max_prompt_tokens,
+    )
+
+
+def fit_prompt(
+    model,
+    prompt: str,
+    mode: str = "warn",
+    reserve_output_tokens: Optional[int] = None,
+) -> List[str]:
+    """
+    Make a prompt fit the model's context window before it is sent.
+
+    Args:
+        model: A LazyModel, an llm.Model or a registered model name.
+        prompt (str): The context filled prompt.
+        mode (str): What to do with a prompt that does not fit:
+            "warn" sends it anyway after a warning,
+            "truncate" cuts tokens out of its middle, keeping the instructions
+            usually found at its start and end,
+            "chunk" splits it at paragraph, then line, boundaries into prompts that each fit,
+            "error" raises a ValueError.
+        reserve_output_tokens (Optional[int]): Tokens to keep free for the response.
+
+    Returns:
+        List[str]: The prompts to send; just [prompt] when it already fits.
+    """
+    if mode not in OVERFLOW_MODES:
+        raise ValueError(f"Unknown overflow mode '{mode}', use one of {OVERFLOW_MODES}")
+
+    budget = check_budget(model, prompt, reserve_output_tokens)
+    if budget.fits:
+        return [prompt]
+
+    message = (
+        f"Prompt of ~{budget.prompt_tokens} tokens does not fit the "
+        f"{budget.max_prompt_tokens} token prompt budget of {budget.llm_model_id}"
+    )
+    if mode == "error":
+        raise ValueError(message)
+    if mode == "warn":
+        warnings.warn(message)
+        return [prompt]
+
+    # Character budget derived from the same ratio the estimate used
+    max_chars = int(len(prompt) * budget.max_prompt_tokens / budget.prompt_tokens)
+    if mode == "truncate":
+        return [_truncate_middle(prompt, max_chars, budget.prompt_tokens)]
+    return _chunk(prompt, max_chars)
+
+
+def _truncate_middle(prompt: str, max_chars: int, prompt_tokens: int) -> str:
+    # Leave room for the marker itself, whose count has at most 8 digits
+    keep = max(0, max_chars - len(TRUNCATION_MARKER) - 8)
+    head = prompt[: keep // 2]
+    tail = prompt[len(prompt) - (keep - len(head)) :] if keep > len(head) else ""
+    dropped_chars = len(prompt) - len(head) - len(tail)
+    dropped_tokens = math.ceil(prompt_tokens * dropped_chars / len(prompt))
+    return head + TRUNCATION_MARKER.format(count=dropped_tokens) + tail
+
+
+def _chunk(prompt: str, max_chars: int) -> List[str]:
+    max_chars = max(1, max_chars)
+    chunks: List[str] = []
+    current = ""
+    for piece in _split_pieces(prompt, max_chars):
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_pieces(text: str, max_chars: int) -> List[str]:
+    # Paragraphs, then lines, then hard cuts for anything still too long
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        pieces.append(paragraph + "\n\n")
+    pieces[-1] = pieces[-1][:-2]
+
+    result = []
+    for piece in pieces:
+        if len(piece) <= max_chars:
+            result.append(piece)
+            continue
+        for line in piece.splitlines(keepends=True):
+            while len(line) > max_chars:
+                result.append(line[:max_chars])
+                line = line[max_chars:]
+            if line:
+                result.append(line)
+    return result
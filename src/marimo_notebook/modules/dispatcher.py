@@ -0,0 +1,243 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class RateLimit(BaseModel):
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+
+# Conservative defaults for low usage tiers; tune them to your account limits
+DEFAULT_RATE_LIMITS: Dict[str, RateLimit] = {
+    "openai": RateLimit(requests_per_minute=500, tokens_per_minute=200_000),
+    "anthropic": RateLimit(requests_per_minute=50, tokens_per_minute=40_000),
+    "gemini": RateLimit(requests_per_minute=360, tokens_per_minute=4_000_000),
+}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most one minute's worth.
+
+    reserve() takes the amount right away, letting the bucket go negative, and
+    returns how long the caller must wait before using it. Later callers see the
+    debt and wait longer, so waiting callers are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float]):
+        self.capacity = rate_per_minute
+        self.rate_per_second = rate_per_minute / 60.0
+        self.tokens = rate_per_minute
+        self.clock = clock
+        self.updated_at = clock()
+
+    def reserve(self, amount: float) -> float:
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second
+        )
+        self.updated_at = now
+        # A single request bigger than the bucket still gets through once it is full
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate_per_second)
+
+    def pause(self, seconds: float):
+        # Push every future reservation back, e.g. after a Retry-After
+        self.reserve(0)
+        self.tokens = min(self.tokens, -seconds * self.rate_per_second)
+
+
+# Provider SDK exception types for HTTP 429, matched by name so no SDK has to be installed
+# (openai / anthropic RateLimitError, google.api_core TooManyRequests / ResourceExhausted)
+RATE_LIMIT_ERROR_NAMES = {"RateLimitError", "TooManyRequests", "ResourceExhausted"}
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for status in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "status", None),
+        getattr(error, "code", None),
+    ):
+        if isinstance(status, int):
+            return status
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Whether error is a provider's 429, by its status code attribute or exception type.
+
+    Wrapped errors (e.g. llm.ModelError raised from an SDK error) are checked through
+    their __cause__ / __context__ chain.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if _status_code(error) == 429:
+            return True
+        if any(cls.__name__ in RATE_LIMIT_ERROR_NAMES for cls in type(error).__mro__):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    retry_after = getattr(error, "retry_after", None)
+    response = getattr(error, "response", None)
+    if retry_after is None and response is not None:
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("retry-after") or headers.get("Retry-After")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        return None
+
+
+class Dispatcher:
+    """
+    Rate limited, retrying dispatch of model calls.
+
+    Every call first waits for room in its provider's and its model's token
+    buckets (requests/min and tokens/min), so bursts are queued instead of
+    failing. A call that still fails with a 429 is retried with jittered
+    exponential backoff, honoring Retry-After when the error carries one, and
+    the provider's buckets are paused for that long so queued calls back off too.
+
+    clock, sleep and rng are injectable so the dispatcher can be exercised
+    against a fake provider without real waiting.
+    """
+
+    def __init__(
+        self,
+        provider_limits: Optional[Dict[str, RateLimit]] = None,
+        model_limits: Optional[Dict[str, RateLimit]] = None,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.provider_limits = (
+            DEFAULT_RATE_LIMITS if provider_limits is None else provider_limits
+        )
+        self.model_limits = model_limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng
+
+        self._buckets: Dict[tuple, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.queued_seconds = 0.0
+
+    def _bucket_keys(self, provider: str, model_id: str):
+        for scope, name, limits in [
+            ("provider", provider, self.provider_limits),
+            ("model", model_id, self.model_limits),
+        ]:
+            limit = limits.get(name)
+            if limit is None:
+                continue
+            if limit.requests_per_minute:
+                yield (scope, name, "requests"), limit.requests_per_minute
+            if limit.tokens_per_minute:
+                yield (scope, name, "tokens"), limit.tokens_per_minute
+
+    def _wait_for_capacity(self, provider: str, model_id: str, tokens: int):
+        with self._lock:
+            wait = 0.0
+            for key, rate in self._bucket_keys(provider, model_id):
+                if key not in self._buckets:
+                    self._buckets[key] = TokenBucket(rate, self.clock)
+                amount = 1 if key[2] == "requests" else tokens
+                wait = max(wait, self._buckets[key].reserve(amount))
+            self.queued_seconds += wait
+        if wait > 0:
+            self.sleep(wait)
+
+    def _pause_provider(self, provider: str, seconds: float) -> bool:
+        paused = False
+        with self._lock:
+            for key, bucket in self._buckets.items():
+                if key[0] == "provider" and key[1] == provider:
+                    bucket.pause(seconds)
+                    paused = True
+        return paused
+
+    def backoff_delay(self, attempt: int) -> float:
+        # Full jitter: uniform between 0 and the capped exponential delay
+        return self.rng() * min(self.max_delay, self.base_delay * (2**attempt))
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        provider: str,
+        model_id: str,
+        estimated_tokens: int = 0,
+    ) -> T:
+        """
+        Run fn once there is capacity for it, retrying on rate limit errors.
+
+        Args:
+            fn (Callable[[], T]): The model call.
+            provider (str): Provider of the model, e.g. "openai".
+            model_id (str): The model's id, for per-model limits.
+            estimated_tokens (int): Tokens the call is expected to use, for tokens/min limits.
+
+        Returns:
+            T: Whatever fn returns.
+        """
+        with self._lock:
+            self.calls += 1
+        self._local.retries = 0
+
+        attempt = 0
+        while True:
+            self._wait_for_capacity(provider, model_id, estimated_tokens)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                with self._lock:
+                    self.rate_limited += 1
+                    self.retries += 1
+                self._local.retries += 1
+                delay = retry_after_seconds(e)
+                attempt += 1
+                if delay is None:
+                    self.sleep(self.backoff_delay(attempt - 1))
+                elif not self._pause_provider(provider, delay):
+                    # No provider bucket to hold the pause, so wait here
+                    self.sleep(delay)
+
+    def last_call_retries(self) -> int:
+        """
+        Number of retries the current thread's last call needed.
+        """
+        return getattr(self._local, "retries", 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "queued_seconds": self.queued_seconds,
+            }
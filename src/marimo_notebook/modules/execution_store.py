@@ -0,0 +1,426 @@
+import json
+from abc import ABC, abstractmethod
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from .typings import ExecutionRecord, MultiLLMPromptExecution
+
+_NEW_ID = re.compile(r"_(\d{8}_\d{6}_\d{6}_[0-9a-f]{8})$")
+_LEGACY_ID = re.compile(r"_(\d{8}_\d{6})$")
+
+GZIP_MAGIC = b"\x1f\x8b\x08"
+_READ_CHUNK = 1024 * 1024
+
+
+def new_execution_id(now: Optional[datetime] = None) -> str:
+    """
+    A time ordered, collision-free execution id, e.g. 20241017_231501_123456_9f2c4a1b.
+    """
+    now = now or datetime.now()
+    return f"{now.strftime('%Y%m%d_%H%M%S_%f')}_{uuid.uuid4().hex[:8]}"
+
+
+class ExecutionStore(ABC):
+    """
+    Append-only log of prompt executions.
+
+    append() only buffers the record; buffered records are written in one batch
+    (and fsynced once) when max_batch records are pending, flush_interval
+    seconds after the first of them was appended, or on flush() / close(). A
+    batch that fails to write stays buffered for the next flush. Reading with
+    iterate() sees buffered records too.
+    """
+
+    def __init__(self, max_batch: int = 64, flush_interval: float = 1.0):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._buffer: List[ExecutionRecord] = []
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self.batches_written = 0
+
+    def append(self, record: ExecutionRecord) -> str:
+        """
+        Add a record.
+
+        Returns:
+            str: The record's id.
+        """
+        with self._lock:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.max_batch or self.flush_interval <= 0:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return record.id
+
+    def extend(self, records) -> int:
+        """
+        Append many records, e.g. store.extend(JsonFileExecutionStore(old_dir).iterate()).
+        """
+        count = 0
+        for record in records:
+            self.append(record)
+            count += 1
+        self.flush()
+        return count
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            records, self._buffer = self._buffer, []
+            try:
+                self._write(records)
+            except Exception:
+                # Keep them for the next flush rather than losing them
+                self._buffer = records + self._buffer
+                raise
+            self.batches_written += 1
+
+    def close(self):
+        self.flush()
+
+    def iterate(
+        self, name: Optional[str] = None, since: Optional[datetime] = None
+    ) -> Iterator[ExecutionRecord]:
+        """
+        Read the records back, oldest first.
+
+        Args:
+            name (Optional[str]): Only records with this name (prompt template).
+            since (Optional[datetime]): Only records created at or after this time.
+        """
+        self.flush()
+        for record in self._read():
+            if name is not None and record.name != name:
+                continue
+            if since is not None and record.created_at < since:
+                continue
+            yield record
+
+    def __iter__(self) -> Iterator[ExecutionRecord]:
+        return self.iterate()
+
+    @abstractmethod
+    def _write(self, records: List[ExecutionRecord]):
+        """
+        Durably write a batch of records, raising if any of them was not written.
+        """
+
+    @abstractmethod
+    def _read(self) -> Iterator[ExecutionRecord]:
+        """
+        Yield every written record, oldest first.
+        """
+
+
+class JsonFileExecutionStore(ExecutionStore):
+    """
+    The original layout: one pretty-printed MultiLLMPromptExecution JSON file per
+    run, now with collision-free file names. Writes are not batched. Records
+    are read back in id order, like the other stores.
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(max_batch=1, flush_interval=0)
+        self.directory = directory
+
+    def file_path(self, record: ExecutionRecord) -> str:
+        return os.path.join(self.directory, f"{record.name}_{record.id}.json")
+
+    def _write(self, records: List[ExecutionRecord]):
+        os.makedirs(self.directory, exist_ok=True)
+        for record in records:
+            with open(self.file_path(record), "w") as f:
+                json.dump(record.execution.model_dump(), f, indent=2)
+
+    def _read(self) -> Iterator[ExecutionRecord]:
+        for record_id, name, path in self._files():
+            yield self._load(record_id, name, path)
+
+    def _files(self) -> List[Tuple[str, str, str]]:
+        """
+        The (id, name, path) of every record file, in id order.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stem = entry.name[: -len(".json")]
+                    match = _NEW_ID.search(stem) or _LEGACY_ID.search(stem)
+                    if match:
+                        files.append(
+                            (match.group(1), stem[: match.start()], entry.path)
+                        )
+                    else:
+                        files.append((stem, stem, entry.path))
+        return sorted(files)
+
+    @staticmethod
+    def _load(record_id: str, name: str, path: str) -> ExecutionRecord:
+        with open(path, "r") as f:
+            execution = MultiLLMPromptExecution(**json.load(f))
+        return ExecutionRecord(
+            id=record_id,
+            name=name,
+            created_at=datetime.fromtimestamp(os.path.getmtime(path)),
+            execution=execution,
+        )
+
+
+class JsonlExecutionStore(ExecutionStore):
+    """
+    Gzip-compressed JSON lines in numbered segment files.
+
+    Each batch is appended to the current segment as its own gzip member (a
+    concatenation of members is a valid gzip file). Reading goes member by
+    member, so a member torn by a crash is skipped on its own. Batches are
+    never appended after a torn member: if the current segment does not end
+    on a complete member (checked before the first write, and after a failed
+    write), a new segment is started. A new segment is also started once the
+    current one reaches segment_max_bytes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        max_batch: int = 64,
+        flush_interval: float = 1.0,
+    ):
+        super().__init__(max_batch=max_batch, flush_interval=flush_interval)
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        segments = self.segments()
+        self._segment = self._segment_number(segments[-1]) if segments else 1
+        # Whether the current segment is known to end on a complete member
+        self._segment_complete = False
+
+    def segments(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.startswith("executions-") and name.endswith(".jsonl.gz")
+        )
+
+    @staticmethod
+    def _segment_number(path: str) -> int:
+        return int(os.path.basename(path)[len("executions-") : -len(".jsonl.gz")])
+
+    def _segment_path(self) -> str:
+        return os.path.join(self.directory, f"executions-{self._segment:06d}.jsonl.gz")
+
+    def _write(self, records: List[ExecutionRecord]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._segment_path()
+        if os.path.exists(path) and (
+            os.path.getsize(path) >= self.segment_max_bytes
+            or not (self._segment_complete or _ends_on_complete_member(path))
+        ):
+            self._segment += 1
+            path = self._segment_path()
+        lines = "".join(record.model_dump_json() + "\n" for record in records)
+        self._segment_complete = False
+        with open(path, "ab") as f:
+            f.write(zlib.compress(lines.encode("utf-8"), wbits=31))
+            f.flush()
+            os.fsync(f.fileno())
+        self._segment_complete = True
+
+    def _read(self) -> Iterator[ExecutionRecord]:
+        for path in self.segments():
+            with open(path, "rb") as f:
+                data = f.read()
+            for member in _gzip_members(data):
+                if member is None:
+                    # A batch torn by a crash
+                    continue
+                for line in member.decode("utf-8").splitlines():
+                    yield ExecutionRecord.model_validate_json(line)
+
+
+def _gzip_members(data: bytes) -> Iterator[Optional[bytes]]:
+    """
+    Decompress concatenated gzip members one by one, yielding None for a torn or
+    corrupt member and resuming at the next member header after it.
+    """
+    view = memoryview(data)
+    start = 0
+    while start < len(data):
+        decompressor = zlib.decompressobj(wbits=31)
+        parts = []
+        position = start
+        complete = False
+        try:
+            while position < len(data):
+                chunk = view[position : position + _READ_CHUNK]
+                parts.append(decompressor.decompress(chunk))
+                if decompressor.eof:
+                    position += len(chunk) - len(decompressor.unused_data)
+                    complete = True
+                    break
+                position += len(chunk)
+        except zlib.error:
+            pass
+        if complete:
+            yield b"".join(parts)
+            start = position
+            continue
+        yield None
+        start = data.find(GZIP_MAGIC, start + 1)
+        if start < 0:
+            return
+
+
+def _ends_on_complete_member(path: str) -> bool:
+    with open(path, "rb") as f:
+        data = f.read()
+    last = None
+    for last in _gzip_members(data):
+        pass
+    return last is not None
+
+
+class SqliteExecutionStore(ExecutionStore):
+    """
+    Records in an SQLite table (WAL mode), one transaction per batch.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_batch: int = 64,
+        flush_interval: float = 1.0,
+    ):
+        super().__init__(max_batch=max_batch, flush_interval=flush_interval)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS executions (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                record TEXT NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS executions_name ON executions (name)"
+        )
+        self._db.commit()
+
+    def _write(self, records: List[ExecutionRecord]):
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO executions (id, name, created_at, record) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        record.id,
+                        record.name,
+                        record.created_at.isoformat(),
+                        record.model_dump_json(),
+                    )
+                    for record in records
+                ],
+            )
+
+    def iterate(
+        self, name: Optional[str] = None, since: Optional[datetime] = None
+    ) -> Iterator[ExecutionRecord]:
+        # Filtered in SQL rather than in Python
+        self.flush()
+        return self._select(name, since)
+
+    def _read(self) -> Iterator[ExecutionRecord]:
+        return self._select(None, None)
+
+    def _select(
+        self, name: Optional[str], since: Optional[datetime]
+    ) -> Iterator[ExecutionRecord]:
+        query = "SELECT record FROM executions"
+        conditions, params = [], []
+        if name is not None:
+            conditions.append("name = ?")
+            params.append(name)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since.isoformat())
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id", params).fetchall()
+        for (record,) in rows:
+            yield ExecutionRecord.model_validate_json(record)
+
+    def close(self):
+        super().close()
+        self._db.close()
+
+
+def migrate_json_files(store: ExecutionStore, directory: str) -> int:
+    """
+    Move the one-file-per-run JSON records in directory into store, once.
+
+    The migrated files are moved to directory/migrated afterwards, so later
+    calls (and the store's reads) never look at them again.
+
+    Returns:
+        int: The number of records migrated.
+    """
+    legacy = JsonFileExecutionStore(directory)
+    files = legacy._files()
+    if not files:
+        return 0
+    store.extend(legacy._load(*file) for file in files)
+    # Only once the records are durable in store. A crash before the moves
+    # below finish migrates the remaining files again on the next open.
+    migrated_dir = os.path.join(directory, "migrated")
+    os.makedirs(migrated_dir, exist_ok=True)
+    for _, _, path in files:
+        shutil.move(path, os.path.join(migrated_dir, os.path.basename(path)))
+    return len(files)
+
+
+def open_execution_store(
+    backend: Optional[str] = None, directory: Optional[str] = None
+) -> ExecutionStore:
+    """
+    Open the execution store configured by EXECUTION_STORE ("jsonl", "sqlite" or
+    "json" for one file per run) in PROMPT_EXECUTIONS_DIR.
+
+    Opening a jsonl or sqlite store first migrates the one-file-per-run JSON
+    records already in the directory into it (see migrate_json_files), so
+    switching keeps the history.
+    """
+    backend = backend or os.getenv("EXECUTION_STORE", "jsonl")
+    directory = directory or os.getenv("PROMPT_EXECUTIONS_DIR", "./prompt_executions")
+    if backend == "jsonl":
+        store = JsonlExecutionStore(directory)
+    elif backend == "sqlite":
+        store = SqliteExecutionStore(os.path.join(directory, "executions.sqlite"))
+    elif backend == "json":
+        return JsonFileExecutionStore(directory)
+    else:
+        raise ValueError(f"Unknown execution store '{backend}'")
+    migrate_json_files(store, directory)
+    return store
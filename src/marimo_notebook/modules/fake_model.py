@@ -0,0 +1,185 @@
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from typing import Iterator, List, Optional
+
+import llm
+from pydantic import BaseModel, Field
+
+_WORDS = (
+    "the model answers prompt chain context token latency cache stream result "
+    "output value list item reason step plan check fast slow local cloud test"
+).split()
+
+
+class FakeLatency(BaseModel):
+    # "constant", "uniform", "lognormal" or "exponential" time to first token
+    distribution: str = "lognormal"
+    median_seconds: float = 0.2
+    # Spread of the lognormal distribution; 1.0 gives a long p99 tail
+    sigma: float = 0.5
+    # Bounds of the uniform distribution
+    min_seconds: float = 0.0
+    max_seconds: float = 0.4
+    # Streaming speed after the first token
+    tokens_per_second: float = 200.0
+
+
+class FakeModelError(Exception):
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeRateLimitError(FakeModelError):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message, status_code=429)
+        self.retry_after = retry_after
+
+
+class FakeModel(llm.Model):
+    """
+    Offline llm.Model for benchmarks and load tests: no network, no key, no cost.
+
+    Responses are a deterministic function of (model_id, prompt, seed), so runs
+    can be repeated and cached. Latency is drawn from a seeded distribution, and
+    errors and 429s (with a retry_after, like provider rate limit errors) are
+    injected at the configured rates. output_format "json_markdown" wraps every
+    response in a fenced ```json block, like models asked for JSON often do.
+    """
+
+    can_stream = True
+
+    class Options(llm.Options):
+        temperature: Optional[float] = Field(default=None)
+        seed: Optional[int] = Field(default=None)
+
+    def __init__(
+        self,
+        model_id: str = "fake",
+        latency: Optional[FakeLatency] = None,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: Optional[float] = 1.0,
+        output_format: str = "text",
+        response_words: int = 40,
+        seed: int = 0,
+        sleep=time.sleep,
+    ):
+        self.model_id = model_id
+        self.latency = latency or FakeLatency()
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.output_format = output_format
+        self.response_words = response_words
+        self.seed = seed
+        self.sleep = sleep
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def sample_latency(self) -> float:
+        latency = self.latency
+        with self._lock:
+            if latency.distribution == "constant":
+                return latency.median_seconds
+            if latency.distribution == "uniform":
+                return self._rng.uniform(latency.min_seconds, latency.max_seconds)
+            if latency.distribution == "exponential":
+                # Exponential with the given median
+                return self._rng.expovariate(
+                    0.6931471805599453 / latency.median_seconds
+                )
+            if latency.distribution == "lognormal":
+                return latency.median_seconds * self._rng.lognormvariate(
+                    0, latency.sigma
+                )
+        raise ValueError(f"Unknown latency distribution '{latency.distribution}'")
+
+    def respond(self, prompt: str, seed: Optional[int] = None) -> str:
+        """
+        The deterministic response to prompt.
+        """
+        digest = hashlib.sha256(
+            f"{self.model_id}\0{self.seed if seed is None else seed}\0{prompt}".encode(
+                "utf-8"
+            )
+        ).digest()
+        rng = random.Random(digest)
+        words = [rng.choice(_WORDS) for _ in range(self.response_words)]
+        text = " ".join(words)
+        if self.output_format == "json_markdown":
+            content = {
+                "model": self.model_id,
+                "answer": text,
+                "prompt_sha": digest.hex()[:12],
+            }
+            return f"Here is the result:\n\n```json\n{json.dumps(content, indent=2)}\n```\n"
+        return text
+
+    def _inject_failure(self):
+        with self._lock:
+            self.calls += 1
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            raise FakeRateLimitError(
+                f"Error code: 429 - {self.model_id} rate limit exceeded",
+                retry_after=self.retry_after,
+            )
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise FakeModelError(f"Error code: 500 - {self.model_id} internal error")
+
+    def execute(self, prompt, stream, response, conversation) -> Iterator[str]:
+        self.sleep(self.sample_latency())
+        self._inject_failure()
+        text = self.respond(prompt.prompt, prompt.options.seed)
+        if not stream:
+            yield text
+            return
+
+        chunks = _chunk_words(text)
+        # Roughly one token per word, spread over the chunks
+        chunk_seconds = len(text.split()) / self.latency.tokens_per_second / len(chunks)
+        for index, chunk in enumerate(chunks):
+            if index:
+                self.sleep(chunk_seconds)
+            yield chunk
+
+
+def _chunk_words(text: str, words_per_chunk: int = 4) -> List[str]:
+    words = text.split(" ")
+    return [
+        " ".join(words[start : start + words_per_chunk])
+        + (" " if start + words_per_chunk < len(words) else "")
+        for start in range(0, len(words), words_per_chunk)
+    ]
+
+
+# The fake models every notebook and benchmark can use by name
+FAKE_MODELS = [
+    FakeModel(
+        "fake-instant", latency=FakeLatency(distribution="constant", median_seconds=0.0)
+    ),
+    FakeModel("fake", latency=FakeLatency()),
+    FakeModel("fake-slow-tail", latency=FakeLatency(sigma=1.0)),
+    FakeModel("fake-flaky", error_rate=0.05, rate_limit_rate=0.1),
+    FakeModel("fake-json", output_format="json_markdown"),
+]
+
+
+@llm.hookimpl
+def register_models(register):
+    for model in FAKE_MODELS:
+        register(model)
+
+
+def register_plugin():
+    """
+    Register the fake models with llm, so llm.get_model("fake") works like any other model.
+    """
+    if not llm.plugins.pm.is_registered(sys.modules[__name__]):
+        llm.plugins.pm.register(sys.modules[__name__], name="marimo-fake-models")
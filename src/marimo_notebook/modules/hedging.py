@@ -0,0 +1,156 @@
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class HedgePolicy(BaseModel):
+    # Hedge once a call has run longer than this percentile of recent latencies
+    percentile: float = 0.95
+    # Latencies kept per model, and the minimum needed before hedging starts
+    window: int = 200
+    min_samples: int = 20
+    # Fraction of recent calls that may be hedged, so hedging cannot double the load
+    max_hedge_rate: float = 0.1
+    # Hedge delay used before min_samples latencies were seen, None to not hedge then
+    initial_delay: Optional[float] = None
+
+
+class Hedger:
+    """
+    Hedged calls: if a call is slower than the policy's percentile of recent
+    latency, a duplicate (or a call to a fallback model) is sent and whichever
+    returns first wins.
+
+    The llm library's calls block and cannot be interrupted, so the losing call
+    is cancelled if it has not started yet and otherwise abandoned: it runs to
+    completion in the background and its result is dropped.
+    """
+
+    def __init__(self, policy: Optional[HedgePolicy] = None, max_workers: int = 32):
+        self.policy = policy or HedgePolicy()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hedge"
+        )
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._recent_hedged: Deque[bool] = deque(maxlen=self.policy.window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.rate_capped = 0
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """
+        Seconds to wait for a call to key before hedging it, None to not hedge.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(key, ()))
+        if len(latencies) < self.policy.min_samples:
+            return self.policy.initial_delay
+        index = min(len(latencies) - 1, int(self.policy.percentile * len(latencies)))
+        return latencies[index]
+
+    def _observe(self, key: str, seconds: float):
+        with self._lock:
+            if key not in self._latencies:
+                self._latencies[key] = deque(maxlen=self.policy.window)
+            self._latencies[key].append(seconds)
+
+    def _may_hedge(self) -> bool:
+        recent_hedges = sum(self._recent_hedged)
+        allowed = max(1.0, self.policy.max_hedge_rate * len(self._recent_hedged))
+        return recent_hedges < allowed
+
+    def call(
+        self,
+        key: str,
+        primary: Callable[[], T],
+        hedge: Optional[Callable[[], T]] = None,
+    ) -> T:
+        """
+        Run primary, hedging it with hedge (default: primary again) if it is slow.
+
+        Args:
+            key (str): Latency history to use, e.g. the model id.
+            primary (Callable[[], T]): The call.
+            hedge (Optional[Callable[[], T]]): The duplicate call, e.g. to a fallback model.
+
+        Returns:
+            T: The result of whichever call succeeded first.
+        """
+        with self._lock:
+            self.calls += 1
+        delay = self.hedge_delay(key)
+
+        start = time.perf_counter()
+        primary_future = self._executor.submit(primary)
+        # Every primary that finishes counts toward the latency history, even
+        # one that lost, so slow calls keep the percentile honest
+        primary_future.add_done_callback(
+            lambda future: (
+                self._observe(key, time.perf_counter() - start)
+                if not future.cancelled() and future.exception() is None
+                else None
+            )
+        )
+
+        try:
+            result = primary_future.result(timeout=delay)
+        except concurrent.futures.TimeoutError:
+            pass
+        else:
+            with self._lock:
+                self._recent_hedged.append(False)
+            return result
+
+        with self._lock:
+            hedging = self._may_hedge()
+            self._recent_hedged.append(hedging)
+            if hedging:
+                self.hedged += 1
+            else:
+                self.rate_capped += 1
+        if not hedging:
+            return primary_future.result()
+
+        hedge_future = self._executor.submit(hedge or primary)
+        pending = {primary_future, hedge_future}
+        error = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for other in pending:
+                    other.cancel()
+                if future is hedge_future:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return future.result()
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report how many calls were hedged, how often the hedge won and how many
+        hedges the rate cap prevented.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": (
+                    self.hedge_wins / self.hedged if self.hedged else None
+                ),
+                "hedge_rate": self.hedged / self.calls if self.calls else 0.0,
+                "rate_capped": self.rate_capped,
+            }
@@ -1,15 +1,44 @@
+import asyncio
 import llm
 from dotenv import load_dotenv
 import os
-from mako.template import Template
+import time
+from typing import Callable, List, Optional, Tuple
+import concurrent.futures
+from .response_cache import ResponseCache
+from .dispatcher import Dispatcher
+from .singleflight import SingleFlight
+from .template_cache import TemplateCache
+from .context_budget import check_budget, fit_prompt
+from .streaming import PromptStream, AsyncPromptStream
+from .metrics import CallMetrics
+from .batch import BatchRunner, LocalBatchServer, OpenAIBatchBackend
+from .hedging import Hedger
+from .fake_model import FakeModel
+from .model_registry import (
+    LazyModel,
+    get_model,
+    lazy_models,
+    registry_stats,
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
 
+# Latency, token and cost records of every call made through this module
+METRICS = CallMetrics()
+
+# Compiled prompt templates, persisted to PROMPT_TEMPLATE_MODULE_DIR when set
+TEMPLATE_CACHE = TemplateCache(
+    max_entries=int(os.getenv("PROMPT_TEMPLATE_CACHE_SIZE", "256")),
+    module_directory=os.getenv("PROMPT_TEMPLATE_MODULE_DIR") or None,
+    max_disk_entries=int(os.getenv("PROMPT_TEMPLATE_MODULE_MAX_ENTRIES", "1024")),
+)
+
+
 def conditional_render(prompt, context, start_delim="% if", end_delim="% endif"):
-    template = Template(prompt)
-    return template.render(**context)
+    return TEMPLATE_CACHE.render(prompt, context)
 
 
 def parse_markdown_backticks(str) -> str:
@@ -23,12 +52,44 @@ def parse_markdown_backticks(str) -> str:
     return str.strip()
 
 
-def prompt(model: llm.Model, prompt: str):
+# Shared by every cell (and notebook) in the process, so identical calls
+# from anywhere coalesce
+IN_FLIGHT_PROMPTS = SingleFlight()
+
+
+def prompt(
+    model: llm.Model,
+    prompt: str,
+    cache: Optional[ResponseCache] = None,
+    dispatcher: Optional[Dispatcher] = None,
+    coalesce: bool = False,
+    on_overflow: Optional[str] = None,
+):
+    prompt = _fit_context(model, prompt, on_overflow)
+    call = _dispatched(model, prompt, dispatcher, lambda: _prompt(model, prompt))
+    call = _instrumented(model, prompt, dispatcher, call)
+    call = _coalesced(model, prompt, {}, coalesce, call)
+    if cache is not None:
+        return cache.get_or_call(model.model_id, prompt, {}, call)
+    return call()
+
+
+def _prompt(model: llm.Model, prompt: str):
     res = model.prompt(prompt, stream=False)
     return res.text()
 
 
-def prompt_with_temp(model: llm.Model, prompt: str, temperature: float = 0.7):
+def prompt_with_temp(
+    model: llm.Model,
+    prompt: str,
+    temperature: float = 0.7,
+    cache: Optional[ResponseCache] = None,
+    dispatcher: Optional[Dispatcher] = None,
+    coalesce: bool = False,
+    on_overflow: Optional[str] = None,
+    hedger: Optional[Hedger] = None,
+    fallback_model: Optional[llm.Model] = None,
+):
     """
     Send a prompt to the model with a specified temperature.
 
@@ -36,200 +97,431 @@ def prompt_with_temp(model: llm.Model, prompt: str, temperature: float = 0.7):
     model (llm.Model): The LLM model to use.
     prompt (str): The prompt to send to the model.
     temperature (float): The temperature setting for the model's response. Default is 0.7.
+    cache (Optional[ResponseCache]): Cache to serve repeated identical calls from. Default is no caching.
+    dispatcher (Optional[Dispatcher]): Rate limiter to queue and retry the call through. Default is a direct call.
+    coalesce (bool): Share the result of an identical call (model, prompt, temperature) that is already in flight instead of making another one. Default is False.
+    on_overflow (Optional[str]): "warn", "truncate" or "error" when the prompt does not fit the model's context window. Default is no check.
+    hedger (Optional[Hedger]): Hedge the call when it runs slower than its recent latency percentile. Default is no hedging.
+    fallback_model (Optional[llm.Model]): Model to send the hedge to. Default is the same model.
 
     Returns:
     str: The model's response text.
     """
-
-    model_id = model.model_id
-    if "o1" in model_id or "gemini" in model_id:
-        temperature = 1
-        res = model.prompt(prompt, stream=False)
-        return res.text()
-
-    res = model.prompt(prompt, stream=False, temperature=temperature)
+    prompt = _fit_context(model, prompt, on_overflow)
+    call = _dispatched(
+        model,
+        prompt,
+        dispatcher,
+        lambda: _prompt_with_temp(model, prompt, temperature),
+    )
+    call = _instrumented(model, prompt, dispatcher, call)
+    if hedger is not None:
+        call = _hedged(
+            hedger, model, call, fallback_model, prompt, temperature, dispatcher
+        )
+    call = _coalesced(model, prompt, {"temperature": temperature}, coalesce, call)
+    if cache is not None:
+        return cache.get_or_call(
+            model.model_id, prompt, {"temperature": temperature}, call
+        )
+    return call()
+
+
+def _prompt_with_temp(model: llm.Model, prompt: str, temperature: float):
+    res = model.prompt(prompt, stream=False, **_temperature_options(model, temperature))
     return res.text()
 
 
-def get_model_name(model: llm.Model):
-    return model.model_id
+def _dispatched(
+    model: llm.Model, prompt: str, dispatcher: Optional[Dispatcher], fn: Callable
+) -> Callable:
+    if dispatcher is None:
+        return fn
+    return lambda: dispatcher.call(
+        fn,
+        get_model_provider(model),
+        model.model_id,
+        estimated_tokens=len(prompt) // 4,
+    )
 
 
-def build_sonnet_3_5():
-    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+def _instrumented(
+    model: llm.Model, prompt: str, dispatcher: Optional[Dispatcher], fn: Callable
+) -> Callable:
+    def call():
+        started_at = time.time()
+        start = time.perf_counter()
+        output, error = None, None
+        try:
+            output = fn()
+            return output
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            METRICS.record_call(
+                model,
+                prompt,
+                output,
+                started_at,
+                time.perf_counter() - start,
+                retries=dispatcher.last_call_retries() if dispatcher else 0,
+                error=error,
+            )
+
+    return call
+
+
+async def _instrumented_async(model: llm.Model, prompt: str, response) -> str:
+    started_at = time.time()
+    start = time.perf_counter()
+    output, error = None, None
+    try:
+        output = await response.text()
+        return output
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        METRICS.record_call(
+            model, prompt, output, started_at, time.perf_counter() - start, error=error
+        )
+
+
+def _record_stream(stream) -> None:
+    METRICS.record_call(
+        stream.model,
+        stream.prompt,
+        "".join(stream.chunks),
+        time.time() - stream.metrics.total_seconds,
+        stream.metrics.total_seconds,
+        time_to_first_token=stream.metrics.time_to_first_token,
+    )
 
-    sonnet_3_5_model: llm.Model = llm.get_model("claude-3.5-sonnet")
-    sonnet_3_5_model.key = ANTHROPIC_API_KEY
 
-    return sonnet_3_5_model
+def _hedged(
+    hedger: Hedger,
+    model: llm.Model,
+    primary: Callable,
+    fallback_model: Optional[llm.Model],
+    prompt: str,
+    temperature: float,
+    dispatcher: Optional[Dispatcher],
+) -> Callable:
+    hedge_model = fallback_model or model
+    hedge = _instrumented(
+        hedge_model,
+        prompt,
+        dispatcher,
+        _dispatched(
+            hedge_model,
+            prompt,
+            dispatcher,
+            lambda: _prompt_with_temp(hedge_model, prompt, temperature),
+        ),
+    )
+    return lambda: hedger.call(model.model_id, primary, hedge)
 
 
-def build_mini_model():
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    gpt4_o_mini_model: llm.Model = llm.get_model("gpt-4o-mini")
-    gpt4_o_mini_model.key = OPENAI_API_KEY
-    return gpt4_o_mini_model
+def _fit_context(model: llm.Model, prompt: str, on_overflow: Optional[str]) -> str:
+    if on_overflow is None:
+        return prompt
+    if on_overflow == "chunk":
+        raise ValueError(
+            "A single call cannot send chunks, use context_budget.fit_prompt instead"
+        )
+    return fit_prompt(model, prompt, on_overflow)[0]
 
 
-def build_big_3_models():
-    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-    sonnet_3_5_model: llm.Model = llm.get_model("claude-3.5-sonnet")
-    sonnet_3_5_model.key = ANTHROPIC_API_KEY
+def _coalesced(
+    model: llm.Model, prompt: str, params: dict, coalesce: bool, fn: Callable
+) -> Callable:
+    if not coalesce:
+        return fn
+    key = ResponseCache.make_key(model.model_id, prompt, params)
+    return lambda: IN_FLIGHT_PROMPTS.do(key, fn)
 
-    gpt4_o_model: llm.Model = llm.get_model("4o")
-    gpt4_o_model.key = OPENAI_API_KEY
 
-    gemini_1_5_pro_model: llm.Model = llm.get_model("gemini-1.5-pro-latest")
-    gemini_1_5_pro_model.key = GEMINI_API_KEY
+def call_metrics_summary() -> dict:
+    """
+    Per model call counts, latency percentiles, estimated tokens and cost.
+    """
+    return METRICS.summary()
 
-    return sonnet_3_5_model, gpt4_o_model, gemini_1_5_pro_model
 
+def coalescing_stats() -> dict:
+    """
+    Report how many coalesced prompt calls were made and how many paid calls that saved.
+    """
+    return IN_FLIGHT_PROMPTS.stats()
 
-def build_latest_openai():
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-    # chatgpt_4o_latest_model: llm.Model = llm.get_model("chatgpt-4o-latest") - experimental
-    chatgpt_4o_latest_model: llm.Model = llm.get_model("gpt-4o")
-    chatgpt_4o_latest_model.key = OPENAI_API_KEY
-    return chatgpt_4o_latest_model
+def _temperature_options(model: llm.Model, temperature: Optional[float]) -> dict:
+    # o1 and gemini models do not accept a temperature
+    model_id = model.model_id
+    if temperature is None or "o1" in model_id or "gemini" in model_id:
+        return {}
+    return {"temperature": temperature}
 
 
-def build_big_3_plus_mini_models():
+def stream_prompt(
+    model: llm.Model, prompt: str, temperature: Optional[float] = None
+) -> PromptStream:
+    """
+    Stream a prompt's response chunk by chunk.
 
-    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    Iterate over the returned PromptStream to get text as it arrives; afterwards
+    its `metrics` hold the time to first token and tokens/sec of the call.
 
-    sonnet_3_5_model: llm.Model = llm.get_model("claude-3.5-sonnet")
-    sonnet_3_5_model.key = ANTHROPIC_API_KEY
+    Args:
+    model (llm.Model): The LLM model to use.
+    prompt (str): The prompt to send to the model.
+    temperature (Optional[float]): The temperature setting for the model's response. Default is the model's own default.
 
-    gpt4_o_model: llm.Model = llm.get_model("4o")
-    gpt4_o_model.key = OPENAI_API_KEY
+    Returns:
+    PromptStream: An iterable of response text chunks.
+    """
+    return PromptStream(
+        model, prompt, _temperature_options(model, temperature), _record_stream
+    )
 
-    gemini_1_5_pro_model: llm.Model = llm.get_model("gemini-1.5-pro-latest")
-    gemini_1_5_pro_model.key = GEMINI_API_KEY
 
-    gpt4_o_mini_model: llm.Model = llm.get_model("gpt-4o-mini")
-    gpt4_o_mini_model.key = OPENAI_API_KEY
+def stream_prompt_async(
+    model: llm.Model, prompt: str, temperature: Optional[float] = None
+) -> AsyncPromptStream:
+    """
+    Async version of stream_prompt: `async for chunk in stream_prompt_async(...)`.
+    """
+    return AsyncPromptStream(
+        model,
+        prompt,
+        _temperature_options(model, temperature),
+        _get_async_model(model),
+        _record_stream,
+    )
 
-    chatgpt_4o_latest_model = build_latest_openai()
 
-    return (
-        sonnet_3_5_model,
-        gpt4_o_model,
-        gemini_1_5_pro_model,
-        gpt4_o_mini_model,
+def build_response_cache(ttl_seconds: Optional[float] = None) -> ResponseCache:
+    """
+    Build a ResponseCache backed by the SQLite file in LLM_RESPONSE_CACHE_FILE.
+    """
+    cache_file = os.getenv(
+        "LLM_RESPONSE_CACHE_FILE", "./llm_response_cache/responses.sqlite"
     )
+    return ResponseCache(path=cache_file, ttl_seconds=ttl_seconds)
 
 
-def build_gemini_duo():
-    gemini_1_5_pro: llm.Model = llm.get_model("gemini-1.5-pro-latest")
-    gemini_1_5_flash: llm.Model = llm.get_model("gemini-1.5-flash-latest")
+def build_batch_runner(poll_interval: float = 30.0) -> BatchRunner:
+    """
+    Build a BatchRunner for the backend in LLM_BATCH_BACKEND: "openai" (default)
+    or "local", the offline stand-in batch server. Batch files go to LLM_BATCH_DIR.
+    """
+    batch_dir = os.getenv("LLM_BATCH_DIR", "./llm_batches")
+    if os.getenv("LLM_BATCH_BACKEND", "openai") == "local":
+        backend = LocalBatchServer(batch_dir=batch_dir)
+    else:
+        backend = OpenAIBatchBackend(batch_dir=batch_dir)
+    return BatchRunner(backend, poll_interval=poll_interval)
+
+
+def prompt_with_temp_batch(
+    model_prompts: List[Tuple[llm.Model, str]],
+    temperature: float = 0.7,
+    runner: Optional[BatchRunner] = None,
+) -> List[concurrent.futures.Future]:
+    """
+    Batch version of prompt_with_temp, for bulk runs that can wait for batch API turnaround.
+
+    Models the runner's backend cannot batch (e.g. anthropic, gemini or ollama models
+    with the OpenAI Batch API) are called directly with prompt_with_temp meanwhile.
+
+    Args:
+    model_prompts (List[Tuple[llm.Model, str]]): The (model, prompt) pairs to run.
+    temperature (float): The temperature setting for the models' responses. Default is 0.7.
+    runner (Optional[BatchRunner]): Runner to submit through. Default is build_batch_runner().
 
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    Returns:
+    List[concurrent.futures.Future]: One finished Future per pair, in order; result() is the
+    response text, or raises the request's error.
+    """
+    runner = runner or build_batch_runner()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        futures = []
+        for model, prompt in model_prompts:
+            provider = get_model_provider(model)
+            if runner.accepts(provider):
+                future = runner.add(
+                    model.model_id,
+                    prompt,
+                    _temperature_options(model, temperature),
+                    provider=provider,
+                )
+            else:
+                future = executor.submit(prompt_with_temp, model, prompt, temperature)
+            futures.append(future)
+        runner.run()
+    return futures
+
+
+def build_dispatcher() -> Dispatcher:
+    """
+    Build a Dispatcher with the default provider rate limits, retrying rate
+    limited calls up to LLM_MAX_RETRIES times.
+    """
+    return Dispatcher(max_retries=int(os.getenv("LLM_MAX_RETRIES", "6")))
 
-    gemini_1_5_pro.key = GEMINI_API_KEY
-    gemini_1_5_flash.key = GEMINI_API_KEY
 
-    return gemini_1_5_pro, gemini_1_5_flash
+# Default maximum concurrent calls per provider, for FusionChain.run_async
+DEFAULT_PROVIDER_LIMITS = {
+    "openai": 32,
+    "anthropic": 16,
+    "gemini": 16,
+    "ollama": 2,
+    "fake": 64,
+}
 
+# Async model instances (llm >= 0.18), keyed by model_id
+_async_models = {}
 
-def build_ollama_models():
 
-    llama3_2_model: llm.Model = llm.get_model("llama3.2")
-    llama_3_2_1b_model: llm.Model = llm.get_model("llama3.2:1b")
+def get_model_provider(model: llm.Model) -> str:
+    """
+    Get the provider of a model: "openai", "anthropic", "gemini", "ollama", "fake" or "other".
+    """
+    if isinstance(model, LazyModel):
+        return model.spec.provider
+    if isinstance(model, FakeModel):
+        return "fake"
+    module = type(model).__module__
+    model_id = model.model_id
+    if "ollama" in module:
+        return "ollama"
+    if "claude" in module or "claude" in model_id:
+        return "anthropic"
+    if "gemini" in module or "gemini" in model_id:
+        return "gemini"
+    if "openai" in module or model_id.startswith(("gpt", "o1", "chatgpt")):
+        return "openai"
+    return "other"
+
+
+def _get_async_model(model: llm.Model):
+    # llm only ships async models from 0.18 onwards
+    if not hasattr(llm, "get_async_model"):
+        return None
+    if model.model_id not in _async_models:
+        try:
+            async_model = llm.get_async_model(model.model_id)
+        except llm.UnknownModelError:
+            async_model = None
+        if async_model is not None:
+            async_model.key = model.key
+        _async_models[model.model_id] = async_model
+    return _async_models[model.model_id]
+
+
+async def prompt_async(model: llm.Model, prompt: str):
+    """
+    Asyncio version of prompt.
 
-    return llama3_2_model, llama_3_2_1b_model
+    Uses the model's native async implementation when the installed llm provides
+    one, otherwise runs the blocking call in a worker thread.
+    """
+    async_model = _get_async_model(model)
+    if async_model is None:
+        return await asyncio.to_thread(
+            _instrumented(model, prompt, None, lambda: _prompt(model, prompt))
+        )
+    res = async_model.prompt(prompt, stream=False)
+    return await _instrumented_async(model, prompt, res)
+
+
+async def prompt_with_temp_async(
+    model: llm.Model, prompt: str, temperature: float = 0.7
+):
+    """
+    Asyncio version of prompt_with_temp.
 
+    Args:
+    model (llm.Model): The LLM model to use.
+    prompt (str): The prompt to send to the model.
+    temperature (float): The temperature setting for the model's response. Default is 0.7.
 
-def build_ollama_slm_models():
+    Returns:
+    str: The model's response text.
+    """
+    async_model = _get_async_model(model)
+    if async_model is None:
+        return await asyncio.to_thread(prompt_with_temp, model, prompt, temperature)
 
-    llama3_2_model: llm.Model = llm.get_model("llama3.2")
-    phi3_5_model: llm.Model = llm.get_model("phi3.5:latest")
-    qwen2_5_model: llm.Model = llm.get_model("qwen2.5:latest")
+    res = async_model.prompt(
+        prompt, stream=False, **_temperature_options(model, temperature)
+    )
+    return await _instrumented_async(model, prompt, res)
 
-    return llama3_2_model, phi3_5_model, qwen2_5_model
 
+def get_model_name(model: llm.Model):
+    return model.model_id
 
-def build_openai_model_stack():
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-    gpt4_o_mini_model: llm.Model = llm.get_model("gpt-4o-mini")
-    gpt4_o_2024_08_06_model: llm.Model = llm.get_model("gpt-4o")
-    o1_preview_model: llm.Model = llm.get_model("o1-preview")
-    o1_mini_model: llm.Model = llm.get_model("o1-mini")
-
-    models = [
-        gpt4_o_mini_model,
-        gpt4_o_2024_08_06_model,
-        o1_preview_model,
-        o1_mini_model,
-    ]
 
-    for model in models:
-        model.key = OPENAI_API_KEY
+def build_sonnet_3_5():
+    return get_model("sonnet-3.5")
 
-    return models
 
+def build_mini_model():
+    return get_model("gpt-4o-mini")
 
-def build_openai_latest_and_fastest():
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-    gpt_4o_latest: llm.Model = llm.get_model("gpt-4o")
-    gpt_4o_latest.key = OPENAI_API_KEY
+def build_big_3_models():
+    return get_model("sonnet-3.5"), get_model("gpt-4o"), get_model("gemini-1-5-pro")
 
-    gpt_4o_mini_model: llm.Model = llm.get_model("gpt-4o-mini")
-    gpt_4o_mini_model.key = OPENAI_API_KEY
 
-    return gpt_4o_latest, gpt_4o_mini_model
+def build_latest_openai():
+    # chatgpt-4o-latest is experimental, gpt-4o is used instead
+    return get_model("gpt-4o-latest")
 
 
-def build_o1_series():
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+def build_big_3_plus_mini_models():
+    return (
+        get_model("sonnet-3.5"),
+        get_model("gpt-4o"),
+        get_model("gemini-1-5-pro"),
+        get_model("gpt-4o-mini"),
+    )
 
-    o1_mini_model: llm.Model = llm.get_model("o1-mini")
-    o1_mini_model.key = OPENAI_API_KEY
 
-    o1_preview_model: llm.Model = llm.get_model("o1-preview")
-    o1_preview_model.key = OPENAI_API_KEY
+def build_gemini_duo():
+    return get_model("gemini-1-5-pro"), get_model("gemini-1-5-flash")
 
-    return o1_mini_model, o1_preview_model
 
+def build_ollama_models():
+    return get_model("llama3-2"), get_model("llama3-2-1b")
 
-def build_small_cheap_and_fast():
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    gpt4_o_mini_model: llm.Model = llm.get_model("gpt-4o-mini")
-    gpt4_o_mini_model.key = OPENAI_API_KEY
 
-    gemini_1_5_flash_002: llm.Model = llm.get_model("gemini-1.5-flash-002")
-    gemini_1_5_flash_002.key = GEMINI_API_KEY
+def build_ollama_slm_models():
+    return get_model("llama3-2"), get_model("phi3-5"), get_model("qwen2-5")
 
-    return gpt4_o_mini_model, gemini_1_5_flash_002
 
+def build_openai_model_stack():
+    return [
+        get_model("gpt-4o-mini"),
+        get_model("gpt-4o"),
+        get_model("o1-preview"),
+        get_model("o1-mini"),
+    ]
 
-def build_small_cheap_and_fast():
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    gpt4_o_mini_model: llm.Model = llm.get_model("gpt-4o-mini")
-    gpt4_o_mini_model.key = OPENAI_API_KEY
 
-    gemini_1_5_flash_002: llm.Model = llm.get_model("gemini-1.5-flash-002")
-    gemini_1_5_flash_002.key = GEMINI_API_KEY
+def build_openai_latest_and_fastest():
+    return get_model("gpt-4o-latest"), get_model("gpt-4o-mini")
 
-    return gpt4_o_mini_model, gemini_1_5_flash_002
 
+def build_o1_series():
+    return get_model("o1-mini"), get_model("o1-preview")
 
-def build_gemini_1_2_002():
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-    gemini_1_5_pro_002: llm.Model = llm.get_model("gemini-1.5-pro-002")
-    gemini_1_5_flash_002: llm.Model = llm.get_model("gemini-1.5-flash-002")
+def build_small_cheap_and_fast():
+    return get_model("gpt-4o-mini"), get_model("gemini-1-5-flash-002")
 
-    gemini_1_5_pro_002.key = GEMINI_API_KEY
-    gemini_1_5_flash_002.key = GEMINI_API_KEY
 
-    return gemini_1_5_pro_002, gemini_1_5_flash_002
+def build_gemini_1_2_002():
+    return get_model("gemini-1-5-pro-002"), get_model("gemini-1-5-flash-002")
@@ -0,0 +1,282 @@
+import bisect
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .context_budget import estimate_tokens
+from .model_registry import find_spec
+from .typings import CallRecord
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0]
+
+
+class Histogram:
+    """
+    Fixed bucket histogram, cumulative like a Prometheus histogram on export.
+    """
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation inside its bucket.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def cumulative(self) -> List[tuple]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + [math.inf], self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class _ModelMetrics:
+    def __init__(self, provider: Optional[str]):
+        self.provider = provider
+        self.latency = Histogram()
+        self.time_to_first_token = Histogram()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+
+class CallMetrics:
+    """
+    Per-call records of LLM calls, aggregated per model.
+
+    Keeps the most recent max_records CallRecords and, per model, histograms of
+    wall time and time to first token plus totals of calls, errors, retries,
+    tokens and estimated cost. Export with to_json() or to_prometheus().
+
+    Token counts are offline estimates (see context_budget.estimate_tokens),
+    since the llm library does not report usage; costs use the registry's prices.
+    """
+
+    def __init__(self, max_records: int = 10_000):
+        self._records: Deque[CallRecord] = deque(maxlen=max_records)
+        self._models: Dict[str, _ModelMetrics] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record_call(
+        self,
+        model: Any,
+        prompt: str,
+        output: Optional[str],
+        started_at: float,
+        wall_seconds: float,
+        time_to_first_token: Optional[float] = None,
+        retries: int = 0,
+        error: Optional[BaseException] = None,
+    ) -> CallRecord:
+        """
+        Record one finished (or failed) call to model.
+
+        Args:
+            model: The LazyModel or llm.Model that was called.
+            prompt (str): The prompt sent.
+            output (Optional[str]): The response text, None if the call failed.
+            started_at (float): time.time() when the call started.
+            wall_seconds (float): Wall time of the call, including queueing and retries.
+            time_to_first_token (Optional[float]): Seconds until the first streamed chunk.
+            retries (int): Number of retries the call needed.
+            error (Optional[BaseException]): The error the call failed with.
+
+        Returns:
+            CallRecord: The stored record.
+        """
+        spec = find_spec(model)
+        provider = spec.provider if spec else None
+        prompt_tokens = estimate_tokens(prompt, provider)
+        completion_tokens = estimate_tokens(output, provider) if output else 0
+        cost = None
+        if spec and spec.input_cost_per_million is not None:
+            cost = (
+                prompt_tokens * spec.input_cost_per_million
+                + completion_tokens * (spec.output_cost_per_million or 0.0)
+            ) / 1_000_000
+
+        record = CallRecord(
+            llm_model_id=getattr(model, "model_id", str(model)),
+            provider=provider,
+            started_at=started_at,
+            wall_seconds=wall_seconds,
+            time_to_first_token=time_to_first_token,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            retries=retries,
+            cost_usd=cost,
+            error=None if error is None else f"{type(error).__name__}: {error}",
+        )
+        self.add(record)
+        return record
+
+    def add(self, record: CallRecord):
+        with self._lock:
+            self._records.append(record)
+            metrics = self._models.get(record.llm_model_id)
+            if metrics is None:
+                metrics = self._models[record.llm_model_id] = _ModelMetrics(
+                    record.provider
+                )
+            metrics.calls += 1
+            metrics.retries += record.retries
+            metrics.latency.observe(record.wall_seconds)
+            if record.time_to_first_token is not None:
+                metrics.time_to_first_token.observe(record.time_to_first_token)
+            if record.error is not None:
+                metrics.errors += 1
+            metrics.prompt_tokens += record.prompt_tokens
+            metrics.completion_tokens += record.completion_tokens
+            metrics.cost_usd += record.cost_usd or 0.0
+        self._local.last = record
+
+    def last_record(self) -> Optional[CallRecord]:
+        """
+        The record of the current thread's most recent call.
+        """
+        return getattr(self._local, "last", None)
+
+    def records(self) -> List[CallRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per model totals and latency percentiles, keyed by model id.
+        """
+        with self._lock:
+            return {
+                model_id: {
+                    "provider": metrics.provider,
+                    "calls": metrics.calls,
+                    "errors": metrics.errors,
+                    "retries": metrics.retries,
+                    "prompt_tokens": metrics.prompt_tokens,
+                    "completion_tokens": metrics.completion_tokens,
+                    "cost_usd": metrics.cost_usd,
+                    "latency_p50": metrics.latency.quantile(0.5),
+                    "latency_p95": metrics.latency.quantile(0.95),
+                    "latency_mean": metrics.latency.sum / metrics.latency.count,
+                    "time_to_first_token_p50": metrics.time_to_first_token.quantile(
+                        0.5
+                    ),
+                }
+                for model_id, metrics in self._models.items()
+            }
+
+    def to_json(self, include_records: bool = False) -> str:
+        content: Dict[str, Any] = {"generated_at": time.time(), "models": {}}
+        with self._lock:
+            for model_id, metrics in self._models.items():
+                content["models"][model_id] = {
+                    "latency_buckets": _buckets_json(metrics.latency),
+                    "time_to_first_token_buckets": _buckets_json(
+                        metrics.time_to_first_token
+                    ),
+                }
+            records = list(self._records) if include_records else None
+        for model_id, summary in self.summary().items():
+            content["models"][model_id].update(summary)
+        if records is not None:
+            content["records"] = [record.model_dump() for record in records]
+        return json.dumps(content, indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Render the aggregates in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            models = list(self._models.items())
+            for name, help_text, attr in [
+                ("llm_call_duration_seconds", "Wall time of LLM calls", "latency"),
+                (
+                    "llm_time_to_first_token_seconds",
+                    "Time to the first streamed chunk of LLM calls",
+                    "time_to_first_token",
+                ),
+            ]:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for model_id, metrics in models:
+                    histogram: Histogram = getattr(metrics, attr)
+                    label = _label(model_id)
+                    for bound, total in histogram.cumulative():
+                        le = "+Inf" if bound == math.inf else repr(bound)
+                        lines.append(f'{name}_bucket{{{label},le="{le}"}} {total}')
+                    lines.append(f"{name}_sum{{{label}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label}}} {histogram.count}")
+
+            for name, help_text, attr in [
+                ("llm_calls_total", "LLM calls", "calls"),
+                ("llm_call_errors_total", "Failed LLM calls", "errors"),
+                ("llm_call_retries_total", "Retries of rate limited calls", "retries"),
+                (
+                    "llm_prompt_tokens_total",
+                    "Estimated prompt tokens sent",
+                    "prompt_tokens",
+                ),
+                (
+                    "llm_completion_tokens_total",
+                    "Estimated completion tokens received",
+                    "completion_tokens",
+                ),
+                ("llm_cost_usd_total", "Estimated cost in USD", "cost_usd"),
+            ]:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for model_id, metrics in models:
+                    lines.append(
+                        f"{name}{{{_label(model_id)}}} {getattr(metrics, attr)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._models.clear()
+
+
+def _label(model_id: str) -> str:
+    escaped = model_id.replace("\\", "\\\\").replace('"', '\\"')
+    return f'model="{escaped}"'
+
+
+def _buckets_json(histogram: Histogram) -> List[Dict[str, Any]]:
+    # json has no Infinity, so the +Inf bucket's bound is null
+    return [
+        {"le": None if bound == math.inf else bound, "count": total}
+        for bound, total in histogram.cumulative()
+    ]
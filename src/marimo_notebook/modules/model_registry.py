@@ -0,0 +1,290 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import llm
+from pydantic import BaseModel
+
+from . import fake_model
+
+
+class ModelSpec(BaseModel):
+    name: str
+    llm_model_id: str
+    provider: str
+    key_env: Optional[str] = None
+    # Token limits of the model, None when unknown
+    context_window: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+    # List prices in USD per million tokens, None when unknown
+    input_cost_per_million: Optional[float] = None
+    output_cost_per_million: Optional[float] = None
+
+
+# Every model the notebooks can use, by the name they show it under
+MODEL_REGISTRY: Dict[str, ModelSpec] = {
+    spec.name: spec
+    for spec in [
+        ModelSpec(
+            name="gpt-4o-mini",
+            llm_model_id="gpt-4o-mini",
+            provider="openai",
+            key_env="OPENAI_API_KEY",
+            context_window=128_000,
+            max_output_tokens=16_384,
+            input_cost_per_million=0.15,
+            output_cost_per_million=0.6,
+        ),
+        ModelSpec(
+            name="gpt-4o",
+            llm_model_id="gpt-4o",
+            provider="openai",
+            key_env="OPENAI_API_KEY",
+            context_window=128_000,
+            max_output_tokens=16_384,
+            input_cost_per_million=2.5,
+            output_cost_per_million=10.0,
+        ),
+        ModelSpec(
+            name="gpt-4o-latest",
+            llm_model_id="gpt-4o",
+            provider="openai",
+            key_env="OPENAI_API_KEY",
+            context_window=128_000,
+            max_output_tokens=16_384,
+            input_cost_per_million=2.5,
+            output_cost_per_million=10.0,
+        ),
+        ModelSpec(
+            name="o1-mini",
+            llm_model_id="o1-mini",
+            provider="openai",
+            key_env="OPENAI_API_KEY",
+            context_window=128_000,
+            max_output_tokens=65_536,
+            input_cost_per_million=3.0,
+            output_cost_per_million=12.0,
+        ),
+        ModelSpec(
+            name="o1-preview",
+            llm_model_id="o1-preview",
+            provider="openai",
+            key_env="OPENAI_API_KEY",
+            context_window=128_000,
+            max_output_tokens=32_768,
+            input_cost_per_million=15.0,
+            output_cost_per_million=60.0,
+        ),
+        ModelSpec(
+            name="sonnet-3.5",
+            llm_model_id="claude-3.5-sonnet",
+            provider="anthropic",
+            key_env="ANTHROPIC_API_KEY",
+            context_window=200_000,
+            max_output_tokens=8_192,
+            input_cost_per_million=3.0,
+            output_cost_per_million=15.0,
+        ),
+        ModelSpec(
+            name="gemini-1-5-pro",
+            llm_model_id="gemini-1.5-pro-latest",
+            provider="gemini",
+            key_env="GEMINI_API_KEY",
+            context_window=2_097_152,
+            max_output_tokens=8_192,
+            input_cost_per_million=1.25,
+            output_cost_per_million=5.0,
+        ),
+        ModelSpec(
+            name="gemini-1-5-flash",
+            llm_model_id="gemini-1.5-flash-latest",
+            provider="gemini",
+            key_env="GEMINI_API_KEY",
+            context_window=1_048_576,
+            max_output_tokens=8_192,
+            input_cost_per_million=0.075,
+            output_cost_per_million=0.3,
+        ),
+        ModelSpec(
+            name="gemini-1-5-pro-002",
+            llm_model_id="gemini-1.5-pro-002",
+            provider="gemini",
+            key_env="GEMINI_API_KEY",
+            context_window=2_097_152,
+            max_output_tokens=8_192,
+            input_cost_per_million=1.25,
+            output_cost_per_million=5.0,
+        ),
+        ModelSpec(
+            name="gemini-1-5-flash-002",
+            llm_model_id="gemini-1.5-flash-002",
+            provider="gemini",
+            key_env="GEMINI_API_KEY",
+            context_window=1_048_576,
+            max_output_tokens=8_192,
+            input_cost_per_million=0.075,
+            output_cost_per_million=0.3,
+        ),
+        # Ollama serves every model with a 2048 token context unless num_ctx is
+        # raised, and local calls cost nothing
+        ModelSpec(
+            name="llama3-2",
+            llm_model_id="llama3.2",
+            provider="ollama",
+            context_window=2048,
+            input_cost_per_million=0.0,
+            output_cost_per_million=0.0,
+        ),
+        ModelSpec(
+            name="llama3-2-1b",
+            llm_model_id="llama3.2:1b",
+            provider="ollama",
+            context_window=2048,
+            input_cost_per_million=0.0,
+            output_cost_per_million=0.0,
+        ),
+        ModelSpec(
+            name="phi3-5",
+            llm_model_id="phi3.5:latest",
+            provider="ollama",
+            context_window=2048,
+            input_cost_per_million=0.0,
+            output_cost_per_million=0.0,
+        ),
+        ModelSpec(
+            name="qwen2-5",
+            llm_model_id="qwen2.5:latest",
+            provider="ollama",
+            context_window=2048,
+            input_cost_per_million=0.0,
+            output_cost_per_million=0.0,
+        ),
+        # Offline models for benchmarks and load tests, see fake_model
+        *[
+            ModelSpec(
+                name=model.model_id,
+                llm_model_id=model.model_id,
+                provider="fake",
+                input_cost_per_million=0.0,
+                output_cost_per_million=0.0,
+            )
+            for model in fake_model.FAKE_MODELS
+        ],
+    ]
+}
+
+# Built llm.Model instances, shared by every cell (and notebook) in the process
+_instances: Dict[str, llm.Model] = {}
+_build_seconds: Dict[str, float] = {}
+_llm_models: Optional[Dict[str, llm.Model]] = None
+_lock = threading.RLock()
+
+
+def register_model(spec: ModelSpec):
+    """
+    Add (or replace) a model in the registry. It is not built until first used.
+    """
+    with _lock:
+        MODEL_REGISTRY[spec.name] = spec
+        _instances.pop(spec.name, None)
+
+
+def _resolve_llm_model(llm_model_id: str) -> llm.Model:
+    # llm.get_model runs every plugin's register_models hook (the Ollama plugin
+    # even queries the local server), so resolve all aliases once per process
+    global _llm_models
+    if _llm_models is None:
+        fake_model.register_plugin()
+        _llm_models = llm.get_model_aliases()
+    if llm_model_id not in _llm_models:
+        raise llm.UnknownModelError("Unknown model: " + llm_model_id)
+    return _llm_models[llm_model_id]
+
+
+def get_model(name: str) -> llm.Model:
+    """
+    Get the llm.Model registered under name, building it on first use.
+    """
+    with _lock:
+        if name in _instances:
+            return _instances[name]
+        if name not in MODEL_REGISTRY:
+            raise KeyError(f"Model '{name}' is not in the model registry")
+
+        spec = MODEL_REGISTRY[name]
+        start = time.perf_counter()
+        model = _resolve_llm_model(spec.llm_model_id)
+        if spec.key_env:
+            model.key = os.getenv(spec.key_env)
+        _build_seconds[name] = time.perf_counter() - start
+        _instances[name] = model
+        return model
+
+
+class LazyModel:
+    """
+    Stand-in for a registered model that builds it on first attribute access.
+
+    Notebooks can list every registered model in their UI for free; only the
+    models a user actually runs (model_id, prompt, ...) are ever built.
+    """
+
+    def __init__(self, name: str):
+        if name not in MODEL_REGISTRY:
+            raise KeyError(f"Model '{name}' is not in the model registry")
+        self.name = name
+        self.spec = MODEL_REGISTRY[name]
+
+    def resolve(self) -> llm.Model:
+        return get_model(self.name)
+
+    def __getattr__(self, attr):
+        return getattr(get_model(self.name), attr)
+
+    def __repr__(self):
+        return f"<LazyModel '{self.name}'>"
+
+
+def lazy_models(names: List[str]) -> Dict[str, LazyModel]:
+    """
+    Build a {name: LazyModel} dict, e.g. for mo.ui.multiselect options.
+    """
+    return {name: LazyModel(name) for name in names}
+
+
+def resolve_model(model) -> llm.Model:
+    """
+    Return the underlying llm.Model of a LazyModel, or the model itself.
+    """
+    return model.resolve() if isinstance(model, LazyModel) else model
+
+
+def find_spec(model) -> Optional[ModelSpec]:
+    """
+    Find the registry spec of a LazyModel, an llm.Model or a model name.
+    """
+    if isinstance(model, LazyModel):
+        return model.spec
+    if isinstance(model, str):
+        return MODEL_REGISTRY.get(model)
+    model_id = getattr(model, "model_id", None)
+    for spec in MODEL_REGISTRY.values():
+        if spec.llm_model_id == model_id:
+            return spec
+    return None
+
+
+def registry_stats() -> Dict:
+    """
+    Report which registered models were built and how long building each took.
+
+    Every registered model that is still unbuilt is startup time saved compared
+    to the eager build_* factories.
+    """
+    with _lock:
+        return {
+            "built": dict(_build_seconds),
+            "not_built": [name for name in MODEL_REGISTRY if name not in _instances],
+            "total_build_seconds": sum(_build_seconds.values()),
+        }
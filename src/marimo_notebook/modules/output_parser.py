@@ -0,0 +1,132 @@
+import json
+from typing import Any, Optional
+
+from pydantic import BaseModel, ValidationError
+from .typings import ParsedOutput
+
+FENCE = "```"
+
+
+def parse_output(
+    text: Any, schema: Optional[type] = None, extract_embedded: bool = False
+) -> ParsedOutput:
+    """
+    Parse JSON out of a model response in a single linear scan.
+
+    Tries, in order:
+        1. Fenced markdown blocks (```json or plain ```), first one that parses wins.
+        2. The whole response as JSON.
+        3. If extract_embedded is set, the first balanced {...} or [...] in the text that parses.
+
+    Anything else is returned as text. Nothing here raises on non-JSON responses.
+
+    Args:
+        text (Any): The model response. Non-string values are passed through untouched.
+        schema (Optional[type]): Optional hint for the expected shape: a pydantic model
+            (validated with model_validate) or a plain type such as dict or list.
+        extract_embedded (bool): Also look for JSON embedded in prose. Defaults to False.
+
+    Returns:
+        ParsedOutput: The parsed value, where it came from and any parse or schema error.
+    """
+    if not isinstance(text, str):
+        return _check_schema(ParsedOutput(value=text, source="object"), schema)
+
+    error = None
+
+    for content in _fenced_blocks(text):
+        try:
+            value = json.loads(content)
+        except json.JSONDecodeError as e:
+            error = f"fenced block: {e}"
+            continue
+        return _check_schema(ParsedOutput(value=value, source="fenced"), schema)
+
+    try:
+        value = json.loads(text)
+        return _check_schema(ParsedOutput(value=value, source="json"), schema)
+    except json.JSONDecodeError as e:
+        error = error or f"response: {e}"
+
+    if extract_embedded:
+        for start, end in _balanced_spans(text):
+            try:
+                value = json.loads(text[start:end])
+            except json.JSONDecodeError:
+                continue
+            return _check_schema(ParsedOutput(value=value, source="embedded"), schema)
+
+    return ParsedOutput(value=text, source="text", error=error)
+
+
+def _fenced_blocks(text: str):
+    # Yield the stripped contents of every ``` fenced block tagged json or untagged
+    position = text.find(FENCE)
+    while position != -1:
+        start = position + len(FENCE)
+        end = text.find(FENCE, start)
+        if end == -1:
+            return
+        language_end = start
+        while language_end < end and (
+            text[language_end].isalnum() or text[language_end] in "-_+"
+        ):
+            language_end += 1
+        if language_end == start or text[start:language_end].lower() == "json":
+            yield text[language_end:end].strip()
+        position = text.find(FENCE, end + len(FENCE))
+
+
+def _balanced_spans(text: str):
+    # Yield (start, end) of top-level balanced {...} / [...] spans, skipping over
+    # brackets inside JSON strings. Each character is visited once.
+    depth = 0
+    start = -1
+    in_string = False
+    escaped = False
+    closers = []
+    for i, char in enumerate(text):
+        if depth == 0:
+            if char == "{" or char == "[":
+                depth = 1
+                start = i
+                closers = ["}" if char == "{" else "]"]
+                in_string = False
+                escaped = False
+            continue
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{" or char == "[":
+            depth += 1
+            closers.append("}" if char == "{" else "]")
+        elif char == "}" or char == "]":
+            if char != closers[-1]:
+                # Mismatched bracket, not JSON: start looking again from here
+                depth = 0
+                continue
+            closers.pop()
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1
+
+
+def _check_schema(parsed: ParsedOutput, schema: Optional[type]) -> ParsedOutput:
+    if schema is None:
+        return parsed
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        try:
+            parsed.value = schema.model_validate(parsed.value)
+        except ValidationError as e:
+            parsed.schema_error = str(e)
+    elif not isinstance(parsed.value, schema):
+        parsed.schema_error = (
+            f"expected {schema.__name__}, got {type(parsed.value).__name__}"
+        )
+    return parsed
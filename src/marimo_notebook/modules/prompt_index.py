@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .utils import atomic_write_json, safe_dir_name
+from .typings import PromptEntry
+
+INDEX_VERSION = 1
+
+
+def scan_files(root: str) -> Dict[str, os.stat_result]:
+    """
+    Stat every file under root with os.scandir, keyed by path relative to root.
+    """
+    files = {}
+    # Relative prefixes are carried along, os.path.relpath per file is slow
+    stack = [(root, "")]
+    while stack:
+        current, prefix = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=True):
+                        stack.append((entry.path, prefix + entry.name + os.sep))
+                    elif entry.is_file(follow_symlinks=True):
+                        files[prefix + entry.name] = entry.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            # Removed while scanning
+            continue
+    return files
+
+
+def default_index_path(root: str) -> str:
+    index_dir = os.getenv("PROMPT_INDEX_DIR", "./prompt_index")
+    root = os.path.abspath(root)
+    digest = hashlib.sha256(root.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(
+        index_dir, f"{safe_dir_name(os.path.basename(root))}_{digest}.json"
+    )
+
+
+class PromptIndex(Mapping):
+    """
+    Read-only {relative path: prompt} mapping over a prompt directory whose
+    bodies are only read when accessed.
+
+    refresh() walks the directory with os.scandir and compares each file's size
+    and mtime with the persistent index file; only new or changed files are
+    read (to update their content hash). Listing keys therefore costs one stat
+    per file, and reopening an unchanged library reads no prompt bodies at all.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        index_path: Optional[str] = None,
+        max_cached_bodies: int = 1024,
+    ):
+        self.root = root
+        self.index_path = index_path or default_index_path(root)
+        self.max_cached_bodies = max_cached_bodies
+        # relative path -> (size, mtime_ns, sha256)
+        self._entries: Dict[str, Tuple[int, int, Optional[str]]] = {}
+        self._bodies: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_index()
+        self.refresh()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            # A corrupt index is rebuilt by the next refresh
+            return
+        if content.get("version") != INDEX_VERSION:
+            return
+        self._entries = {
+            path: tuple(entry) for path, entry in content["entries"].items()
+        }
+
+    def save(self):
+        with self._lock:
+            content = {
+                "version": INDEX_VERSION,
+                "root": os.path.abspath(self.root),
+                "entries": self._entries,
+            }
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        atomic_write_json(self.index_path, content)
+
+    def refresh(self) -> Dict[str, List[str]]:
+        """
+        Bring the index up to date with the directory.
+
+        Returns:
+            Dict[str, List[str]]: The "added", "modified" and "removed" relative paths.
+        """
+        files = scan_files(self.root) if os.path.isdir(self.root) else {}
+        changes = {"added": [], "modified": [], "removed": []}
+        with self._lock:
+            for path in list(self._entries):
+                if path not in files:
+                    del self._entries[path]
+                    self._bodies.pop(path, None)
+                    changes["removed"].append(path)
+
+            for path, stat in files.items():
+                entry = self._entries.get(path)
+                if entry is not None and entry[:2] == (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                ):
+                    continue
+                changes["added" if entry is None else "modified"].append(path)
+                self._update(path, stat)
+
+            self._entries = dict(sorted(self._entries.items()))
+
+        if any(changes.values()) or not os.path.exists(self.index_path):
+            self.save()
+        return changes
+
+    def update_paths(self, paths: List[str]) -> Dict[str, List[str]]:
+        """
+        Bring just the given relative paths (files or directories) up to date,
+        e.g. the ones a file watcher reported.
+
+        Returns:
+            Dict[str, List[str]]: The "added", "modified" and "removed" relative paths.
+        """
+        changes = {"added": [], "modified": [], "removed": []}
+        with self._lock:
+            for path in paths:
+                full_path = os.path.join(self.root, path)
+                if os.path.isdir(full_path):
+                    prefix = path + os.sep
+                    files = {
+                        prefix + name: stat
+                        for name, stat in scan_files(full_path).items()
+                    }
+                    # Files that disappeared from the directory meanwhile
+                    for known in [p for p in self._entries if p.startswith(prefix)]:
+                        if known not in files:
+                            files[known] = None
+                else:
+                    try:
+                        files = {path: os.stat(full_path)}
+                    except FileNotFoundError:
+                        # A removed file, or a removed directory and all its files
+                        prefix = path + os.sep
+                        files = {
+                            known: None
+                            for known in self._entries
+                            if known == path or known.startswith(prefix)
+                        }
+
+                for file_path, stat in files.items():
+                    entry = self._entries.get(file_path)
+                    if stat is None:
+                        if entry is not None:
+                            del self._entries[file_path]
+                            self._bodies.pop(file_path, None)
+                            changes["removed"].append(file_path)
+                        continue
+                    if entry is not None and entry[:2] == (
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                    ):
+                        continue
+                    self._bodies.pop(file_path, None)
+                    if self._update(file_path, stat) is not None:
+                        changes["added" if entry is None else "modified"].append(
+                            file_path
+                        )
+                    elif entry is not None:
+                        changes["removed"].append(file_path)
+
+            if changes["added"]:
+                self._entries = dict(sorted(self._entries.items()))
+
+        if any(changes.values()):
+            self.save()
+        return changes
+
+    def _update(self, path: str, stat: os.stat_result) -> Optional[str]:
+        try:
+            body = self._read(path)
+        except FileNotFoundError:
+            self._entries.pop(path, None)
+            return None
+        self._entries[path] = (
+            stat.st_size,
+            stat.st_mtime_ns,
+            hashlib.sha256(body.encode("utf-8")).hexdigest(),
+        )
+        self._remember(path, body)
+        return body
+
+    def _read(self, path: str) -> str:
+        with open(os.path.join(self.root, path), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _remember(self, path: str, body: str):
+        self._bodies[path] = body
+        self._bodies.move_to_end(path)
+        while len(self._bodies) > self.max_cached_bodies:
+            self._bodies.popitem(last=False)
+
+    def entry(self, path: str) -> PromptEntry:
+        with self._lock:
+            size, mtime_ns, sha256 = self._entries[path]
+        return PromptEntry(
+            relative_path=path, size=size, mtime_ns=mtime_ns, sha256=sha256
+        )
+
+    def __getitem__(self, path: str) -> str:
+        with self._lock:
+            if path not in self._entries:
+                raise KeyError(path)
+            body = self._bodies.get(path)
+            if body is not None:
+                self._bodies.move_to_end(path)
+                return body
+            body = self._read(path)
+            self._remember(path, body)
+            return body
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path) -> bool:
+        return path in self._entries
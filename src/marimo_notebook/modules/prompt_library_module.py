@@ -1,9 +1,24 @@
 import os
 import json
+import atexit
+import threading
+import concurrent.futures
 from datetime import datetime
-from typing import List
+from typing import Dict, Iterator, List, Optional
 from dotenv import load_dotenv
-from src.marimo_notebook.modules.typings import ModelRanking, MultiLLMPromptExecution
+from src.marimo_notebook.modules.typings import (
+    ExecutionRecord,
+    ModelRanking,
+    MultiLLMPromptExecution,
+)
+from src.marimo_notebook.modules.execution_store import (
+    ExecutionStore,
+    new_execution_id,
+    open_execution_store,
+)
+from src.marimo_notebook.modules.prompt_index import PromptIndex, scan_files
+from src.marimo_notebook.modules.search_index import SearchIndex
+from src.marimo_notebook.modules.watcher import PromptWatcher
 
 load_dotenv()
 
@@ -28,22 +43,205 @@ def pull_in_dir_recursively(dir: str) -> dict:
     return result
 
 
-def pull_in_prompt_library():
+# Byte order marks, checked longest first
+_BOMS = [
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xff\xfe", "utf-16"),
+    (b"\xfe\xff", "utf-16"),
+]
+
+
+def _decode(data: bytes, encoding: Optional[str]) -> str:
+    if encoding is not None:
+        return data.decode(encoding)
+    for bom, bom_encoding in _BOMS:
+        if data.startswith(bom):
+            return data.decode(bom_encoding)
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        # cp1252 leaves a few bytes undefined, latin-1 decodes anything
+        try:
+            return data.decode("cp1252")
+        except UnicodeDecodeError:
+            return data.decode("latin-1")
+
+
+def decode_prompt(data: bytes, encoding: Optional[str] = None) -> str:
+    """
+    Decode a prompt file: the given encoding, else a BOM's, else UTF-8, else cp1252.
+
+    Newlines (CRLF, CR) are normalized to LF, like files read in text mode.
+    """
+    return _decode(data, encoding).replace("\r\n", "\n").replace("\r", "\n")
+
+
+def pull_in_dir_parallel(
+    dir: str,
+    num_workers: int = 16,
+    max_file_bytes: Optional[int] = None,
+    encoding: Optional[str] = None,
+    skipped: Optional[Dict[str, str]] = None,
+) -> dict:
+    """
+    Parallel version of pull_in_dir_recursively for large or remote prompt corpora.
+
+    Walks the directory iteratively with os.scandir and reads the files on a
+    thread pool, so the per-file latency of network filesystems overlaps.
+
+    Args:
+    dir (str): The directory to read.
+    num_workers (int): Number of files read at once. Default is 16.
+    max_file_bytes (Optional[int]): Skip files larger than this. Default is no limit.
+    encoding (Optional[str]): Encoding of the files. Default is detecting it per file.
+    skipped (Optional[Dict[str, str]]): Filled with {relative path: reason} of skipped files.
+
+    Returns:
+    dict: {relative path: file content}, like pull_in_dir_recursively.
+    """
+    if not os.path.exists(dir):
+        return {}
+
+    paths = []
+    for relative_path, stat in scan_files(dir).items():
+        if max_file_bytes is not None and stat.st_size > max_file_bytes:
+            if skipped is not None:
+                skipped[relative_path] = f"larger than {max_file_bytes} bytes"
+            continue
+        paths.append(relative_path)
+
+    def read(batch):
+        contents = []
+        for relative_path in batch:
+            try:
+                with open(os.path.join(dir, relative_path), "rb") as f:
+                    contents.append(decode_prompt(f.read(), encoding))
+            except (OSError, UnicodeDecodeError) as e:
+                if skipped is None:
+                    raise
+                contents.append(e)
+        return contents
+
+    # Files are read in batches, a future per file costs more than a cached read
+    batch_size = max(1, min(64, len(paths) // (num_workers * 4)))
+    batches = [paths[i : i + batch_size] for i in range(0, len(paths), batch_size)]
+    result = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for batch, contents in zip(batches, executor.map(read, batches)):
+            for relative_path, content in zip(batch, contents):
+                if isinstance(content, Exception):
+                    skipped[relative_path] = str(content)
+                else:
+                    result[relative_path] = content
+    return result
+
+
+def pull_in_prompt_library() -> PromptIndex:
+    """
+    Index the prompt library; prompt bodies are read on first access.
+    """
     prompt_library_dir = os.getenv("PROMPT_LIBRARY_DIR", "./prompt_library")
-    return pull_in_dir_recursively(prompt_library_dir)
+    return PromptIndex(prompt_library_dir)
 
 
-def pull_in_testable_prompts():
+def pull_in_testable_prompts() -> PromptIndex:
+    """
+    Index the testable prompts; prompt bodies are read on first access.
+    """
     testable_prompts_dir = os.getenv("TESTABLE_PROMPTS_DIR", "./testable_prompts")
-    return pull_in_dir_recursively(testable_prompts_dir)
+    return PromptIndex(testable_prompts_dir)
+
+
+def build_search_index(prompts: PromptIndex, trigrams: bool = False) -> SearchIndex:
+    """
+    Open the full-text search index over an indexed prompt directory's names and bodies.
+
+    The index is saved next to the directory's PromptIndex file, so only prompts
+    added or changed since the last time (by content hash) are read and indexed.
+
+    Args:
+    prompts (PromptIndex): From pull_in_prompt_library or pull_in_testable_prompts.
+    trigrams (bool): Also match terms inside words. Default is False.
+
+    Returns:
+    SearchIndex: Pass it to watch_prompts to keep it up to date.
+    """
+    # Trigrams are rebuilt from the saved terms, the file is the same either way
+    search_index_path = os.path.splitext(prompts.index_path)[0] + ".search.json"
+    search_index = SearchIndex.open(search_index_path, trigrams=trigrams)
+    search_index.sync(prompts)
+    return search_index
+
+
+# The running watcher per prompt directory, see watch_prompts
+_watchers: Dict[str, PromptWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def watch_prompts(
+    prompts: PromptIndex,
+    on_change=None,
+    search_index: Optional[SearchIndex] = None,
+) -> PromptWatcher:
+    """
+    Keep an indexed prompt directory (and its search index) in sync with edits on disk, in the background.
+
+    Only one watcher runs per directory: watching it again (e.g. when a notebook
+    cell re-runs) stops the previous watcher and its thread first.
+    """
+    if search_index is not None:
+        user_on_change = on_change
+
+        def on_change(changes):
+            search_index.apply_changes(changes, prompts)
+            if user_on_change is not None:
+                user_on_change(changes)
+
+    key = os.path.abspath(prompts.root)
+    with _watchers_lock:
+        previous = _watchers.pop(key, None)
+        if previous is not None:
+            previous.stop()
+        watcher = _watchers[key] = PromptWatcher(prompts, on_change=on_change).start()
+    return watcher
+
+
+def stop_watching_prompts():
+    """
+    Stop every watcher started by watch_prompts.
+    """
+    with _watchers_lock:
+        watchers = list(_watchers.values())
+        _watchers.clear()
+    for watcher in watchers:
+        watcher.stop()
+
+
+_execution_store: Optional[ExecutionStore] = None
+
+
+def get_execution_store() -> ExecutionStore:
+    """
+    The execution store record_llm_execution writes to (see EXECUTION_STORE in .env.sample).
+    """
+    global _execution_store
+    if _execution_store is None:
+        _execution_store = open_execution_store()
+        # Buffered records are written when the notebook exits
+        atexit.register(_execution_store.close)
+    return _execution_store
 
 
 def record_llm_execution(
     prompt: str, list_model_execution_dict: list, prompt_template: str = None
 ):
-    execution_dir = os.getenv("PROMPT_EXECUTIONS_DIR", "./prompt_executions")
-    os.makedirs(execution_dir, exist_ok=True)
+    """
+    Append a prompt run to the execution store. It is buffered and written within
+    a second, or when the notebook exits (see ExecutionStore).
 
+    Returns:
+    str: The execution's id, e.g. to find it with iter_llm_executions.
+    """
     if prompt_template:
         filename_base = prompt_template.replace(" ", "_").lower()
     else:
@@ -54,20 +252,35 @@ def record_llm_execution(
         char for char in filename_base if char.isalnum() or char == "_"
     )
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{filename_base}_{timestamp}.json"
-    filepath = os.path.join(execution_dir, filename)
-
-    execution_record = MultiLLMPromptExecution(
-        prompt=prompt,
-        prompt_template=prompt_template,
-        prompt_responses=list_model_execution_dict,
+    now = datetime.now()
+    execution_record = ExecutionRecord(
+        id=new_execution_id(now),
+        name=filename_base,
+        created_at=now,
+        execution=MultiLLMPromptExecution(
+            prompt=prompt,
+            prompt_template=prompt_template,
+            prompt_responses=list_model_execution_dict,
+        ),
     )
 
-    with open(filepath, "w") as f:
-        json.dump(execution_record.model_dump(), f, indent=2)
+    return get_execution_store().append(execution_record)
+
+
+def iter_llm_executions(
+    name: Optional[str] = None, since: Optional[datetime] = None
+) -> Iterator[ExecutionRecord]:
+    """
+    Read recorded executions back, oldest first.
+
+    Args:
+    name (Optional[str]): Only executions of this prompt template (as cleaned up by record_llm_execution).
+    since (Optional[datetime]): Only executions recorded at or after this time.
 
-    return filepath
+    Returns:
+    Iterator[ExecutionRecord]: The matching executions.
+    """
+    return get_execution_store().iterate(name=name, since=since)
 
 
 def get_rankings():
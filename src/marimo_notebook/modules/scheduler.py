@@ -0,0 +1,115 @@
+import concurrent.futures
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+
+class TaskScheduler:
+    """
+    Runs the tasks of several dependency graphs on one shared worker pool.
+
+    Each group (e.g. one model's prompt chain) is a list of tasks where task i
+    depends on the task indices in graph[i]. Workers pull any ready task across
+    all groups, so a slow group only ever holds the workers its ready tasks need.
+
+    Ready tasks are handed out round-robin across groups (fair sharing), and a
+    group never has more than its limit of tasks running at once.
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 8,
+        group_limits: Optional[Dict[Hashable, int]] = None,
+        default_group_limit: Optional[int] = None,
+    ):
+        self.num_workers = num_workers
+        self.group_limits = group_limits or {}
+        self.default_group_limit = default_group_limit
+
+    def _limit(self, group: Hashable) -> int:
+        limit = self.group_limits.get(group, self.default_group_limit)
+        return limit if limit is not None else self.num_workers
+
+    def iter_groups(
+        self,
+        graphs: Dict[Hashable, List[List[int]]],
+        execute: Callable[[Hashable, int], Any],
+    ) -> Iterator[Tuple[Hashable, List[Any]]]:
+        """
+        Run every task and yield (group, results) as soon as all of a group's tasks are done.
+
+        Args:
+            graphs (Dict[Hashable, List[List[int]]]): For each group, the dependencies of each of its tasks.
+            execute (Callable[[Hashable, int], Any]): Runs task `index` of `group` and returns its result.
+                Called only after every task it depends on has finished.
+
+        Yields:
+            Tuple[Hashable, List[Any]]: A finished group and its results, in task order.
+        """
+        results = {group: [None] * len(graph) for group, graph in graphs.items()}
+        remaining = {
+            group: [set(deps) for deps in graph] for group, graph in graphs.items()
+        }
+        dependents = {}
+        for group, graph in graphs.items():
+            dependents[group] = [[] for _ in graph]
+            for index, deps in enumerate(graph):
+                for dep in deps:
+                    dependents[group][dep].append(index)
+
+        ready = {
+            group: deque(index for index, deps in enumerate(graph) if not deps)
+            for group, graph in graphs.items()
+        }
+        unfinished = {group: len(graph) for group, graph in graphs.items()}
+        running = {group: 0 for group in graphs}
+        rotation = deque(graphs)
+
+        for group, count in unfinished.items():
+            if count == 0:
+                yield group, []
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.num_workers)
+        future_to_task = {}
+        try:
+            while True:
+                # Fill free workers, one ready task per group per round
+                while len(future_to_task) < self.num_workers:
+                    task = self._next_task(rotation, ready, running)
+                    if task is None:
+                        break
+                    group, index = task
+                    running[group] += 1
+                    future_to_task[executor.submit(execute, group, index)] = task
+
+                if not future_to_task:
+                    return
+
+                done, _ = concurrent.futures.wait(
+                    future_to_task, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    group, index = future_to_task.pop(future)
+                    running[group] -= 1
+                    results[group][index] = future.result()
+                    for dependent in dependents[group][index]:
+                        remaining[group][dependent].discard(index)
+                        if not remaining[group][dependent]:
+                            ready[group].append(dependent)
+                    unfinished[group] -= 1
+                    if unfinished[group] == 0:
+                        yield group, results[group]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _next_task(
+        self,
+        rotation: deque,
+        ready: Dict[Hashable, deque],
+        running: Dict[Hashable, int],
+    ) -> Optional[Tuple[Hashable, int]]:
+        for _ in range(len(rotation)):
+            group = rotation[0]
+            rotation.rotate(-1)
+            if ready[group] and running[group] < self._limit(group):
+                return group, ready[group].popleft()
+        return None
@@ -0,0 +1,258 @@
+import bisect
+import heapq
+import json
+import os
+import re
+import threading
+from collections import Counter
+from collections.abc import Mapping
+from typing import Dict, List, Optional, Set
+
+from .utils import atomic_write_json
+
+SEARCH_INDEX_VERSION = 1
+
+# A term in a prompt's name counts as much as this many occurrences in its body
+NAME_WEIGHT = 10
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase alphanumeric terms.
+    """
+    return _TOKEN.findall(text.lower())
+
+
+def term_trigrams(term: str) -> Set[str]:
+    return {term[i : i + 3] for i in range(len(term) - 2)}
+
+
+class SearchIndex:
+    """
+    In-process inverted index over prompt names (relative paths) and bodies.
+
+    Every query term must match; the last one also matches as a prefix, so
+    results narrow while typing. With trigrams=True each term of 3 or more
+    characters matches anywhere inside indexed terms ("mmar" finds "summarize")
+    through a trigram index of the vocabulary. Results are ranked by how often
+    the terms occur, with matches in the name first.
+
+    update(), remove() and apply_changes() keep it in sync incrementally, e.g.
+    from a PromptWatcher's on_change (see prompt_library_module.watch_prompts).
+    With a path, every document's term weights and content hash are saved
+    there, so sync() against a PromptIndex only reads new or changed prompts.
+    """
+
+    def __init__(self, trigrams: bool = False, path: Optional[str] = None):
+        self.trigrams = trigrams
+        self.path = path
+        # term -> {path: weight}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # path -> its term weights, to remove, replace or save a document
+        self._documents: Dict[str, Dict[str, int]] = {}
+        # path -> sha256 of the indexed body, when known
+        self._hashes: Dict[str, Optional[str]] = {}
+        # trigram -> terms containing it
+        self._trigrams: Dict[str, Set[str]] = {}
+        # Sorted terms for prefix matching, rebuilt on the first search after a change
+        self._vocabulary: Optional[List[str]] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_prompts(cls, prompts: Mapping, trigrams: bool = False) -> "SearchIndex":
+        index = cls(trigrams=trigrams)
+        for path, body in prompts.items():
+            index.update(path, body)
+        return index
+
+    @classmethod
+    def open(cls, path: str, trigrams: bool = False) -> "SearchIndex":
+        """
+        Load the index saved at path, or start an empty one saving there.
+        """
+        index = cls(trigrams=trigrams, path=path)
+        try:
+            with open(path, "r") as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            # Missing or corrupt, rebuilt by the next sync
+            return index
+        if content.get("version") != SEARCH_INDEX_VERSION:
+            return index
+        for document, (sha256, weights) in content["documents"].items():
+            index._add(document, weights, sha256)
+        return index
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            content = {
+                "version": SEARCH_INDEX_VERSION,
+                "documents": {
+                    path: [self._hashes.get(path), weights]
+                    for path, weights in self._documents.items()
+                },
+            }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        atomic_write_json(self.path, content)
+
+    def sync(self, prompts) -> int:
+        """
+        Bring the index up to date with a PromptIndex, reading only the prompts
+        whose content hash differs from the indexed one, and save it if anything changed.
+
+        Returns:
+            int: The number of documents added, re-indexed or removed.
+        """
+        changed = 0
+        for path in [path for path in self._documents if path not in prompts]:
+            self.remove(path)
+            changed += 1
+        for path in prompts:
+            sha256 = prompts.entry(path).sha256
+            if sha256 is not None and self._hashes.get(path) == sha256:
+                continue
+            try:
+                self.update(path, prompts[path], sha256)
+            except (KeyError, FileNotFoundError):
+                self.remove(path)
+            changed += 1
+        if changed:
+            self.save()
+        return changed
+
+    def update(self, path: str, body: str, sha256: Optional[str] = None):
+        """
+        Index (or re-index) a prompt.
+        """
+        weights = Counter(tokenize(body))
+        for term in tokenize(path):
+            weights[term] += NAME_WEIGHT
+        self._add(path, weights, sha256)
+
+    def _add(self, path: str, weights: Dict[str, int], sha256: Optional[str]):
+        with self._lock:
+            self._remove(path)
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._vocabulary = None
+                    if self.trigrams:
+                        for trigram in term_trigrams(term):
+                            self._trigrams.setdefault(trigram, set()).add(term)
+                postings[path] = weight
+            self._documents[path] = dict(weights)
+            self._hashes[path] = sha256
+
+    def remove(self, path: str):
+        with self._lock:
+            self._remove(path)
+
+    def _remove(self, path: str):
+        self._hashes.pop(path, None)
+        for term in self._documents.pop(path, {}):
+            postings = self._postings[term]
+            del postings[path]
+            if postings:
+                continue
+            del self._postings[term]
+            self._vocabulary = None
+            if self.trigrams:
+                for trigram in term_trigrams(term):
+                    terms = self._trigrams[trigram]
+                    terms.discard(term)
+                    if not terms:
+                        del self._trigrams[trigram]
+
+    def apply_changes(self, changes: Dict[str, List[str]], prompts: Mapping):
+        """
+        Apply a PromptIndex / PromptWatcher delta, reading changed bodies from prompts,
+        and save the index.
+        """
+        for path in changes["removed"]:
+            self.remove(path)
+        for path in changes["added"] + changes["modified"]:
+            try:
+                entry = getattr(prompts, "entry", None)
+                self.update(path, prompts[path], entry(path).sha256 if entry else None)
+            except (KeyError, FileNotFoundError):
+                # Removed again since the delta was produced
+                self.remove(path)
+        if any(changes.values()):
+            self.save()
+
+    def _matching_terms(self, token: str, prefix: bool) -> List[str]:
+        if self.trigrams and len(token) >= 3:
+            candidates = None
+            for trigram in term_trigrams(token):
+                terms = self._trigrams.get(trigram)
+                if not terms:
+                    return []
+                candidates = terms if candidates is None else candidates & terms
+            return [term for term in candidates if token in term]
+        if not prefix:
+            return [token] if token in self._postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, token)
+        end = bisect.bisect_left(self._vocabulary, token + "\uffff", start)
+        return self._vocabulary[start:end]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Find the prompts matching every term of query.
+
+        Args:
+            query (str): Free text, e.g. what has been typed into a search box so far.
+            limit (Optional[int]): Return at most this many paths. Default is all.
+
+        Returns:
+            List[str]: Matching prompt paths, best match first.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            scores: Optional[Dict[str, int]] = None
+            for position, token in enumerate(tokens):
+                token_scores: Dict[str, int] = {}
+                for term in self._matching_terms(
+                    token, prefix=position == len(tokens) - 1
+                ):
+                    for path, weight in self._postings[term].items():
+                        token_scores[path] = token_scores.get(path, 0) + weight
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        path: score + token_scores[path]
+                        for path, score in scores.items()
+                        if path in token_scores
+                    }
+                if not scores:
+                    return []
+
+        def rank(path):
+            return (-scores[path], path)
+
+        if limit is not None:
+            return heapq.nsmallest(limit, scores, key=rank)
+        return sorted(scores, key=rank)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "terms": len(self._postings),
+                "trigrams": len(self._trigrams),
+            }
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, path) -> bool:
+        return path in self._documents
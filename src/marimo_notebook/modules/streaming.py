@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from .typings import StreamMetrics
+
+# Rough characters per token, used to estimate throughput from streamed text
+CHARS_PER_TOKEN = 4
+
+
+def _build_metrics(
+    model_id: str,
+    start: float,
+    first_token_at: Optional[float],
+    end: float,
+    chunks: List[str],
+) -> StreamMetrics:
+    output_chars = sum(len(chunk) for chunk in chunks)
+    output_tokens = max(1, round(output_chars / CHARS_PER_TOKEN)) if chunks else 0
+    total_seconds = end - start
+    time_to_first_token = None if first_token_at is None else first_token_at - start
+    # Throughput is measured over generation, i.e. after the first token arrived
+    generation_seconds = total_seconds - (time_to_first_token or 0)
+    tokens_per_second = (
+        output_tokens / generation_seconds if generation_seconds > 0 else None
+    )
+    return StreamMetrics(
+        llm_model_id=model_id,
+        time_to_first_token=time_to_first_token,
+        total_seconds=total_seconds,
+        chunk_count=len(chunks),
+        output_chars=output_chars,
+        output_tokens_estimate=output_tokens,
+        tokens_per_second=tokens_per_second,
+    )
+
+
+class PromptStream:
+    """
+    A streamed model response: iterate over it to get text chunks as they arrive.
+
+    Once iteration finishes, `metrics` holds the time to first token, total time
+    and tokens/sec of the call, text() returns the full response and
+    on_complete, if given, is called with the finished stream.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        prompt: str,
+        options: Dict[str, Any],
+        on_complete: Optional[Callable[["PromptStream"], None]] = None,
+    ):
+        self.model = model
+        self.prompt = prompt
+        self.options = options
+        self.on_complete = on_complete
+        self.chunks: List[str] = []
+        self.metrics: Optional[StreamMetrics] = None
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        first_token_at = None
+        response = self.model.prompt(self.prompt, stream=True, **self.options)
+        for chunk in response:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            self.chunks.append(chunk)
+            yield chunk
+        self.metrics = _build_metrics(
+            self.model.model_id,
+            start,
+            first_token_at,
+            time.perf_counter(),
+            self.chunks,
+        )
+        if self.on_complete is not None:
+            self.on_complete(self)
+
+    def text(self) -> str:
+        if self.metrics is None:
+            for _ in self:
+                pass
+        return "".join(self.chunks)
+
+
+class AsyncPromptStream:
+    """
+    Async version of PromptStream: `async for chunk in stream`.
+
+    Uses the model's native async implementation when one is given, otherwise
+    streams the blocking response in a worker thread and hands chunks over to
+    the event loop as they arrive.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        prompt: str,
+        options: Dict[str, Any],
+        async_model: Optional[Any] = None,
+        on_complete: Optional[Callable[["AsyncPromptStream"], None]] = None,
+    ):
+        self.model = model
+        self.prompt = prompt
+        self.options = options
+        self.async_model = async_model
+        self.on_complete = on_complete
+        self.chunks: List[str] = []
+        self.metrics: Optional[StreamMetrics] = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        first_token_at = None
+        async for chunk in self._chunks():
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            self.chunks.append(chunk)
+            yield chunk
+        self.metrics = _build_metrics(
+            self.model.model_id,
+            start,
+            first_token_at,
+            time.perf_counter(),
+            self.chunks,
+        )
+        if self.on_complete is not None:
+            self.on_complete(self)
+
+    async def _chunks(self) -> AsyncIterator[str]:
+        if self.async_model is not None:
+            response = self.async_model.prompt(self.prompt, stream=True, **self.options)
+            async for chunk in response:
+                yield chunk
+            return
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                response = self.model.prompt(self.prompt, stream=True, **self.options)
+                for chunk in response:
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = loop.run_in_executor(None, produce)
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await producer
+
+    async def text(self) -> str:
+        if self.metrics is None:
+            async for _ in self:
+                pass
+        return "".join(self.chunks)
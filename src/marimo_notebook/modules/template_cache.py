@@ -0,0 +1,133 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from mako.template import Template
+
+
+class TemplateCache:
+    """
+    LRU cache of compiled Mako templates, keyed by a hash of their source.
+
+    Building a Template lexes, parses and compiles the source to a Python module;
+    with the cache that happens once per distinct template instead of per render.
+
+    With a module_directory the compiled modules are also written to disk, so a
+    new process (e.g. a restarted notebook) imports them instead of recompiling.
+    Mako only does this for file based templates, so the source is written next
+    to its module as <hash>.mako. At most max_disk_entries templates are kept on
+    disk; the least recently used ones (tracked by marker files in access/, so
+    the sources and modules keep their mtimes) are pruned beyond that.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        module_directory: Optional[str] = None,
+        max_disk_entries: int = 1024,
+    ):
+        self.max_entries = max_entries
+        self.module_directory = module_directory
+        self.max_disk_entries = max_disk_entries
+        self._templates: "OrderedDict[str, Template]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(source: str) -> str:
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def get(self, source: str) -> Template:
+        """
+        Get the compiled template for source, compiling it on a miss.
+        """
+        key = self.make_key(source)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        # Compile outside the lock; a concurrent miss on the same source just compiles twice
+        template = self._compile(key, source)
+        with self._lock:
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+        return template
+
+    def render(self, source: str, context: Dict[str, Any]) -> str:
+        return self.get(source).render(**context)
+
+    def _compile(self, key: str, source: str) -> Template:
+        if self.module_directory is None:
+            return Template(source)
+
+        source_dir = os.path.join(self.module_directory, "sources")
+        access_dir = os.path.join(self.module_directory, "access")
+        os.makedirs(source_dir, exist_ok=True)
+        os.makedirs(access_dir, exist_ok=True)
+        source_path = os.path.join(source_dir, f"{key}.mako")
+        if not os.path.exists(source_path):
+            # Atomic, so a concurrent compile never reads a half written source
+            tmp_path = f"{source_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(source)
+            os.replace(tmp_path, source_path)
+        # Mark it as recently used for pruning. Not on the source itself: Mako
+        # recompiles a module whenever its source is newer than it.
+        access_path = os.path.join(access_dir, key)
+        if os.path.exists(access_path):
+            os.utime(access_path)
+        else:
+            open(access_path, "w").close()
+            self._prune(access_dir)
+        return Template(
+            filename=source_path,
+            module_directory=self.module_directory,
+            uri=f"{key}.mako",
+            input_encoding="utf-8",
+        )
+
+    def _prune(self, access_dir: str):
+        accessed = []
+        with os.scandir(access_dir) as entries:
+            for entry in entries:
+                try:
+                    accessed.append((entry.stat().st_mtime, entry.name))
+                except FileNotFoundError:
+                    continue
+        if len(accessed) <= self.max_disk_entries:
+            return
+        accessed.sort()
+        for _, key in accessed[: len(accessed) - self.max_disk_entries]:
+            # The source, Mako's compiled module (and its bytecode, if any) and
+            # the access marker last, so an interrupted prune is retried
+            for path in (
+                os.path.join(self.module_directory, "sources", f"{key}.mako"),
+                os.path.join(self.module_directory, f"{key}.mako.py"),
+                os.path.join(self.module_directory, f"{key}.mako.pyc"),
+                os.path.join(access_dir, key),
+            ):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._templates),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
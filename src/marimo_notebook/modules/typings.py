@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, ConfigDict
 from typing import List, Dict, Optional, Union, Any
 
@@ -8,6 +9,65 @@ class FusionChainResult(BaseModel):
     all_context_filled_prompts: List[List[str]]
     performance_scores: List[float]
     llm_model_names: List[str]
+    unfinished_llm_model_names: List[str] = []
+
+
+class FusionChainModelResult(BaseModel):
+    index: int
+    llm_model_name: str
+    prompt_responses: List[Any]
+    context_filled_prompts: List[str]
+
+
+class ParsedOutput(BaseModel):
+    value: Any
+    source: str
+    error: Optional[str] = None
+    schema_error: Optional[str] = None
+
+
+class StreamMetrics(BaseModel):
+    llm_model_id: str
+    time_to_first_token: Optional[float]
+    total_seconds: float
+    chunk_count: int
+    output_chars: int
+    output_tokens_estimate: int
+    tokens_per_second: Optional[float]
+
+
+class ContextBudget(BaseModel):
+    llm_model_id: str
+    prompt_tokens: int
+    max_prompt_tokens: Optional[int]
+    fits: bool
+
+
+class CallRecord(BaseModel):
+    llm_model_id: str
+    provider: Optional[str] = None
+    started_at: float
+    wall_seconds: float
+    time_to_first_token: Optional[float] = None
+    prompt_tokens: int
+    completion_tokens: int
+    retries: int = 0
+    cost_usd: Optional[float] = None
+    error: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    custom_id: str
+    llm_model_id: str
+    prompt: str
+    params: Dict[str, Any] = {}
+
+
+class PromptEntry(BaseModel):
+    relative_path: str
+    size: int
+    mtime_ns: int
+    sha256: Optional[str] = None
 
 
 class MultiLLMPromptExecution(BaseModel):
@@ -16,6 +76,13 @@ class MultiLLMPromptExecution(BaseModel):
     prompt_template: Optional[str] = None
 
 
+class ExecutionRecord(BaseModel):
+    id: str
+    name: str
+    created_at: datetime
+    execution: MultiLLMPromptExecution
+
+
 class ModelRanking(BaseModel):
     llm_model_id: str
     score: int
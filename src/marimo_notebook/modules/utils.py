@@ -1,7 +1,8 @@
 import datetime
 import json
 import os
-from typing import Union, Dict, List
+import threading
+from typing import Any, Union, Dict, List
 
 OUTPUT_DIR = "output"
 
@@ -30,6 +31,23 @@ def to_json_file_pretty(name: str, content: Union[Dict, List]):
         json.dump(content, outfile, indent=2, default=default_serializer)
 
 
+def atomic_write_json(path: str, content: Any):
+    """
+    Write content as JSON to path so readers see either the old or the new file, never a partial one.
+    """
+    # Unique per writer, so concurrent writers of the same path cannot collide
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(content, f, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def safe_dir_name(name: str) -> str:
+    return "".join(char if char.isalnum() or char in "-_." else "_" for char in name)
+
+
 def current_date_time_str() -> str:
     return datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
@@ -0,0 +1,222 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .prompt_index import PromptIndex
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+Changes = Dict[str, List[str]]
+
+
+class _Inotify:
+    """
+    Minimal ctypes binding of Linux inotify, watching a directory tree.
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> directory, relative to the watched root ("" for the root)
+        self.directories: Dict[int, str] = {}
+
+    def watch_tree(self, root: str, relative_dir: str = ""):
+        stack = [relative_dir]
+        while stack:
+            current = stack.pop()
+            path = os.path.join(root, current) if current else root
+            wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                # Removed before it could be watched; its delete event covers it
+                continue
+            self.directories[wd] = current
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(os.path.join(current, entry.name))
+            except FileNotFoundError:
+                continue
+
+    def read_events(self) -> List[tuple]:
+        """
+        Read the pending events as (mask, directory, name) tuples.
+        """
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+                continue
+            events.append((mask, self.directories.get(wd), os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _merge_changes(pending: Dict[str, str], changes: Changes):
+    # Fold a new delta into the pending kind per path, so e.g. a file added
+    # and removed before anyone looked is not reported at all
+    for kind in ("removed", "added", "modified"):
+        for path in changes[kind]:
+            previous = pending.get(path)
+            if kind == "removed":
+                if previous == "added":
+                    del pending[path]
+                else:
+                    pending[path] = "removed"
+            elif kind == "added":
+                pending[path] = "modified" if previous == "removed" else "added"
+            elif previous != "added":
+                pending[path] = "modified"
+
+
+class PromptWatcher:
+    """
+    Keeps a PromptIndex in sync with its directory from a background thread.
+
+    On Linux it uses inotify, re-reading only the files events name; elsewhere
+    (or if inotify is unavailable) it polls with PromptIndex.refresh(). Every
+    applied delta is passed to on_change and also queued for drain(), which is
+    how a marimo notebook picks them up (see the ranker notebook).
+    """
+
+    def __init__(
+        self,
+        index: PromptIndex,
+        on_change: Optional[Callable[[Changes], None]] = None,
+        poll_interval: float = 1.0,
+        debounce: float = 0.05,
+        use_inotify: bool = True,
+    ):
+        self.index = index
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.backend: Optional[str] = None
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "PromptWatcher":
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify()
+                inotify.watch_tree(self.index.root)
+            except (OSError, AttributeError):
+                inotify = None
+        self.backend = "inotify" if inotify else "polling"
+        target = self._run_inotify if inotify else self._run_polling
+        args = (inotify,) if inotify else ()
+        self._thread = threading.Thread(target=target, args=args, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def drain(self) -> Changes:
+        """
+        Take the changes applied since the last drain.
+
+        Returns:
+            Changes: The "added", "modified" and "removed" relative paths.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        changes = {"added": [], "modified": [], "removed": []}
+        for path, kind in sorted(pending.items()):
+            changes[kind].append(path)
+        return changes
+
+    def _publish(self, changes: Changes):
+        if not any(changes.values()):
+            return
+        with self._lock:
+            _merge_changes(self._pending, changes)
+        if self.on_change is not None:
+            self.on_change(changes)
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            self._publish(self.index.refresh())
+
+    def _run_inotify(self, inotify: _Inotify):
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([inotify.fd], [], [], 0.5)
+                if not readable:
+                    continue
+                # Collect a burst of events (editors write files in several steps)
+                events = inotify.read_events()
+                while select.select([inotify.fd], [], [], self.debounce)[0]:
+                    events.extend(inotify.read_events())
+                self._publish(self._apply(inotify, events))
+        finally:
+            inotify.close()
+
+    def _apply(self, inotify: _Inotify, events: List[tuple]) -> Changes:
+        if any(mask & IN_Q_OVERFLOW for mask, _, _ in events):
+            # Events were lost, fall back to a full rescan
+            return self.index.refresh()
+
+        paths = []
+        for mask, directory, name in events:
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name) if directory else name
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                inotify.watch_tree(self.index.root, path)
+            if path not in paths:
+                paths.append(path)
+        return self.index.update_paths(paths)
@@ -0,0 +1,76 @@
+import os
+
+import llm
+import pytest
+
+from src.marimo_notebook.modules import llm_module
+from src.marimo_notebook.modules.batch import (
+    BatchRunner,
+    LocalBatchServer,
+    OpenAIBatchBackend,
+)
+
+
+def make_runner(server, **kwargs):
+    return BatchRunner(server, poll_interval=0.01, **kwargs)
+
+
+def test_local_server_answers_every_request(tmp_path):
+    runner = make_runner(LocalBatchServer(batch_dir=str(tmp_path)))
+    first = runner.add("model-a", "one")
+    second = runner.add("model-b", "two")
+
+    assert len(runner.run()) == 2
+    assert first.result() == "[model-a] one"
+    assert second.result() == "[model-b] two"
+
+
+def test_a_batch_the_local_server_cannot_process_fails_instead_of_hanging(tmp_path):
+    server = LocalBatchServer(batch_dir=str(tmp_path), processing_delay=0.2)
+    runner = make_runner(server, timeout=None)
+    future = runner.add("model-a", "one")
+
+    def submit_and_lose_input(requests):
+        batch_id = LocalBatchServer.submit(server, requests)
+        os.remove(server._path(batch_id, "input"))
+        return batch_id
+
+    server.submit = submit_and_lose_input
+    (batch_id,) = runner.run()
+
+    assert server.status(batch_id) == "failed"
+    assert "FileNotFoundError" in server.errors[batch_id]
+    with pytest.raises(RuntimeError, match="ended 'failed'"):
+        future.result()
+
+
+def test_unfinished_batches_time_out(tmp_path):
+    runner = make_runner(
+        LocalBatchServer(batch_dir=str(tmp_path), processing_delay=5), timeout=0.05
+    )
+    future = runner.add("model-a", "one")
+    runner.run()
+    with pytest.raises(TimeoutError):
+        future.result()
+
+
+def test_openai_backend_rejects_other_providers(tmp_path):
+    runner = make_runner(OpenAIBatchBackend(client=object(), batch_dir=str(tmp_path)))
+    assert runner.accepts("openai")
+    with pytest.raises(ValueError, match="cannot batch anthropic"):
+        runner.add("claude-3-5-sonnet", "one", provider="anthropic")
+
+
+def test_models_the_backend_cannot_batch_are_called_directly(tmp_path):
+    runner = make_runner(
+        LocalBatchServer(batch_dir=str(tmp_path), providers={"openai"})
+    )
+    openai_model = llm.get_model("gpt-4o-mini")
+    fake_model = llm_module.get_model("fake-instant")
+
+    batched, direct = llm_module.prompt_with_temp_batch(
+        [(openai_model, "one"), (fake_model, "two")], runner=runner
+    )
+
+    assert batched.result() == "[gpt-4o-mini] one"
+    assert direct.result() == fake_model.respond("two")
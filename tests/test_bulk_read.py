@@ -0,0 +1,38 @@
+from src.marimo_notebook.modules.prompt_library_module import (
+    decode_prompt,
+    pull_in_dir_parallel,
+    pull_in_dir_recursively,
+)
+
+
+def test_parallel_reader_matches_the_recursive_reader(tmp_path):
+    (tmp_path / "nested" / "deeper").mkdir(parents=True)
+    (tmp_path / "lf.xml").write_bytes(b"a\nb\n")
+    (tmp_path / "nested" / "crlf.xml").write_bytes(b"a\r\nb\r\n")
+    (tmp_path / "nested" / "deeper" / "cr.xml").write_bytes(b"a\rb\r")
+    (tmp_path / "utf8.md").write_bytes("café\r\n".encode("utf-8"))
+
+    parallel = pull_in_dir_parallel(str(tmp_path), num_workers=2)
+
+    assert parallel == pull_in_dir_recursively(str(tmp_path))
+    assert parallel["nested/crlf.xml"] == "a\nb\n"
+
+
+def test_encodings_are_detected():
+    assert decode_prompt("﻿café".encode("utf-8")) == "café"
+    assert decode_prompt("café\r\n".encode("utf-16")) == "café\n"
+    assert decode_prompt("café €".encode("cp1252")) == "café €"
+    assert decode_prompt(b"\x81\x8d") == "\x81\x8d"
+    assert decode_prompt("café".encode("latin-1"), encoding="latin-1") == "café"
+
+
+def test_large_files_are_skipped_and_dangling_links_ignored(tmp_path):
+    (tmp_path / "small.xml").write_text("small")
+    (tmp_path / "large.xml").write_text("x" * 100)
+    (tmp_path / "dangling.xml").symlink_to(tmp_path / "missing.xml")
+    skipped = {}
+
+    prompts = pull_in_dir_parallel(str(tmp_path), max_file_bytes=50, skipped=skipped)
+
+    assert prompts == {"small.xml": "small"}
+    assert skipped == {"large.xml": "larger than 50 bytes"}
@@ -0,0 +1,69 @@
+import pytest
+
+from src.marimo_notebook.modules.chain import MinimalChainable, callable_cache_key
+from src.marimo_notebook.modules.response_cache import ResponseCache
+
+
+def upper_callable(model, prompt):
+    return prompt.upper()
+
+
+def test_lambdas_sharing_a_model_and_prompt_do_not_share_cached_results():
+    cache = ResponseCache()
+    with pytest.warns(UserWarning, match="Not caching"):
+        first, _ = MinimalChainable.run({}, "m", lambda m, p: "first", ["x"], cache)
+    with pytest.warns(UserWarning, match="Not caching"):
+        second, _ = MinimalChainable.run({}, "m", lambda m, p: "second", ["x"], cache)
+    assert (first, second) == (["first"], ["second"])
+
+
+def test_closures_are_not_cacheable_without_an_explicit_key():
+    def make(suffix):
+        def call(model, prompt):
+            return prompt + suffix
+
+        return call
+
+    assert callable_cache_key(make("a")) is None
+    keyed = make("a")
+    keyed.cache_key = "suffix-a"
+    assert callable_cache_key(keyed) == "suffix-a"
+
+
+def test_keyed_callables_are_cached_and_functions_keyed_by_name():
+    cache = ResponseCache()
+    calls = []
+
+    def counting(model, prompt):
+        calls.append(prompt)
+        return prompt
+
+    counting.cache_key = "counting"
+    for _ in range(2):
+        MinimalChainable.run({}, "m", counting, ["x"], cache)
+    assert calls == ["x"]
+    assert callable_cache_key(upper_callable).startswith(f"{__name__}.upper_callable:")
+
+
+def define_call(source):
+    namespace = {"__name__": "prompts"}
+    exec(source, namespace)
+    return namespace["call"]
+
+
+@pytest.mark.parametrize(
+    "edited",
+    [
+        'def call(model, prompt):\n    return prompt + "be terse"\n',
+        'def call(model, prompt):\n    return [p + "be terse" for p in [prompt]][0]\n',
+        'def call(model, prompt, system="be terse"):\n    return prompt + system\n',
+        'def call(model, prompt, *, system="be terse"):\n    return prompt + system\n',
+    ],
+)
+def test_editing_a_constant_or_default_changes_the_key(edited):
+    original = edited.replace("be terse", "be verbose")
+    before, after = define_call(original), define_call(edited)
+
+    assert before.__qualname__ == after.__qualname__ == "call"
+    assert callable_cache_key(before) != callable_cache_key(after)
+    assert callable_cache_key(after) == callable_cache_key(define_call(edited))
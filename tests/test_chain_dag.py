@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from src.marimo_notebook.modules.chain import MinimalChainable
+from src.marimo_notebook.modules.fake_model import FakeLatency, FakeModel
+
+INSTANT = FakeLatency(
+    distribution="constant", median_seconds=0.0, tokens_per_second=1e9
+)
+
+PROMPTS = [
+    "Summarize {{topic}}",
+    "List facts about {{topic}}",
+    "Combine {{output[-2]}} with {{output[-1]}}",
+    "Shorten {{output[-1]}}",
+]
+
+
+def call(model, prompt):
+    return model.prompt(prompt).text()
+
+
+def test_dependency_graph_follows_output_references():
+    assert MinimalChainable.dependency_graph(PROMPTS) == [[], [], [0, 1], [2]]
+
+
+def test_results_are_in_prompt_order_and_match_a_sequential_run():
+    model = FakeModel("fake-dag", latency=INSTANT)
+    context = {"topic": "caches"}
+
+    assert MinimalChainable.run_dag(
+        context, model, call, PROMPTS
+    ) == MinimalChainable.run(context, model, call, PROMPTS)
+
+
+def test_independent_prompts_run_concurrently():
+    # The first two calls each wait until the other one is in flight too
+    barrier = threading.Barrier(2, timeout=5)
+    started = []
+    lock = threading.Lock()
+
+    def sleep(seconds):
+        with lock:
+            started.append(seconds)
+            gated = len(started) <= 2
+        if gated:
+            barrier.wait()
+
+    model = FakeModel("fake-dag", latency=INSTANT, sleep=sleep)
+    outputs, _ = MinimalChainable.run_dag({"topic": "caches"}, model, call, PROMPTS)
+
+    assert len(outputs) == 4
+    assert model.calls == 4
+
+
+def test_a_failing_step_fails_the_chain():
+    model = FakeModel("fake-dag", latency=INSTANT, error_rate=1.0)
+    with pytest.raises(Exception, match="internal error"):
+        MinimalChainable.run_dag({"topic": "caches"}, model, call, PROMPTS)
@@ -0,0 +1,59 @@
+import threading
+
+from src.marimo_notebook.modules.chain import FusionChain
+from src.marimo_notebook.modules.fake_model import FakeLatency, FakeModel
+
+INSTANT = FakeLatency(
+    distribution="constant", median_seconds=0.0, tokens_per_second=1e9
+)
+PROMPTS = ["Answer {{question}}", "Shorten {{output[-1]}}"]
+CONTEXT = {"question": "why?"}
+
+
+def call(model, prompt):
+    return model.prompt(prompt).text()
+
+
+def model_name(model):
+    return model.model_id
+
+
+def evaluator(outputs):
+    return outputs[0], [1.0 / (index + 1) for index in range(len(outputs))]
+
+
+def gated_model(model_id: str, gate: threading.Event) -> FakeModel:
+    return FakeModel(model_id, latency=INSTANT, sleep=lambda seconds: gate.wait(5))
+
+
+def test_iter_parallel_yields_in_completion_order_tagged_with_the_model_index():
+    gate = threading.Event()
+    models = [gated_model("slow", gate), FakeModel("fast", latency=INSTANT)]
+
+    stream = FusionChain.iter_parallel(CONTEXT, models, call, PROMPTS, model_name)
+    first = next(stream)
+    gate.set()
+    second = next(stream)
+
+    assert (first.index, first.llm_model_name) == (1, "fast")
+    assert (second.index, second.llm_model_name) == (0, "slow")
+
+
+def test_run_parallel_matches_run_despite_completion_order():
+    gate = threading.Event()
+    models = [gated_model("slow", gate), FakeModel("fast", latency=INSTANT)]
+
+    def call_and_release(model, prompt):
+        result = call(model, prompt)
+        if model.model_id == "fast" and prompt.startswith("Shorten"):
+            gate.set()
+        return result
+
+    call_and_release.cache_key = "call_and_release"
+    parallel = FusionChain.run_parallel(
+        CONTEXT, models, call_and_release, PROMPTS, evaluator, model_name
+    )
+    sequential = FusionChain.run(CONTEXT, models, call, PROMPTS, evaluator, model_name)
+
+    assert parallel == sequential
+    assert parallel.llm_model_names == ["slow", "fast"]
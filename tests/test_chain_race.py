@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+from src.marimo_notebook.modules.chain import (
+    ChainStopped,
+    FusionChain,
+    MinimalChainable,
+)
+from src.marimo_notebook.modules.fake_model import FakeLatency, FakeModel
+
+INSTANT = FakeLatency(
+    distribution="constant", median_seconds=0.0, tokens_per_second=1e9
+)
+PROMPTS = ["Answer {{question}}", "Check {{output[-1]}}", "Shorten {{output[-1]}}"]
+CONTEXT = {"question": "why?"}
+
+
+def call(model, prompt):
+    return model.prompt(prompt).text()
+
+
+def model_name(model):
+    return model.model_id
+
+
+def evaluator(outputs):
+    return outputs[0], [1.0] * len(outputs)
+
+
+def accept_all(output):
+    return True
+
+
+def test_the_first_accepted_chain_wins_and_losers_stop_calling(monkeypatch):
+    gate = threading.Event()
+    slow = FakeModel("slow", latency=INSTANT, sleep=lambda seconds: gate.wait(5))
+    fast = FakeModel("fast", latency=INSTANT)
+
+    # Record how each chain ended, to know when the abandoned one is done
+    run = MinimalChainable.run
+    ended = {}
+    slow_ended = threading.Event()
+
+    def recording_run(context, model, *args):
+        try:
+            return run(context, model, *args)
+        except Exception as e:
+            ended[model.model_id] = e
+            raise
+        finally:
+            if model is slow:
+                slow_ended.set()
+
+    monkeypatch.setattr(MinimalChainable, "run", recording_run)
+    result = FusionChain.run_race(
+        CONTEXT, [slow, fast], call, PROMPTS, accept_all, evaluator, model_name
+    )
+
+    assert result.top_response == result.all_prompt_responses[1][-1]
+    assert fast.calls == 3
+    assert result.unfinished_llm_model_names == ["slow"]
+    assert result.all_prompt_responses[0] == []
+    assert result.performance_scores == [0.0, 1.0]
+
+    # The call slow had in flight finishes, but its chain makes no further calls
+    gate.set()
+    assert slow_ended.wait(5)
+    assert isinstance(ended["slow"], ChainStopped)
+    assert slow.calls == 1
+
+
+def test_without_an_accepted_output_every_model_finishes():
+    models = [FakeModel("a", latency=INSTANT), FakeModel("b", latency=INSTANT)]
+    result = FusionChain.run_race(
+        CONTEXT, models, call, PROMPTS, lambda output: False, evaluator, model_name
+    )
+
+    assert result == FusionChain.run(
+        CONTEXT, models, call, PROMPTS, evaluator, model_name
+    )
+    assert result.unfinished_llm_model_names == []
+
+
+def test_run_race_async_cancels_the_losing_chains():
+    fast = FakeModel("fast", latency=INSTANT)
+    slow = FakeModel("slow", latency=INSTANT)
+    cancelled = []
+
+    async def async_call(model, prompt):
+        if model is slow:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(prompt)
+                raise
+        return call(model, prompt)
+
+    async def race():
+        result = await FusionChain.run_race_async(
+            CONTEXT,
+            [slow, fast],
+            async_call,
+            PROMPTS,
+            accept_all,
+            evaluator,
+            model_name,
+        )
+        # Let the cancellation reach the losing task
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return result
+
+    result = asyncio.run(race())
+
+    assert result.llm_model_names == ["slow", "fast"]
+    assert result.unfinished_llm_model_names == ["slow"]
+    assert cancelled == ["Answer why?"]
+    assert slow.calls == 0
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from src.marimo_notebook.modules.chain import FusionChain, MinimalChainable
+from src.marimo_notebook.modules.fake_model import FakeLatency, FakeModel
+
+INSTANT = FakeLatency(
+    distribution="constant", median_seconds=0.0, tokens_per_second=1e9
+)
+PROMPTS = ["Plan {{task}}", "Draft {{output[-1]}}", "Review {{output[-1]}}"]
+CONTEXT = {"task": "a release"}
+
+failing_prompts = set()
+
+
+def call(model, prompt):
+    if prompt.split(" ")[0] in failing_prompts:
+        raise TimeoutError(prompt)
+    return model.prompt(prompt).text()
+
+
+def model_name(model):
+    return model.model_id
+
+
+def evaluator(outputs):
+    return outputs[0], [1.0] * len(outputs)
+
+
+@pytest.fixture(autouse=True)
+def no_failures():
+    failing_prompts.clear()
+    yield
+    failing_prompts.clear()
+
+
+def test_resume_after_a_partial_run_only_calls_the_remaining_steps(tmp_path):
+    model = FakeModel("fake-checkpoint", latency=INSTANT)
+    failing_prompts.add("Review")
+    with pytest.raises(TimeoutError):
+        MinimalChainable.resume(str(tmp_path), CONTEXT, model, call, PROMPTS)
+    assert sorted(os.listdir(tmp_path)) == [
+        "manifest.json",
+        "step_000.json",
+        "step_001.json",
+    ]
+    assert model.calls == 2
+
+    failing_prompts.clear()
+    resumed = MinimalChainable.resume(str(tmp_path), CONTEXT, model, call, PROMPTS)
+
+    assert model.calls == 3
+    assert resumed == MinimalChainable.run(CONTEXT, model, call, PROMPTS)
+
+
+def test_a_finished_competition_is_loaded_without_calls(tmp_path):
+    models = [FakeModel("a", latency=INSTANT), FakeModel("b", latency=INSTANT)]
+    first = FusionChain.resume(
+        str(tmp_path), CONTEXT, models, call, PROMPTS, evaluator, model_name
+    )
+    calls = [model.calls for model in models]
+
+    again = FusionChain.resume(
+        str(tmp_path), CONTEXT, models, call, PROMPTS, evaluator, model_name
+    )
+
+    assert again == first
+    assert [model.calls for model in models] == calls
+    assert sorted(os.listdir(tmp_path)) == ["00_a", "01_b"]
+
+
+def test_a_checkpoint_is_not_reused_for_a_different_context(tmp_path):
+    model = FakeModel("fake-checkpoint", latency=INSTANT)
+    MinimalChainable.resume(str(tmp_path), CONTEXT, model, call, PROMPTS)
+    with pytest.raises(ValueError, match="different context or prompts"):
+        MinimalChainable.resume(
+            str(tmp_path), {"task": "a rollback"}, model, call, PROMPTS
+        )
@@ -0,0 +1,41 @@
+import pytest
+
+from benchmarks.template_fill_benchmark import compiled_fill, legacy_fill
+
+CONTEXT = {"a": "X", "b": "Y"}
+
+
+@pytest.mark.parametrize(
+    "prompt, expected",
+    [
+        ("{{a}}", "X"),
+        ("{{{a}}}", "{X}"),
+        ("{{{{a}}}}", "{{X}}"),
+        ("{{a}}}", "X}"),
+        ("{{{a}}", "{X"),
+        ("{{a}}{{{b}}}", "X{Y}"),
+        ('{"key": "{{a}}"}', '{"key": "X"}'),
+        ('{"key": {{{a}}}}', '{"key": {X}}'),
+        ("{{missing}} {{}} {{ {a} }}", "{{missing}} {{}} {{ {a} }}"),
+    ],
+)
+def test_brace_adjacent_placeholders_fill_like_str_replace(prompt, expected):
+    assert legacy_fill(CONTEXT, [prompt], []) == [expected]
+    assert compiled_fill(CONTEXT, [prompt], []) == [expected]
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "{{{output[-1]}}}",
+        "{{{output[-1].summary}}}",
+        "{{{{output[-2]}}}} and {{output[-1].missing}}",
+        "{{output[-3]}} {{{a}}}",
+    ],
+)
+def test_brace_adjacent_output_references_fill_like_str_replace(prompt):
+    prompts = ["first", "second", prompt]
+    outputs = ["plain text", {"summary": "S", "n": 1}, None]
+    assert compiled_fill(CONTEXT, prompts, outputs) == legacy_fill(
+        CONTEXT, prompts, outputs
+    )
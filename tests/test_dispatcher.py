@@ -0,0 +1,135 @@
+import pytest
+
+from src.marimo_notebook.modules.dispatcher import (
+    Dispatcher,
+    RateLimit,
+    is_rate_limit_error,
+)
+from src.marimo_notebook.modules.fake_model import (
+    FakeLatency,
+    FakeModel,
+    FakeModelError,
+    FakeRateLimitError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_dispatcher(clock, **kwargs):
+    kwargs.setdefault("provider_limits", {})
+    return Dispatcher(clock=clock, sleep=clock.sleep, rng=lambda: 0.5, **kwargs)
+
+
+def flaky_model(**kwargs):
+    return FakeModel(
+        "fake-test",
+        latency=FakeLatency(distribution="constant", median_seconds=0.0),
+        sleep=lambda seconds: None,
+        **kwargs,
+    )
+
+
+def test_retries_fake_provider_rate_limits_until_success():
+    clock = FakeClock()
+    dispatcher = make_dispatcher(clock, max_retries=20)
+    model = flaky_model(rate_limit_rate=0.5, retry_after=None, seed=3)
+
+    text = dispatcher.call(lambda: model.prompt("hello").text(), "fake", "fake-test")
+
+    assert text == model.respond("hello")
+    assert model.calls > 1
+    assert dispatcher.stats()["retries"] == model.calls - 1
+    assert dispatcher.last_call_retries() == model.calls - 1
+    # Jittered exponential backoff: rng 0.5 of 1, 2, 4, ... seconds
+    assert clock.sleeps == [0.5 * 2**attempt for attempt in range(model.calls - 1)]
+
+
+def test_gives_up_after_max_retries():
+    clock = FakeClock()
+    dispatcher = make_dispatcher(clock, max_retries=3)
+    model = flaky_model(rate_limit_rate=1.0, retry_after=None)
+
+    with pytest.raises(FakeRateLimitError):
+        dispatcher.call(lambda: model.prompt("hello").text(), "fake", "fake-test")
+    assert model.calls == 4
+
+
+def test_retry_after_without_a_provider_bucket_sleeps_that_long():
+    clock = FakeClock()
+    dispatcher = make_dispatcher(clock)
+    errors = [FakeRateLimitError("slow down", retry_after=7.0)]
+
+    def call():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert dispatcher.call(call, "fake", "fake-test") == "ok"
+    assert clock.sleeps == [7.0]
+
+
+def test_retry_after_pauses_the_provider_bucket_instead_of_sleeping_twice():
+    clock = FakeClock()
+    dispatcher = make_dispatcher(
+        clock, provider_limits={"fake": RateLimit(requests_per_minute=60)}
+    )
+    errors = [FakeRateLimitError("slow down", retry_after=5.0)]
+
+    def call():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert dispatcher.call(call, "fake", "fake-test") == "ok"
+    # The retry waited for the paused bucket only: 5 seconds plus one request's refill
+    assert sum(clock.sleeps) == pytest.approx(6.0)
+
+
+def test_other_errors_are_not_retried_even_if_their_message_mentions_429():
+    clock = FakeClock()
+    dispatcher = make_dispatcher(clock)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise FakeModelError("Prompt of 4290 tokens failed, see issue #429")
+
+    with pytest.raises(FakeModelError):
+        dispatcher.call(call, "fake", "fake-test")
+    assert calls == [1]
+    assert clock.sleeps == []
+
+
+def test_rate_limit_errors_are_recognized_by_status_type_and_cause():
+    class RateLimitError(Exception):
+        pass
+
+    class Response:
+        status_code = 429
+
+    class HTTPStatusError(Exception):
+        response = Response()
+
+    assert is_rate_limit_error(FakeRateLimitError("x"))
+    assert is_rate_limit_error(RateLimitError("quota"))
+    assert is_rate_limit_error(HTTPStatusError("x"))
+    try:
+        try:
+            raise RateLimitError("quota")
+        except RateLimitError as e:
+            raise RuntimeError("model call failed") from e
+    except RuntimeError as wrapped:
+        assert is_rate_limit_error(wrapped)
+    assert not is_rate_limit_error(Exception("429 Too Many Requests"))
+    assert not is_rate_limit_error(FakeModelError("internal", status_code=500))
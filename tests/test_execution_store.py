@@ -0,0 +1,147 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from src.marimo_notebook.modules import prompt_library_module
+from src.marimo_notebook.modules.execution_store import (
+    ExecutionStore,
+    JsonFileExecutionStore,
+    JsonlExecutionStore,
+    SqliteExecutionStore,
+    new_execution_id,
+    open_execution_store,
+)
+from src.marimo_notebook.modules.typings import (
+    ExecutionRecord,
+    MultiLLMPromptExecution,
+)
+
+
+def record(prompt: str, name: str = "test") -> ExecutionRecord:
+    now = datetime.now()
+    return ExecutionRecord(
+        id=new_execution_id(now),
+        name=name,
+        created_at=now,
+        execution=MultiLLMPromptExecution(prompt=prompt, prompt_responses=[]),
+    )
+
+
+def prompts(store) -> list:
+    return [stored.execution.prompt for stored in store.iterate()]
+
+
+STORES = [
+    JsonFileExecutionStore,
+    JsonlExecutionStore,
+    lambda directory: SqliteExecutionStore(os.path.join(directory, "db.sqlite")),
+]
+
+
+@pytest.mark.parametrize("make_store", STORES, ids=["json", "jsonl", "sqlite"])
+def test_records_are_read_back_in_id_order_and_filtered(tmp_path, make_store):
+    store = make_store(str(tmp_path))
+    ids = [store.append(record(f"p{i}", "even" if i % 2 else "odd")) for i in range(5)]
+
+    assert len(set(ids)) == 5
+    assert prompts(store) == [f"p{i}" for i in range(5)]
+    assert [r.id for r in store.iterate(name="even")] == ids[1::2]
+    assert list(store.iterate(since=datetime(2999, 1, 1))) == []
+    store.close()
+
+
+def test_json_files_are_read_in_id_order_not_mtime_order(tmp_path):
+    store = JsonFileExecutionStore(str(tmp_path))
+    first, second = record("first"), record("second")
+    store.append(first)
+    store.append(second)
+    os.utime(store.file_path(first), (2_000_000, 2_000_000))
+    os.utime(store.file_path(second), (1_000_000, 1_000_000))
+
+    assert prompts(store) == ["first", "second"]
+
+
+def test_stores_must_implement_write_and_read():
+    with pytest.raises(TypeError):
+        ExecutionStore()
+
+
+def test_a_torn_member_only_loses_its_own_batch(tmp_path):
+    store = JsonlExecutionStore(str(tmp_path), flush_interval=0)
+    store.append(record("n1"))
+    store.append(record("n2"))
+    (segment,) = store.segments()
+    with open(segment, "rb+") as f:
+        f.truncate(os.path.getsize(segment) - 5)
+
+    reopened = JsonlExecutionStore(str(tmp_path), flush_interval=0)
+    reopened.append(record("n3"))
+    reopened.append(record("n4"))
+
+    assert prompts(reopened) == ["n1", "n3", "n4"]
+    # New batches went to a new segment, not after the torn member
+    assert len(reopened.segments()) == 2
+
+
+def test_a_torn_member_in_the_middle_of_a_segment_is_skipped(tmp_path):
+    store = JsonlExecutionStore(str(tmp_path), flush_interval=0)
+    store.append(record("n1"))
+    store.append(record("n2"))
+    (segment,) = store.segments()
+    with open(segment, "rb+") as f:
+        f.truncate(os.path.getsize(segment) - 5)
+    # A batch appended after the torn one, as an older version of the store did
+    with open(segment, "ab") as f:
+        other = JsonlExecutionStore(str(tmp_path / "other"), flush_interval=0)
+        other.append(record("n3"))
+        with open(other.segments()[0], "rb") as member:
+            f.write(member.read())
+
+    assert prompts(JsonlExecutionStore(str(tmp_path))) == ["n1", "n3"]
+
+
+def test_failed_writes_keep_the_batch_buffered(tmp_path):
+    store = JsonlExecutionStore(str(tmp_path / "blocked"), max_batch=2)
+    # A file where the store's directory should be makes the write fail
+    (tmp_path / "blocked").write_text("")
+    store.append(record("n1"))
+    with pytest.raises(OSError):
+        store.append(record("n2"))
+
+    os.remove(tmp_path / "blocked")
+    store.flush()
+    assert prompts(store) == ["n1", "n2"]
+
+
+@pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+def test_one_file_per_run_history_is_migrated_once(tmp_path, backend):
+    with open(tmp_path / "hello_20240101_120000.json", "w") as f:
+        json.dump({"prompt": "old", "prompt_responses": []}, f)
+
+    store = open_execution_store(backend, str(tmp_path))
+    store.append(record("new"))
+    store.close()
+
+    assert os.listdir(tmp_path / "migrated") == ["hello_20240101_120000.json"]
+    assert not (tmp_path / "hello_20240101_120000.json").exists()
+    reopened = open_execution_store(backend, str(tmp_path))
+    assert prompts(reopened) == ["old", "new"]
+    migrated = next(reopened.iterate())
+    assert (migrated.id, migrated.name) == ("20240101_120000", "hello")
+    reopened.close()
+
+
+def test_record_llm_execution_returns_the_id(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMPT_EXECUTIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(prompt_library_module, "_execution_store", None)
+
+    execution_id = prompt_library_module.record_llm_execution(
+        "Hello world", [{"llm_model_id": "fake", "output": "hi"}], "My Template"
+    )
+
+    (stored,) = prompt_library_module.iter_llm_executions(name="my_template")
+    assert stored.id == execution_id
+    assert stored.execution.prompt == "Hello world"
+    prompt_library_module.get_execution_store().close()
@@ -0,0 +1,59 @@
+import llm
+import pytest
+
+from src.marimo_notebook.modules.fake_model import (
+    FakeLatency,
+    FakeModel,
+    FakeModelError,
+    FakeRateLimitError,
+    register_plugin,
+)
+from src.marimo_notebook.modules.output_parser import parse_output
+
+INSTANT = FakeLatency(distribution="constant", median_seconds=0.0)
+
+
+def test_responses_are_deterministic_per_model_prompt_and_seed():
+    model = FakeModel("fake-a", latency=INSTANT)
+    assert model.prompt("hello").text() == model.prompt("hello").text()
+    assert model.respond("hello") != model.respond("bye")
+    assert model.respond("hello") != FakeModel("fake-b").respond("hello")
+    assert model.respond("hello", seed=1) != model.respond("hello", seed=2)
+
+
+def test_streaming_yields_the_same_text_in_chunks():
+    model = FakeModel("fake-a", latency=INSTANT, sleep=lambda seconds: None)
+    chunks = list(model.prompt("hello", stream=True))
+    assert len(chunks) > 1
+    assert "".join(chunks) == model.respond("hello")
+
+
+def test_json_markdown_output_parses_as_json():
+    model = FakeModel("fake-json", latency=INSTANT, output_format="json_markdown")
+    value = parse_output(model.prompt("hello").text()).value
+    assert value["model"] == "fake-json"
+
+
+def test_errors_and_rate_limits_are_injected():
+    always_limited = FakeModel("f", latency=INSTANT, rate_limit_rate=1.0)
+    with pytest.raises(FakeRateLimitError) as raised:
+        always_limited.prompt("hello").text()
+    assert raised.value.status_code == 429
+    assert raised.value.retry_after == 1.0
+
+    always_failing = FakeModel("f", latency=INSTANT, error_rate=1.0)
+    with pytest.raises(FakeModelError) as raised:
+        always_failing.prompt("hello").text()
+    assert raised.value.status_code == 500
+
+
+def test_latency_is_sampled_from_the_seeded_distribution():
+    latency = FakeLatency(distribution="uniform", min_seconds=0.1, max_seconds=0.2)
+    samples = [FakeModel(latency=latency, seed=7).sample_latency() for _ in range(2)]
+    assert samples[0] == samples[1]
+    assert 0.1 <= samples[0] <= 0.2
+
+
+def test_fake_models_are_registered_with_llm():
+    register_plugin()
+    assert isinstance(llm.get_model("fake-instant"), FakeModel)
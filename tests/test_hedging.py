@@ -0,0 +1,106 @@
+import threading
+import time
+
+from src.marimo_notebook.modules.fake_model import FakeLatency, FakeModel
+from src.marimo_notebook.modules.hedging import HedgePolicy, Hedger
+
+INSTANT = FakeLatency(
+    distribution="constant", median_seconds=0.0, tokens_per_second=1e9
+)
+# Hedge anything slower than 10ms, from the first call
+EAGER = HedgePolicy(initial_delay=0.01, max_hedge_rate=1.0)
+
+
+def gated_model(model_id: str, gate: threading.Event) -> FakeModel:
+    return FakeModel(model_id, latency=INSTANT, sleep=lambda seconds: gate.wait(5))
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_a_fast_call_is_not_hedged():
+    primary = FakeModel("primary", latency=INSTANT)
+    fallback = FakeModel("fallback", latency=INSTANT)
+    hedger = Hedger(HedgePolicy(initial_delay=5.0))
+
+    text = hedger.call(
+        "primary",
+        lambda: primary.prompt("hi").text(),
+        lambda: fallback.prompt("hi").text(),
+    )
+
+    assert text == primary.respond("hi")
+    assert fallback.calls == 0
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_a_slow_call_is_hedged_and_the_hedge_wins():
+    gate = threading.Event()
+    primary = gated_model("primary", gate)
+    fallback = FakeModel("fallback", latency=INSTANT)
+    hedger = Hedger(EAGER)
+
+    text = hedger.call(
+        "primary",
+        lambda: primary.prompt("hi").text(),
+        lambda: fallback.prompt("hi").text(),
+    )
+
+    # Returned without waiting for the primary, which is still in flight
+    assert primary.calls == 0
+    assert text == fallback.respond("hi")
+    assert hedger.stats()["hedge_wins"] == 1
+    gate.set()
+
+
+def test_a_failed_primary_falls_back_to_the_hedge():
+    primary_gate, fallback_gate = threading.Event(), threading.Event()
+    primary = FakeModel(
+        "primary", latency=INSTANT, error_rate=1.0, sleep=lambda s: primary_gate.wait(5)
+    )
+    fallback = gated_model("fallback", fallback_gate)
+    hedger = Hedger(EAGER)
+
+    def release():
+        # Fail the primary after the hedge was sent, then let the hedge answer
+        wait_for(lambda: hedger.stats()["hedged"] == 1)
+        primary_gate.set()
+        wait_for(lambda: primary.calls == 1)
+        fallback_gate.set()
+
+    releaser = threading.Thread(target=release)
+    releaser.start()
+    text = hedger.call(
+        "primary",
+        lambda: primary.prompt("hi").text(),
+        lambda: fallback.prompt("hi").text(),
+    )
+    releaser.join(5)
+
+    assert text == fallback.respond("hi")
+    assert hedger.stats()["hedge_wins"] == 1
+
+
+def test_hedges_are_capped_to_a_fraction_of_recent_calls():
+    hedger = Hedger(HedgePolicy(initial_delay=0.0, max_hedge_rate=0.0))
+    model = FakeModel("primary", latency=INSTANT, sleep=lambda s: time.sleep(0.01))
+
+    for _ in range(3):
+        hedger.call("primary", lambda: model.prompt("hi").text())
+
+    stats = hedger.stats()
+    assert (stats["hedged"], stats["rate_capped"]) == (1, 2)
+
+
+def test_the_hedge_delay_is_the_latency_percentile():
+    hedger = Hedger(HedgePolicy(percentile=0.9, min_samples=10))
+    for millis in range(1, 10):
+        hedger._observe("m", millis / 1000)
+    assert hedger.hedge_delay("m") is None
+
+    hedger._observe("m", 0.010)
+    assert hedger.hedge_delay("m") == 0.010
@@ -0,0 +1,88 @@
+import json
+
+from src.marimo_notebook.modules.chain import FusionChain
+
+
+def call(model, prompt):
+    return f"{model}: {prompt}"
+
+
+def evaluator(outputs):
+    return outputs[0], [1.0] * len(outputs)
+
+
+def run_many(contexts, sink_path):
+    return FusionChain.run_many(
+        contexts,
+        ["a", "b"],
+        call,
+        ["Hello {{name}}"],
+        evaluator,
+        str,
+        str(sink_path),
+    )
+
+
+def contexts(count):
+    return ({"name": f"n{index}"} for index in range(count))
+
+
+def test_results_are_streamed_to_the_sink_and_read_back(tmp_path):
+    sink = tmp_path / "out" / "sweep.jsonl"
+
+    assert run_many(contexts(5), sink) == 5
+
+    results = dict(FusionChain.read_many(str(sink)))
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    assert results[3].top_response == "a: Hello n3"
+
+
+def test_a_rerun_skips_finished_contexts_and_retries_errors(tmp_path):
+    sink = tmp_path / "sweep.jsonl"
+    calls = []
+    failing = {"Hello n1"}
+
+    def flaky(model, prompt):
+        calls.append(prompt)
+        if prompt in failing:
+            raise ValueError("boom")
+        return call(model, prompt)
+
+    flaky.cache_key = "flaky"
+    sweep = [{"name": "n0"}, {"name": "n1"}]
+    run = lambda: FusionChain.run_many(
+        sweep, ["a", "b"], flaky, ["Hello {{name}}"], evaluator, str, str(sink)
+    )
+
+    assert run() == 1
+    with open(sink) as f:
+        errors = [json.loads(line) for line in f if '"error"' in line]
+    assert [error["index"] for error in errors] == [1]
+    assert "boom" in errors[0]["error"]
+
+    calls.clear()
+    failing.clear()
+    assert run() == 1
+    assert set(calls) == {"Hello n1"}
+    assert sorted(index for index, _ in FusionChain.read_many(str(sink))) == [0, 1]
+
+
+def test_resuming_onto_a_torn_line_keeps_the_next_result(tmp_path):
+    sink = tmp_path / "sweep.jsonl"
+    run_many(contexts(2), sink)
+    # A run killed in the middle of writing context 2
+    with open(sink, "a") as f:
+        f.write('{"index": 2, "result": {"top_resp')
+
+    assert run_many(contexts(4), sink) == 2
+
+    with open(sink) as f:
+        lines = f.read().splitlines()
+    assert sorted(json.loads(line)["index"] for line in lines[:2]) == [0, 1]
+    assert sorted(json.loads(line)["index"] for line in lines[2:]) == [2, 3]
+    assert sorted(index for index, _ in FusionChain.read_many(str(sink))) == [
+        0,
+        1,
+        2,
+        3,
+    ]
@@ -0,0 +1,91 @@
+import threading
+
+from src.marimo_notebook.modules.chain import FusionChain
+from src.marimo_notebook.modules.fake_model import FakeLatency, FakeModel
+from src.marimo_notebook.modules.scheduler import TaskScheduler
+
+INSTANT = FakeLatency(
+    distribution="constant", median_seconds=0.0, tokens_per_second=1e9
+)
+PROMPTS = ["Answer {{question}}", "Check {{output[-1]}}", "Shorten {{output[-1]}}"]
+CONTEXT = {"question": "why?"}
+
+
+def call(model, prompt):
+    return model.prompt(prompt).text()
+
+
+def model_name(model):
+    return model.model_id
+
+
+def evaluator(outputs):
+    return outputs[0], [1.0] * len(outputs)
+
+
+def test_a_stuck_model_only_holds_one_worker():
+    gate = threading.Event()
+    models = [
+        FakeModel("stuck", latency=INSTANT, sleep=lambda seconds: gate.wait(5)),
+        FakeModel("a", latency=INSTANT),
+        FakeModel("b", latency=INSTANT),
+    ]
+
+    stream = FusionChain.iter_scheduled(
+        CONTEXT, models, call, PROMPTS, model_name, num_workers=2
+    )
+    # Both other chains finish on the second worker while "stuck" waits
+    finished = {next(stream).index, next(stream).index}
+    gate.set()
+    last = next(stream)
+
+    assert finished == {1, 2}
+    assert (last.index, last.llm_model_name) == (0, "stuck")
+    assert models[0].calls == 3
+
+
+def test_run_scheduled_matches_run():
+    models = [FakeModel(name, latency=INSTANT) for name in ["a", "b", "c"]]
+    assert FusionChain.run_scheduled(
+        CONTEXT, models, call, PROMPTS, evaluator, model_name, num_workers=2
+    ) == FusionChain.run(CONTEXT, models, call, PROMPTS, evaluator, model_name)
+
+
+def test_group_limits_cap_concurrent_tasks_per_group():
+    lock = threading.Lock()
+    running = {"limited": 0, "free": 0}
+    peak = {"limited": 0, "free": 0}
+
+    def execute(group, index):
+        with lock:
+            running[group] += 1
+            peak[group] = max(peak[group], running[group])
+        with lock:
+            running[group] -= 1
+        return (group, index)
+
+    scheduler = TaskScheduler(num_workers=4, group_limits={"limited": 1})
+    independent = [[] for _ in range(20)]
+    results = dict(
+        scheduler.iter_groups({"limited": independent, "free": independent}, execute)
+    )
+
+    assert peak["limited"] == 1
+    assert results["limited"] == [("limited", index) for index in range(20)]
+    assert results["free"] == [("free", index) for index in range(20)]
+
+
+def test_tasks_wait_for_their_dependencies():
+    order = []
+
+    def execute(group, index):
+        order.append(index)
+        return index
+
+    graph = [[], [0], [0], [1, 2]]
+    ((group, results),) = TaskScheduler(num_workers=4).iter_groups(
+        {"g": graph}, execute
+    )
+
+    assert results == [0, 1, 2, 3]
+    assert order[0] == 0 and order[-1] == 3
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from src.marimo_notebook.modules import prompt_library_module
+from src.marimo_notebook.modules.prompt_index import PromptIndex
+from src.marimo_notebook.modules.search_index import SearchIndex
+
+PROMPTS = {
+    "summaries/article.xml": "Summarize the article in three bullet points.",
+    "code/debug.md": "Find the bug in this Python code and summarize the fix.",
+    "code/explain.md": "Explain what this code does.",
+}
+
+
+def test_every_term_must_match_and_the_last_one_is_a_prefix():
+    index = SearchIndex.from_prompts(PROMPTS)
+    assert index.search("code summ") == ["code/debug.md"]
+    # Ties are ordered by path
+    assert index.search("summarize") == ["code/debug.md", "summaries/article.xml"]
+    assert index.search("sum code") == []
+    assert index.search("  ") == []
+
+
+def test_name_matches_rank_first():
+    index = SearchIndex.from_prompts(PROMPTS)
+    assert index.search("code") == ["code/debug.md", "code/explain.md"]
+    assert index.search("code", limit=1) == ["code/debug.md"]
+    assert index.search("article") == ["summaries/article.xml"]
+
+
+def test_trigrams_match_inside_words():
+    assert SearchIndex.from_prompts(PROMPTS).search("mmari") == []
+    index = SearchIndex.from_prompts(PROMPTS, trigrams=True)
+    # "summaries" in the name also matches
+    assert index.search("mmari") == ["summaries/article.xml", "code/debug.md"]
+
+
+def test_updates_and_removals_are_incremental():
+    index = SearchIndex.from_prompts(PROMPTS, trigrams=True)
+    index.update("code/explain.md", "Translate this code to Rust.")
+    index.remove("code/debug.md")
+    assert index.search("rust") == ["code/explain.md"]
+    assert index.search("explain") == ["code/explain.md"]
+    assert index.search("python") == []
+    assert index.search("ytho") == []
+    assert len(index) == 2
+
+
+@pytest.fixture
+def prompts(tmp_path):
+    root = tmp_path / "prompts"
+    for path, body in PROMPTS.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(body)
+    return PromptIndex(str(root), index_path=str(tmp_path / "index" / "prompts.json"))
+
+
+def test_search_index_is_saved_next_to_the_prompt_index(prompts, tmp_path):
+    index = prompt_library_module.build_search_index(prompts)
+    assert index.search("bullet") == ["summaries/article.xml"]
+    assert os.path.exists(tmp_path / "index" / "prompts.search.json")
+
+    # Reopening reads no prompt bodies
+    reopened = SearchIndex.open(index.path, trigrams=True)
+    assert reopened.sync(prompts) == 0
+    assert reopened.search("ullet") == ["summaries/article.xml"]
+
+
+def test_sync_only_reindexes_changed_prompts(prompts):
+    prompt_library_module.build_search_index(prompts)
+    with open(os.path.join(prompts.root, "code", "explain.md"), "w") as f:
+        f.write("Port this code to Rust.")
+    os.remove(os.path.join(prompts.root, "code", "debug.md"))
+    prompts.refresh()
+
+    index = SearchIndex.open(os.path.splitext(prompts.index_path)[0] + ".search.json")
+    assert index.sync(prompts) == 2
+    assert index.search("rust") == ["code/explain.md"]
+    assert index.search("python") == []
+
+
+def test_apply_changes_persists_watcher_deltas(prompts):
+    index = prompt_library_module.build_search_index(prompts)
+    with open(os.path.join(prompts.root, "code", "new.md"), "w") as f:
+        f.write("Write unit tests.")
+    index.apply_changes(prompts.update_paths(["code/new.md"]), prompts)
+
+    reopened = SearchIndex.open(index.path)
+    assert reopened.search("unit") == ["code/new.md"]
+    assert reopened.sync(prompts) == 0
@@ -0,0 +1,35 @@
+import os
+
+from src.marimo_notebook.modules.template_cache import TemplateCache
+
+
+def test_persisted_modules_are_pruned_to_max_disk_entries(tmp_path):
+    cache = TemplateCache(module_directory=str(tmp_path), max_disk_entries=3)
+    for index in range(5):
+        assert cache.render(f"${{x}} {index}", {"x": "v"}) == f"v {index}"
+
+    sources = os.listdir(tmp_path / "sources")
+    modules = [name for name in os.listdir(tmp_path) if name.endswith(".mako.py")]
+    assert len(sources) == 3
+    assert sorted(modules) == sorted(f"{name}.py" for name in sources)
+
+
+def test_a_new_cache_reuses_persisted_modules(tmp_path):
+    TemplateCache(module_directory=str(tmp_path)).render("hi ${x}", {"x": 1})
+    cache = TemplateCache(module_directory=str(tmp_path))
+    assert cache.render("hi ${x}", {"x": 2}) == "hi 2"
+
+
+def test_persisted_modules_are_not_recompiled_by_a_new_cache(tmp_path):
+    TemplateCache(module_directory=str(tmp_path)).render("hi ${x}", {"x": 1})
+    (source,) = os.listdir(tmp_path / "sources")
+    source_path = tmp_path / "sources" / source
+    module_path = tmp_path / f"{source}.py"
+    # As if compiled in an earlier session
+    os.utime(source_path, (1_000_000, 1_000_000))
+    os.utime(module_path, (2_000_000, 2_000_000))
+
+    TemplateCache(module_directory=str(tmp_path)).render("hi ${x}", {"x": 2})
+
+    assert os.stat(source_path).st_mtime == 1_000_000
+    assert os.stat(module_path).st_mtime == 2_000_000
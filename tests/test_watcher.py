@@ -0,0 +1,60 @@
+import os
+import time
+
+import pytest
+
+from src.marimo_notebook.modules import prompt_library_module
+from src.marimo_notebook.modules.prompt_index import PromptIndex
+from src.marimo_notebook.modules.watcher import PromptWatcher
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def prompts(tmp_path):
+    root = tmp_path / "prompts"
+    root.mkdir()
+    (root / "one.xml").write_text("one")
+    yield PromptIndex(str(root), index_path=str(tmp_path / "index.json"))
+    prompt_library_module.stop_watching_prompts()
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_watcher_applies_edits_to_the_index(prompts, use_inotify):
+    watcher = PromptWatcher(prompts, poll_interval=0.05, use_inotify=use_inotify)
+    watcher.start()
+    try:
+        with open(os.path.join(prompts.root, "two.xml"), "w") as f:
+            f.write("two")
+        os.remove(os.path.join(prompts.root, "one.xml"))
+
+        wait_for(lambda: "two.xml" in prompts and "one.xml" not in prompts)
+        assert prompts["two.xml"] == "two"
+        drained = {"added": [], "modified": [], "removed": []}
+
+        def drain():
+            for kind, paths in watcher.drain().items():
+                drained[kind].extend(paths)
+            return drained["added"] and drained["removed"]
+
+        wait_for(drain)
+        assert drained == {"added": ["two.xml"], "modified": [], "removed": ["one.xml"]}
+    finally:
+        watcher.stop()
+
+
+def test_watching_a_directory_again_stops_the_previous_watcher(prompts):
+    first = prompt_library_module.watch_prompts(prompts)
+    second = prompt_library_module.watch_prompts(prompts)
+
+    assert not first._thread.is_alive()
+    assert second._thread.is_alive()
+
+    prompt_library_module.stop_watching_prompts()
+    assert not second._thread.is_alive()